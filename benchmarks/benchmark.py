@@ -0,0 +1,378 @@
+import os
+
+# The renderer benchmark draws offscreen, so it runs on machines without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from sim.config import SimConfig
+from sim.flight import DroneFlight
+from sim.coverage import Coverage
+from sim.analytic_coverage import AnalyticCoverage
+from sim.telemetry import TelemetryWriter, read_telemetry
+from tools.lua_runner import LuaRunner
+
+"""
+This file is used to measure the performance of the simulation on pinned reference missions and to
+compare the results against a baseline, so speedups and regressions in `sim/` can be quantified.
+
+Run it from the repository root:
+
+    python -m benchmarks.benchmark
+    python -m benchmarks.benchmark --baseline baseline.json
+"""
+
+MISSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "missions")
+
+# The reference missions, each a Lua script and a settings file in MISSIONS_DIR
+MISSIONS = ("circle", "square", "offset_circle", "offset_square", "short", "long", "many_photos")
+
+# The compared metrics, whether higher values are better and the measurement holding their noise
+METRICS = {
+    ("simulation", "ticks_per_second"): (True, "noise"),
+    ("simulation", "sim_seconds_per_second"): (True, "noise"),
+    ("coverage", "raster_us_per_photo"): (False, "raster_noise"),
+    ("coverage", "analytic_us_per_photo"): (False, "analytic_noise"),
+    ("rendering", "fps"): (True, "noise"),
+    ("memory", "peak_bytes"): (False, None),
+}
+
+MAX_RENDER_FRAMES = 2000  # Frames drawn per mission, long flights are replayed in larger steps
+MIN_BENCHMARK_TIME = 1.0  # Seconds a timed benchmark is repeated for at least, so short missions are measured reliably
+NOISE_FACTOR = 3  # A slowdown only counts as a regression beyond the threshold plus this many times the measured noise
+
+def load_mission(name: str) -> tuple:
+    """
+    Loads a reference mission.
+
+    Args:
+        name (str): The mission name.
+
+    Returns:
+        tuple: The path of the Lua script and the configuration.
+    """
+    config = SimConfig.load(os.path.join(MISSIONS_DIR, f"{name}_settings.py"))
+    return os.path.join(MISSIONS_DIR, f"{name}.lua"), config
+
+def run_flight(lua_file: str, config: SimConfig, telemetry_file: str = None) -> tuple:
+    """
+    Flies a mission headless and counts the flight updates.
+
+    Args:
+        lua_file (str): The path of the Lua script.
+        config (SimConfig): The configuration.
+        telemetry_file (str, optional): Path to record a telemetry log to. Defaults to None.
+
+    Returns:
+        tuple: The finished flight and the number of flight updates (ticks).
+    """
+    telemetry = TelemetryWriter(telemetry_file, config) if telemetry_file else None
+    flight = DroneFlight(headless=True, telemetry=telemetry, config=config)
+    update = flight.update
+    ticks = [0]
+
+    def counted_update(delta_time):
+        ticks[0] += 1
+        update(delta_time)
+    flight.update = counted_update
+
+    runner = LuaRunner(flight, lua_script_path=lua_file)
+    try:
+        runner.execute()
+        if flight.running:
+            flight.end_flight()
+    finally:
+        runner.close()
+        if telemetry is not None:
+            telemetry.close()
+    return flight, ticks[0]
+
+def median_time(function, repeat: int) -> tuple:
+    """
+    Calls a function several times and returns the median time, after an untimed call that fills the caches.
+    Fast functions are called more often, until MIN_BENCHMARK_TIME has passed. The noise is the median
+    absolute deviation of the times relative to the median, so a comparison can tell changes from jitter.
+
+    Args:
+        function (callable): The function.
+        repeat (int): The minimum number of timed calls.
+
+    Returns:
+        tuple: The median time in seconds, its relative noise and the result of the last call.
+    """
+    result = function()
+    times = []
+    while len(times) < repeat or sum(times) < MIN_BENCHMARK_TIME:
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    median = float(np.median(times))
+    return median, float(np.median(np.abs(np.array(times) - median))) / median, result
+
+def benchmark_simulation(lua_file: str, config: SimConfig, repeat: int) -> tuple:
+    """
+    Measures the headless simulation throughput, without the coverage calculation.
+
+    Args:
+        lua_file (str): The path of the Lua script.
+        config (SimConfig): The configuration.
+        repeat (int): The minimum number of runs.
+
+    Returns:
+        tuple: The measurements and the finished flight.
+    """
+    seconds, noise, (flight, ticks) = median_time(lambda: run_flight(lua_file, config), repeat)
+    return {
+        "seconds": seconds,
+        "noise": noise,
+        "ticks": ticks,
+        "sim_time": flight.sim_time,
+        "ticks_per_second": ticks / seconds,
+        "sim_seconds_per_second": flight.sim_time / seconds,
+    }, flight
+
+def score_coverage(coverage_class, flight, config: SimConfig) -> tuple:
+    """
+    Scores the photos of a flight with a coverage backend.
+
+    Args:
+        coverage_class: Coverage or AnalyticCoverage.
+        flight (DroneFlight): The finished flight.
+        config (SimConfig): The configuration.
+
+    Returns:
+        tuple: The coverage and overlap percentages.
+    """
+    coverage = coverage_class(config)
+    coverage.add_boundary_to_coverage_map_n(config.BOUNDARY_SHAPE, config.BOUNDARY_PARAMS)
+    coverage.add_photos_to_coverage_map_n(flight.photos)
+    return coverage.calculate_coverage_n(), coverage.calculate_overlap_n()
+
+def benchmark_coverage(flight, config: SimConfig, repeat: int) -> tuple:
+    """
+    Measures the time to score the photos of a flight with both coverage backends.
+
+    Args:
+        flight (DroneFlight): The finished flight.
+        config (SimConfig): The configuration.
+        repeat (int): The minimum number of runs.
+
+    Returns:
+        tuple: The measurements and the scores of the configured backend.
+    """
+    photos = max(len(flight.photos), 1)
+    raster_seconds, raster_noise, raster = median_time(lambda: score_coverage(Coverage, flight, config), repeat)
+    analytic_seconds, analytic_noise, analytic = median_time(lambda: score_coverage(AnalyticCoverage, flight, config), repeat)
+    scores = analytic if config.COVERAGE_BACKEND == 'analytic' else raster
+    return {
+        "raster_seconds": raster_seconds,
+        "raster_noise": raster_noise,
+        "raster_us_per_photo": raster_seconds / photos * 1e6,
+        "analytic_seconds": analytic_seconds,
+        "analytic_noise": analytic_noise,
+        "analytic_us_per_photo": analytic_seconds / photos * 1e6,
+    }, scores
+
+def benchmark_rendering(telemetry_file: str, config: SimConfig, repeat: int, max_frames: int = MAX_RENDER_FRAMES) -> dict:
+    """
+    Measures the renderer frame rate by replaying a recorded flight offscreen, one frame per
+    real-time frame of the simulation (SIMULATION_SPEED / FPS simulated seconds), up to max_frames.
+    The replay is drawn several times from the start and the median counts.
+
+    Args:
+        telemetry_file (str): The telemetry log of the flight.
+        config (SimConfig): The configuration.
+        repeat (int): The minimum number of replays.
+        max_frames (int, optional): The maximum number of frames. Defaults to MAX_RENDER_FRAMES.
+
+    Returns:
+        dict: The measurements.
+    """
+    import pygame
+    from sim.renderer import DroneRenderer
+    from tools.replay import ReplayFlight, TelemetryReplay
+    replay = TelemetryReplay(read_telemetry(telemetry_file))
+    step = max(config.SIMULATION_SPEED / config.FPS, replay.duration / max_frames)
+    frame_times = np.arange(0, replay.duration + step, step).clip(max=replay.duration)
+    renderer = DroneRenderer(ReplayFlight(replay, config), config=config)
+
+    def draw_replay():
+        flight = ReplayFlight(replay, config)
+        renderer.reset(flight)
+        for frame_time in frame_times:
+            flight.advance_to(frame_time)
+            renderer.draw()
+    try:
+        seconds, noise, _ = median_time(draw_replay, repeat)
+    finally:
+        pygame.quit()
+    return {"frames": len(frame_times), "seconds": seconds, "noise": noise, "fps": len(frame_times) / seconds}
+
+def benchmark_memory(lua_file: str, config: SimConfig) -> dict:
+    """
+    Measures the peak traced memory of a headless run, including the coverage calculation.
+
+    Args:
+        lua_file (str): The path of the Lua script.
+        config (SimConfig): The configuration.
+
+    Returns:
+        dict: The measurements.
+    """
+    tracemalloc.start()
+    try:
+        flight, _ = run_flight(lua_file, config)
+        score_coverage(AnalyticCoverage if config.COVERAGE_BACKEND == 'analytic' else Coverage, flight, config)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak}
+
+def benchmark_mission(name: str, repeat: int, render: bool) -> dict:
+    """
+    Runs all benchmarks of a reference mission.
+
+    Args:
+        name (str): The mission name.
+        repeat (int): The minimum number of runs of the timed benchmarks.
+        render (bool): Whether to measure the renderer.
+
+    Returns:
+        dict: The measurements by benchmark, and the flight results to check that the mission behaved the same.
+    """
+    lua_file, config = load_mission(name)
+    result = {}
+    result["simulation"], flight = benchmark_simulation(lua_file, config, repeat)
+    result["coverage"], (coverage, overlap) = benchmark_coverage(flight, config, repeat)
+    result["memory"] = benchmark_memory(lua_file, config)
+    if render:
+        with tempfile.TemporaryDirectory() as directory:
+            telemetry_file = os.path.join(directory, "telemetry.jsonl")
+            run_flight(lua_file, config, telemetry_file)
+            result["rendering"] = benchmark_rendering(telemetry_file, config, repeat)
+    result["results"] = {"coverage": coverage, "overlap": overlap, "photo_count": len(flight.photos),
+                         "flight_time": flight.sim_time}
+    return result
+
+def run_benchmarks(missions=MISSIONS, repeat: int = 5, render: bool = True) -> dict:
+    """
+    Runs the benchmarks of several reference missions.
+
+    Args:
+        missions (tuple, optional): The mission names. Defaults to all MISSIONS.
+        repeat (int, optional): The minimum number of runs of the timed benchmarks. Defaults to 5.
+        render (bool, optional): Whether to measure the renderer. Defaults to True.
+
+    Returns:
+        dict: The machine description and the measurements by mission.
+    """
+    results = {
+        "machine": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                    "processor": platform.processor()},
+        "repeat": repeat,
+        "missions": {},
+    }
+    for name in missions:
+        print(f"Benchmarking '{name}'...", flush=True)
+        results["missions"][name] = benchmark_mission(name, repeat, render)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float = 0.25) -> int:
+    """
+    Compares benchmark results against a baseline and prints the changes. Changes larger than the threshold
+    are reported as faster or slower, but a slowdown only counts as a regression if it is also larger than
+    the threshold plus NOISE_FACTOR times the noise of the metric in either run, so the jitter between
+    runs on a busy machine doesn't fail a comparison.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The baseline results.
+        threshold (float, optional): The relative change reported as faster or slower. Defaults to 0.25.
+
+    Returns:
+        int: The number of regressions, including missions whose flight results changed.
+    """
+    regressions = 0
+    for name, mission in results["missions"].items():
+        base = baseline["missions"].get(name)
+        if base is None:
+            print(f"{name}: not in the baseline")
+            continue
+        if base.get("results") != mission["results"]:
+            print(f"{name}: flight results changed from {base.get('results')} to {mission['results']}")
+            regressions += 1
+        for (group, metric), (higher_is_better, noise_key) in METRICS.items():
+            if metric not in mission.get(group, {}) or metric not in base.get(group, {}):
+                continue
+            old, new = base[group][metric], mission[group][metric]
+            change = (new - old) / old if old else 0.0
+            improvement = change if higher_is_better else -change
+            noise = max(base[group].get(noise_key, 0.0), mission[group].get(noise_key, 0.0)) if noise_key else 0.0
+            if improvement < -(threshold + NOISE_FACTOR * noise):
+                status = "REGRESSION"
+            elif abs(improvement) > threshold:
+                status = ("faster" if improvement > 0 else "slower") if group != "memory" else ("smaller" if improvement > 0 else "larger")
+            else:
+                status = ""
+            regressions += status == "REGRESSION"
+            print(f"{name:>14} {group}.{metric:<24} {old:>14.6g} -> {new:>14.6g} {change:+8.1%} (noise {noise:5.1%}) {status}")
+    return regressions
+
+def print_results(results: dict) -> None:
+    """
+    Prints a summary of the measurements.
+
+    Args:
+        results (dict): The benchmark results.
+    """
+    for name, mission in results["missions"].items():
+        simulation, coverage = mission["simulation"], mission["coverage"]
+        line = (f"{name:>14}: {simulation['ticks_per_second']:>9.0f} ticks/s, "
+                f"{simulation['sim_seconds_per_second']:>9.0f} sim s/s, "
+                f"raster {coverage['raster_us_per_photo']:>7.1f} us/photo, "
+                f"analytic {coverage['analytic_us_per_photo']:>7.1f} us/photo, "
+                f"peak {mission['memory']['peak_bytes'] / 2**20:>6.1f} MiB")
+        if "rendering" in mission:
+            line += f", {mission['rendering']['fps']:>6.0f} fps"
+        print(line)
+
+def parse_arguments():
+    """
+    Parses the command-line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command-line arguments.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks the simulation on pinned reference missions")
+    parser.add_argument("-m", "--missions", type=str, help=f"Comma-separated missions to run (default: all of {', '.join(MISSIONS)})")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Minimum runs per timed benchmark, the median run counts (default: 5)")
+    parser.add_argument("--no-render", action="store_true", help="Skip the renderer benchmark")
+    parser.add_argument("-o", "--output", type=str, default="benchmark_results.json", help="JSON file for the results (default: benchmark_results.json)")
+    parser.add_argument("-b", "--baseline", type=str, help="JSON results of an earlier run to compare against")
+    parser.add_argument("-t", "--threshold", type=float, default=0.25, help="Relative change reported as faster or slower, regressions must also exceed the noise (default: 0.25)")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    missions = tuple(name.strip() for name in args.missions.split(",")) if args.missions else MISSIONS
+    unknown = set(missions).difference(MISSIONS)
+    if unknown:
+        sys.exit(f"Unknown missions: {', '.join(sorted(unknown))}")
+    results = run_benchmarks(missions, args.repeat, not args.no_render)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print_results(results)
+    print(f"Saved benchmark results to '{args.output}'")
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"{regressions} regression(s) against '{args.baseline}'")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,9 @@
+# Reference mission: concentric circles in the default circular area
+BOUNDARY_SHAPE = 'circle'
+BOUNDARY_PARAMS = {
+    "x": 100,
+    "y": 0,
+    "radius": 130
+}
+FLIGHT_DURATION = 8
+PRINT_OUTPUT = False
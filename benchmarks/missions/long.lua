@@ -0,0 +1,37 @@
+-- Long reference mission: lawnmower survey controlled in half second steps for an hour
+
+local VELOCITY = 6
+local STEP = 0.5  -- Seconds between two control updates
+local LANE_SPACING = 20
+local MIN_X, MAX_X = -680, 680
+local MIN_Y, MAX_Y = -230, 230
+local MAX_FLIGHT_TIME = 3600
+
+local flight_time = 0
+
+-- Fly towards a target in control steps, correcting the velocity on every step
+local function fly_to(target_x, target_y)
+    while flight_time < MAX_FLIGHT_TIME do
+        local dx, dy = target_x - get_x_coordinate(), target_y - get_y_coordinate()
+        local distance = math.sqrt(dx^2 + dy^2)
+        if distance < VELOCITY * STEP then
+            return
+        end
+        adjust_flight_parameters(VELOCITY * dx / distance, VELOCITY * dy / distance, 0)
+        pause_script_execution(STEP)
+        flight_time = flight_time + STEP
+        if math.floor(flight_time) == flight_time and flight_time % 4 == 0 then
+            take_photo()
+        end
+    end
+end
+
+fly_to(MIN_X, MIN_Y)
+local y, direction = MIN_Y, 1
+while y <= MAX_Y and flight_time < MAX_FLIGHT_TIME do
+    fly_to(direction > 0 and MAX_X or MIN_X, y)
+    y = y + LANE_SPACING
+    fly_to(direction > 0 and MAX_X or MIN_X, y)
+    direction = -direction
+end
+end_flight()
@@ -0,0 +1,10 @@
+# Reference mission: a one hour lawnmower survey with a short control step, dominated by the flight updates
+BOUNDARY_SHAPE = 'rectangle'
+BOUNDARY_PARAMS = {
+    'v1': (-700, -250),
+    'v2': (700, -250),
+    'v3': (700, 250),
+    'v4': (-700, 250)
+}
+FLIGHT_DURATION = 60
+PRINT_OUTPUT = False
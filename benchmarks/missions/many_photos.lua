@@ -0,0 +1,31 @@
+-- Many photos reference mission: dense lawnmower grid with a photo every second
+
+local VELOCITY = 6
+local LANE_SPACING = 12
+local MIN_X, MAX_X = -290, 290
+local MIN_Y, MAX_Y = -190, 190
+
+local function fly_to(target_x, target_y)
+    local dx, dy = target_x - get_x_coordinate(), target_y - get_y_coordinate()
+    local distance = math.sqrt(dx^2 + dy^2)
+    if distance == 0 then
+        return
+    end
+    local duration = distance / VELOCITY
+    adjust_flight_parameters(dx / duration, dy / duration, 0)
+    for _ = 1, math.floor(duration) do
+        pause_script_execution(1)
+        take_photo()
+    end
+    pause_script_execution(duration - math.floor(duration))
+end
+
+fly_to(MIN_X, MIN_Y)
+local y, direction = MIN_Y, 1
+while y <= MAX_Y do
+    fly_to(direction > 0 and MAX_X or MIN_X, y)
+    y = y + LANE_SPACING
+    fly_to(direction > 0 and MAX_X or MIN_X, y)
+    direction = -direction
+end
+end_flight()
@@ -0,0 +1,8 @@
+# Reference mission: a dense photo grid over a polygon with a hole, dominated by the coverage scoring (the grid also crosses the hole)
+BOUNDARY_SHAPE = 'polygon'
+BOUNDARY_PARAMS = {
+    "vertices": [(-300, -200), (300, -200), (350, 0), (300, 200), (-300, 200), (-350, 0)],
+    "holes": [[(-50, -50), (50, -50), (50, 50), (-50, 50)]]
+}
+FLIGHT_DURATION = 30
+PRINT_OUTPUT = False
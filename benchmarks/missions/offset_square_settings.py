@@ -0,0 +1,10 @@
+# Reference mission: a small rectangle next to the start point, mostly flown outside of it
+BOUNDARY_SHAPE = 'rectangle'
+BOUNDARY_PARAMS = {
+    'v1': (0, 25),
+    'v2': (50, 25),
+    'v3': (50, -25),
+    'v4': (0, -25)
+}
+FLIGHT_DURATION = 8
+PRINT_OUTPUT = False
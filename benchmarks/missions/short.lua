@@ -0,0 +1,16 @@
+-- Short reference mission: fly east and back, taking a photo every 3 seconds
+
+local VELOCITY = 5
+local PHOTO_INTERVAL = 3
+
+local function fly(x_velocity, duration)
+    adjust_flight_parameters(x_velocity, 0, 0)
+    for _ = 1, duration / PHOTO_INTERVAL do
+        take_photo()
+        pause_script_execution(PHOTO_INTERVAL)
+    end
+end
+
+fly(VELOCITY, 15)
+fly(-VELOCITY, 15)
+end_flight()
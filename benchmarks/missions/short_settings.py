@@ -0,0 +1,9 @@
+# Reference mission: a 30 second flight, dominated by the fixed costs of a run
+BOUNDARY_SHAPE = 'circle'
+BOUNDARY_PARAMS = {
+    "x": 0,
+    "y": 0,
+    "radius": 100
+}
+FLIGHT_DURATION = 1
+PRINT_OUTPUT = False
@@ -0,0 +1,10 @@
+# Reference mission: lawnmower survey of a 200 x 200 m square around the start point
+BOUNDARY_SHAPE = 'rectangle'
+BOUNDARY_PARAMS = {
+    'v1': (-100, -100),
+    'v2': (-100, 100),
+    'v3': (100, -100),
+    'v4': (100, 100)
+}
+FLIGHT_DURATION = 8
+PRINT_OUTPUT = False
@@ -10,7 +10,6 @@ LUA_SCRIPT_PATH = "examples/offset_square.lua"
 
 # Drone photo and path settings
 PHOTO_COLOR = (200, 200, 200)
-PHOTO_SIZE = 19
 PATH_COLOR = (255, 255, 0, 0.1)
 
 # Shape and size of area
@@ -1,49 +1,238 @@
-import pygame
 import argparse
-import settings
-from sim.flight import DroneFlight
-from sim.renderer import DroneRenderer
-from tools.lua_runner import LuaRunner
-from sim.utils import to_screen_coords
+from sim.config import SimConfig
 
-def main_simulation():
+# The modes import their modules when they run, so e.g. creating a prompt doesn't load pygame or lupa
+
+def create_profiler(config):
+    """
+    Function to create and start a profiler with the profiling settings.
+
+    Args:
+        config (SimConfig): The simulation configuration.
+
+    Returns:
+        Profiler: The started profiler.
+    """
+    from tools.profiler import Profiler
+    profiler = Profiler(config.PROFILE_TRACE_ALLOCATIONS, config.PROFILE_TOP_ALLOCATIONS)
+    profiler.start()
+    return profiler
+
+def main_simulation(lua_file=None, telemetry_file=None, config=None, profile_file=None):
     """
     Main function to run the drone simulation.
-    Initializes the flight and renderer objects, executes the Lua script,
-    and runs the main simulation loop until the flight ends.
+    Initializes the flight and renderer objects, starts the Lua script as a coroutine
+    in a simulation thread, and draws the snapshots the thread publishes at the frame
+    rate until the flight ends. The script is resumed by a scheduler when its pauses
+    end, and a slow display only drops frames, it never slows down the simulation.
+
+    Args:
+        lua_file (str, optional): Path to the Lua script to simulate. Defaults to config.LUA_SCRIPT_PATH.
+        telemetry_file (str, optional): Path to stream a telemetry log of the run to. Defaults to None.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        profile_file (str, optional): Path to write a profile report of the run to. Defaults to None.
     """
-    # Initialize flight and renderer objects
-    flight = DroneFlight()
-    renderer = DroneRenderer(flight)
+    import pygame
+    from sim.flight import DroneFlight
+    from sim.renderer import DroneRenderer
+    from sim.telemetry import TelemetryWriter
+    from sim.constraints import describe_violation
+    from sim.snapshot import SnapshotChannel, SnapshotPublisher
+    from tools.lua_runner import LuaRunner
+    from tools.scheduler import ScriptScheduler, SimulationThread
+    from tools.profiler import profile_phase
+    config = config or SimConfig.default()
+    profiler = create_profiler(config) if profile_file else None
+
+    # Initialize flight and renderer objects, the flight time is taken from the simulated clock
+    with profile_phase(profiler, "setup"):
+        telemetry = TelemetryWriter(telemetry_file, config) if telemetry_file else None
+        flight = DroneFlight(headless=True, telemetry=telemetry, config=config)
+        renderer = DroneRenderer(flight, config=config)
+        lua_runner = LuaRunner(flight, renderer, lua_script_path=lua_file)
+    if profiler is not None:
+        profiler.instrument(flight, "update")
+        profiler.instrument_frames(renderer)
+        profiler.instrument_runner(lua_runner)
+        profiler.instrument(lua_runner, "resume", "lua")
 
-    # Optionally execute the Lua script (which will use the flight API)
-    lua_runner = LuaRunner(flight, renderer)
-    lua_runner.execute()
+    # Run the Lua script (which will use the flight API) in the simulation thread, it runs whenever its pause has ended
+    scheduler = ScriptScheduler(lambda: flight.sim_time, flight.update, lambda: flight.running)
+    scheduler.add(lua_runner)
+    channel = SnapshotChannel()
+    publisher = SnapshotPublisher(flight)
+    simulation = SimulationThread(scheduler, lambda: channel.publish(publisher.take()), config.SIMULATION_SPEED, config.FPS)
+    simulation.start()
 
-    # Main simulation loop
+    # Main loop, draws the latest snapshot once per frame
     clock = pygame.time.Clock()
-    while flight.running:
-        delta_time = (clock.tick(settings.FPS) / 1000.0) * settings.SIMULATION_SPEED
+    finished = False
+    while not finished:
+        clock.tick(config.FPS)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                flight.running = False
+                simulation.stop()
 
-        flight.update(delta_time)
-        renderer.draw()
+        finished = not simulation.is_alive()
+        snapshot = channel.take()
+        if snapshot is not None:
+            renderer.draw(snapshot)
+    simulation.join()
+    if simulation.error is not None:
+        raise simulation.error
+    if channel.dropped:
+        print(f"Dropped {channel.dropped} of {channel.published} frames")
+    if flight.termination is not None:
+        print(f"Flight terminated: {describe_violation(flight.termination)}")
+    if flight.target_reached:
+        print(f"Flight ended early: coverage target of {config.COVERAGE_TARGET:g}% reached")
 
-    # After simulation ends, draw final info
-    renderer.draw_colorbar(50, int(settings.HEIGHT / 4), 50, int(settings.HEIGHT / 2))
-    flight.end_flight()  # Record flight time
-    renderer.print_info()
+    # After simulation ends, draw the coverage heatmap and the final flight path
+    if flight.running:
+        flight.end_flight()  # Record flight time, unless the script, a violation or the coverage target ended the flight
+    with profile_phase(profiler, "coverage"):
+        renderer.draw_result()
+        renderer.print_info()
 
-    # Draw final flight path
-    for point in flight.path:
-        pygame.draw.circle(renderer.screen, settings.PATH_COLOR, to_screen_coords(point), 1)
-
-    pygame.display.update()
+    if telemetry is not None:
+        telemetry.close()
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(profile_file)
     renderer.wait_for_exit()
     pygame.quit()
 
+def headless_simulation(lua_file=None, telemetry_file=None, config=None, profile_file=None, image_file=None):
+    """
+    Function to run the drone simulation without a window on a simulated clock.
+    The flight runs as fast as the CPU allows and gives the same results on every run.
+
+    Args:
+        lua_file (str, optional): Path to the Lua script to simulate. Defaults to config.LUA_SCRIPT_PATH.
+        telemetry_file (str, optional): Path to stream a telemetry log of the run to. Defaults to None.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        profile_file (str, optional): Path to write a profile report of the run to. Defaults to None.
+        image_file (str, optional): Path to save an image of the result to, rendered without a window. Defaults to None.
+    """
+    from sim.headless import run_headless
+    from sim.constraints import describe_violation
+    config = config or SimConfig.default()
+    profiler = create_profiler(config) if profile_file else None
+    result = run_headless(lua_file, telemetry_file, config=config, profiler=profiler, image_file=image_file)
+    if profiler is not None:
+        profiler.stop()
+    minutes = int(result["flight_time"] // 60)
+    seconds = int(result["flight_time"] % 60)
+    print("\n################################\n")
+    print(f"Total flight time: {minutes} Minutes, {seconds} Seconds")
+    print(f"Photos taken: {result['photo_count']}")
+    print(f"Coverage: {result['coverage']}%")
+    print(f"Overlap: {result['overlap']}%")
+    if result["violations"]:
+        print(f"Constraint violations: {len(result['violations'])}")
+        for violation in result["violations"]:
+            print(f"  {describe_violation(violation)}")
+    if result["terminated"]:
+        print(f"Flight terminated early: {result['terminated']}")
+    if result["target_reached"]:
+        print(f"Flight ended early: coverage target of {config.COVERAGE_TARGET:g}% reached")
+    print("\n################################\n")
+    if image_file is not None:
+        print(f"Saved an image of the result to '{image_file}'")
+    if profiler is not None:
+        profiler.write_report(profile_file)
+
+def fleet_simulation(lua_files, drones=None, telemetry_file=None, config=None):
+    """
+    Function to run a fleet of drones headless on a simulated clock, every drone flown by its own Lua script.
+
+    Args:
+        lua_files (list): Paths to the Lua scripts of the drones.
+        drones (int, optional): The number of drones, the scripts are assigned to them in turn. Defaults to one drone per script.
+        telemetry_file (str, optional): Path to stream a telemetry log of all drones to. Defaults to None.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+    """
+    from sim.fleet import run_fleet
+    from sim.constraints import describe_violation
+    config = config or SimConfig.default()
+    lua_files = [lua_files[i % len(lua_files)] for i in range(drones or len(lua_files))]
+    result = run_fleet(lua_files, telemetry_file=telemetry_file, config=config)
+    minutes = int(result["flight_time"] // 60)
+    seconds = int(result["flight_time"] % 60)
+    print("\n################################\n")
+    print(f"Drones: {len(lua_files)}")
+    print(f"Total flight time: {minutes} Minutes, {seconds} Seconds")
+    print(f"Photos taken: {result['photo_count']}")
+    print(f"Coverage: {result['coverage']}%")
+    print(f"Overlap: {result['overlap']}%")
+    for number, drone in enumerate(result["drones"], 1):
+        print(f"  Drone {number} ({drone['script']}): {drone['flight_time']:.1f} s, {drone['photo_count']} photos, "
+              f"{len(drone['violations'])} violations")
+        if drone["terminated"]:
+            print(f"    Flight terminated early: {drone['terminated']}")
+    if result["violations"]:
+        print(f"Constraint violations: {len(result['violations'])}")
+        for violation in result["violations"]:
+            print(f"  Drone {violation['drone']}: {describe_violation(violation)}")
+    if result["target_reached"]:
+        print(f"Flights ended early: coverage target of {config.COVERAGE_TARGET:g}% reached")
+    print("\n################################\n")
+
+def batch_simulation(directory, jobs=None, output_file="batch_results.csv", config=None, thumbnail_dir=None):
+    """
+    Function to run every Lua script in a directory headless on a process pool.
+
+    Args:
+        directory (str): The directory containing the Lua scripts.
+        jobs (int, optional): The number of worker processes. Defaults to None, which uses all cores.
+        output_file (str): Path to the CSV or JSON results file. Defaults to "batch_results.csv".
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        thumbnail_dir (str, optional): Directory to save a thumbnail of every script's result to. Defaults to None.
+    """
+    from tools.batch import run_batch
+    run_batch(directory, jobs, output_file, config, thumbnail_dir)
+
+def export_simulation(telemetry_files, output_dir="exports", export_format="image", jobs=None, config=None):
+    """
+    Function to render recorded telemetry logs without a window on a process pool.
+
+    Args:
+        telemetry_files (list): Paths to the telemetry logs.
+        output_dir (str): The directory to write the images, frame sequences or videos to. Defaults to "exports".
+        export_format (str): 'image' (the result as PNG), 'frames' (a PNG sequence) or 'video' (needs ffmpeg). Defaults to "image".
+        jobs (int, optional): The number of worker processes. Defaults to None, which uses all cores.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+    """
+    from tools.export import run_export
+    run_export(telemetry_files, output_dir, export_format, jobs, config)
+
+def sweep_simulation(lua_file, parameters, samples=None, seed=None, jobs=None, output_file="sweep_results.csv", config=None):
+    """
+    Function to run a Lua script headless for every parameter combination and save the Pareto front.
+
+    Args:
+        lua_file (str): Path to the Lua script.
+        parameters (list): The parameters as 'NAME=VALUES' strings.
+        samples (int, optional): Number of random combinations instead of the full grid. Defaults to None.
+        seed (int, optional): The random seed for the samples. Defaults to None.
+        jobs (int, optional): The number of worker processes. Defaults to None, which uses all cores.
+        output_file (str): Path to the CSV or JSON results file. Defaults to "sweep_results.csv".
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+    """
+    from tools.sweep import parse_parameter, run_sweep
+    run_sweep(lua_file, dict(parse_parameter(parameter) for parameter in parameters), samples, seed, jobs, output_file, config)
+
+def replay_simulation(telemetry_file, config=None):
+    """
+    Function to replay a recorded telemetry log in a window, without executing Lua.
+
+    Args:
+        telemetry_file (str): Path to the telemetry log.
+        config (SimConfig, optional): The simulation configuration for the screen and replay speed. Defaults to SimConfig.default().
+    """
+    from tools.replay import run_replay
+    run_replay(telemetry_file, config)
+
 def run_prompt(settings_file=None, output_file="prompt.txt", lua_file=None):
     """
     Function to create a prompt based on the settings file.
@@ -68,6 +257,26 @@ def parse_arguments():
                     "By default (no arguments), the simulation will run with settings from settings.py",
         epilog="Example usage:\n"
                 " python main.py           # Runs the simulation\n"
+                " python main.py --speed 0  # Runs the simulation in a window as fast as it can\n"
+                " python main.py --headless  # Runs the simulation without a window on a simulated clock\n"
+                " python main.py --lua script.lua  # Runs a specific Lua script\n"
+                " python main.py --headless --lua script.lua  # Runs a specific Lua script headless\n"
+                " python main.py -s examples/square_settings.py  # Runs the simulation with custom settings\n"
+                " python main.py --headless --telemetry run.jsonl  # Records a telemetry log of the run\n"
+                " python main.py --headless --profile  # Writes a profile report of the run to profile.json\n"
+                " python main.py --headless --image result.png  # Saves an image of the result without a window\n"
+                " python main.py --replay run.jsonl  # Replays a recorded telemetry log\n"
+                " python main.py --export logs/*.jsonl -o images/  # Renders the results of telemetry logs to PNG files\n"
+                " python main.py --export run.jsonl --export-format video  # Renders a telemetry log to exports/run.mp4\n"
+                " python main.py --fleet north.lua south.lua  # Flies two drones at once, each with its own script\n"
+                " python main.py --fleet script.lua --drones 8  # Flies eight drones with the same script\n"
+                " python main.py --batch scripts/ --jobs 8  # Scores every Lua script in a directory\n"
+                " python main.py --batch scripts/ -o results.json  # Saves the batch results as JSON\n"
+                " python main.py --batch scripts/ --thumbnails thumbs/  # Saves a thumbnail of every script's result\n"
+                " python main.py --batch scripts/ --stop-on boundary,duration  # Stops every flight at its first exit or overrun\n"
+                " python main.py --batch scripts/ --coverage-target 80  # Ends every flight once 80% of the area is covered\n"
+                " python main.py --sweep script.lua --param VELOCITY=3:8:1 --param LAYERS=3,4,5  # Sweeps script parameters\n"
+                " python main.py --sweep script.lua --param VELOCITY=3:8 --samples 50 --seed 1  # Samples random parameters\n"
                 " python main.py --prompt  # Creates a prompt with setting from settings.py\n"
                 " python main.py --prompt -s custom_settings.py # Creates a prompt with custom settings\n"
                 " python main.py --prompt --output custom_prompt.txt  # Saves the prompt to a different file\n"
@@ -75,14 +284,54 @@ def parse_arguments():
         formatter_class=argparse.RawTextHelpFormatter
     )
     parser.add_argument("-p", "--prompt", action="store_true", help="Create the required Prompt (doesn't run simulation)")
-    parser.add_argument("-s", "--settings", type=str, help="Specify a custom settings file (default: settings.py)")
-    parser.add_argument("-o", "--output", type=str, default="prompt.txt", help="Specify output filename (default: prompt.txt)")
+    parser.add_argument("-s", "--settings", type=str, help="Specify a custom settings file for the prompt or the simulation (default: settings.py)")
+    parser.add_argument("-o", "--output", type=str, help="Specify output filename (default: prompt.txt, batch_results.csv with --batch, sweep_results.csv with --sweep, exports with --export)")
     parser.add_argument("-i", "--improve", type=str, help="Improve the existing Lua script with given file")
+    parser.add_argument("--headless", action="store_true", help="Run the simulation without a window on a simulated clock")
+    parser.add_argument("-b", "--batch", type=str, help="Run every Lua script in the given directory headless and save the results")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of worker processes for --batch, --sweep and --export (default: all cores)")
+    parser.add_argument("--thumbnails", type=str, help="Save a thumbnail of every script's result to the given directory (--batch)")
+    parser.add_argument("--fleet", type=str, nargs="+", help="Run a fleet headless, one drone per given Lua script")
+    parser.add_argument("--drones", type=int, help="Number of drones for --fleet, the scripts are assigned in turn (default: one per script)")
+    parser.add_argument("--sweep", type=str, help="Run the given Lua script headless for every combination of the --param values")
+    parser.add_argument("--param", type=str, action="append", default=[], help="A sweep parameter as NAME=1,2,3 or NAME=start:stop:step (or NAME=low:high with --samples)")
+    parser.add_argument("--samples", type=int, help="Number of random parameter combinations for --sweep (default: the full grid)")
+    parser.add_argument("--seed", type=int, help="Random seed for --samples")
+    parser.add_argument("--stop-on", type=str, help="End flights at the first violation of these kinds, e.g. boundary,duration,velocity,yaw (default: settings.STOP_ON_VIOLATION)")
+    parser.add_argument("--coverage-target", type=float, help="End flights once this coverage percentage is reached (default: settings.COVERAGE_TARGET)")
+    parser.add_argument("--speed", type=float, help="Simulated seconds per real second in the window, 0 runs as fast as the simulation allows (default: settings.SIMULATION_SPEED)")
+    parser.add_argument("-t", "--telemetry", type=str, help="Stream a telemetry log of the run to the given file")
+    parser.add_argument("--profile", type=str, nargs="?", const="profile.json", help="Profile the run and write a JSON report to the given file (default: profile.json)")
+    parser.add_argument("-r", "--replay", type=str, help="Replay the given telemetry log without executing Lua")
+    parser.add_argument("--export", type=str, nargs="+", help="Render the given telemetry logs without a window to the --output directory (default: exports)")
+    parser.add_argument("--export-format", type=str, choices=("image", "frames", "video"), default="image", help="What --export renders: the result as PNG, a PNG frame sequence or an MP4 video with ffmpeg (default: image)")
+    parser.add_argument("--image", type=str, help="Save an image of the result to the given PNG file (--headless)")
+    parser.add_argument("-l", "--lua", type=str, help="Specify the Lua script to simulate (default: settings.LUA_SCRIPT_PATH)")
     return parser.parse_args()
 
 if __name__ == '__main__':
     args = parse_arguments()
     if args.prompt:
-        run_prompt(args.settings, args.output, args.improve)
+        run_prompt(args.settings, args.output or "prompt.txt", args.improve)
     else:
-        main_simulation()
+        config = SimConfig.load(args.settings) if args.settings else SimConfig.default()
+        if args.stop_on is not None:
+            config = config.replace(STOP_ON_VIOLATION=tuple(kind.strip() for kind in args.stop_on.split(",") if kind.strip()))
+        if args.coverage_target is not None:
+            config = config.replace(COVERAGE_TARGET=args.coverage_target)
+        if args.speed is not None:
+            config = config.replace(SIMULATION_SPEED=args.speed)
+        if args.sweep:
+            sweep_simulation(args.sweep, args.param, args.samples, args.seed, args.jobs, args.output or "sweep_results.csv", config)
+        elif args.fleet:
+            fleet_simulation(args.fleet, args.drones, args.telemetry, config)
+        elif args.batch:
+            batch_simulation(args.batch, args.jobs, args.output or "batch_results.csv", config, args.thumbnails)
+        elif args.export:
+            export_simulation(args.export, args.output or "exports", args.export_format, args.jobs, config)
+        elif args.replay:
+            replay_simulation(args.replay, config)
+        elif args.headless:
+            headless_simulation(args.lua, args.telemetry, config, args.profile, args.image)
+        else:
+            main_simulation(args.lua, args.telemetry, config, args.profile)
@@ -5,13 +5,23 @@ CENTER_X = WIDTH // 2
 CENTER_Y = HEIGHT // 2
 BACKGROUND_COLOR = (220, 220, 220)
 FPS = 30
-SIMULATION_SPEED = 25
+SIMULATION_SPEED = 25  # Simulated seconds per real second in a window (0 runs the simulation as fast as it can)
 LUA_SCRIPT_PATH = "lua_scripts/script.lua"
+LUA_CHUNK_CACHE_SIZE = 64  # Compiled Lua chunks kept per pooled runtime
+SIMULATED_CLOCK_EPOCH = 1_700_000_000  # Lua os.time() at the start of a headless flight, fixed so runs are reproducible
 
 # Drone photo and path settings
 PHOTO_COLOR = (200, 200, 200)
-PHOTO_SIZE = 19
 PATH_COLOR = (255, 255, 0, 0.1)
+PATH_MIN_SPACING = 0.0  # Minimum distance in meters between recorded path vertices (0 records every vertex)
+PATH_SAMPLE_STEP = 0.1  # Simulated seconds between path samples generated on demand for boundary checks
+PATH_SIMPLIFY_TOLERANCE = 0.0  # Ramer-Douglas-Peucker tolerance in meters for the path kept in memory (0 disables it)
+
+# Coverage calculation settings
+FOOTPRINT_YAW_STEP = 1  # Degrees between the cached rotated photo footprints of the raster backend
+COVERAGE_BACKEND = 'raster'  # 'raster' (pixel grid) or 'analytic' (exact polygon areas)
+ANALYTIC_CIRCLE_SEGMENTS = 720  # Polygon vertices used for circular boundaries in the analytic backend
+COVERAGE_TARGET = None  # Coverage percentage at which the flight ends early (None flies the whole script)
 
 # Shape and size of area
 BOUNDARY_SHAPE = 'circle'
@@ -26,10 +36,34 @@ FLIGHT_DURATION = 8
 FLIGHT_HEIGHT = 20
 GIMBAL_ANGLE = -90
 CAMERA_FOV = 82.1
+CAMERA_ASPECT_RATIO = 16 / 9  # Sensor aspect ratio, photos are cropped to a square of the short side
 MIN_PITCH_ROLL_VALUE = -6
 MAX_PITCH_ROLL_VALUE = 6
 MIN_YAW_VALUE = -100
 MAX_YAW_VALUE = 100
 
+# Constraint monitor settings
+BOUNDARY_TOLERANCE = 1e-6  # Meters outside the boundary that still count as inside, for rounding errors
+STOP_ON_VIOLATION = ()  # Violation kinds that end the flight early: 'boundary', 'duration', 'velocity' and 'yaw'
+
+# Fleet settings
+FLEET_START_SPACING = 10  # Meters between the start positions of the drones of a fleet, in a row along the x-axis from the origin
+FLEET_MIN_SEPARATION = 5  # Minimum distance in meters between two flying drones of a fleet
+
+# Sandbox settings for untrusted scripts (batch evaluation)
+SANDBOX_MAX_INSTRUCTIONS = 500_000_000  # Lua instructions
+SANDBOX_MAX_WALL_TIME = 60  # Real seconds
+SANDBOX_MAX_SIM_TIME = 3600  # Simulated seconds
+SANDBOX_MAX_MEMORY = 64 * 1024 * 1024  # Bytes
+
+# Offscreen export settings
+EXPORT_THUMBNAIL_WIDTH = 400  # Pixels, the height follows the screen's aspect ratio (None keeps the screen size)
+EXPORT_MAX_FRAMES = 1800  # Frames of an exported frame sequence or video, longer flights are played faster
+
+# Parameter sweep settings
+SWEEP_CACHE_FILE = "sweep_cache.jsonl"  # Results of finished sweep runs, so interrupted sweeps can be resumed
+
 # Debug settings
 PRINT_OUTPUT = False
+PROFILE_TRACE_ALLOCATIONS = True  # Trace allocations with tracemalloc when profiling (--profile), slows the run down
+PROFILE_TOP_ALLOCATIONS = 10  # Allocation sites listed in the profile report
@@ -0,0 +1,247 @@
+import numpy as np
+from sim.config import SimConfig
+from sim.trajectory import photo_arrays
+from sim.camera import photo_footprint, rotate_footprint
+from sim.boundary import CircleBoundary, get_boundary
+
+class AnalyticCoverage:
+    """
+    Class to calculate coverage and overlap geometrically, independent of the screen resolution.
+
+    Every photo is its rotated camera footprint polygon and the boundary is a set of polygon rings.
+    The covered and overlapped areas are integrated exactly with a vertical sweep: between two
+    consecutive event x-coordinates (vertices and edge intersections) no edges cross, so the
+    covered length of every slab changes linearly and its value at the slab center is exact.
+
+    The methods mirror the raster Coverage class, so both backends can be used interchangeably.
+    """
+
+    def __init__(self, config=None):
+        """
+        Initializes an empty boundary and an empty list of photos.
+
+        Args:
+            config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        """
+        self.config = config or SimConfig.default()
+        self.footprint = photo_footprint(self.config)
+        self.boundary_rings = []
+        self.photo_polygons = []
+        self._areas = None
+
+    def add_boundary_to_coverage_map_n(self, shape: str, params: dict) -> None:
+        """
+        Adds the boundary described by a shape and its parameters.
+
+        Args:
+            shape (str): The boundary shape, 'circle', 'rectangle', 'polygon' or 'multipolygon'.
+            params (dict): The boundary parameters as defined in the settings.
+        """
+        boundary = get_boundary(shape, params)
+        if isinstance(boundary, CircleBoundary):
+            self.boundary_rings.append(circle_polygon(boundary.x, boundary.y, boundary.radius, self.config.ANALYTIC_CIRCLE_SEGMENTS))
+        else:
+            self.boundary_rings.extend(boundary.rings)
+        self._areas = None
+
+    def add_photos_to_coverage_map_n(self, photos: list) -> None:
+        """
+        Adds photos as their camera footprints, rotated to the exact yaw.
+
+        Args:
+            photos: A PhotoLog, or a list of photos, each represented by a tuple (center, angle).
+        """
+        positions, yaws = photo_arrays(photos)
+        self.photo_polygons.extend(rotate_footprint(self.footprint, yaws) + positions[:, np.newaxis, :])
+        self._areas = None
+
+    def calculate_areas(self) -> tuple:
+        """
+        Calculates the boundary area, the covered area and the overlapped area.
+
+        Returns:
+            tuple: The areas (boundary, covered, overlap) in square meters.
+        """
+        if self._areas is None:
+            self._areas = sweep_areas(self.boundary_rings, self.photo_polygons, np.ptp(self.footprint, axis=0).max())
+        return self._areas
+
+    def coverage_percentage(self) -> float:
+        """
+        Returns the coverage percentage. Unlike the raster counters, this integrates all photos again
+        after photos were added, so it is meant for the end of a flight.
+
+        Returns:
+            float: The percentage of the area covered by at least one image.
+        """
+        area, covered, _ = self.calculate_areas()
+        return (covered / area) * 100
+
+    def overlap_percentage(self) -> float:
+        """
+        Returns the overlap percentage, see `coverage_percentage`.
+
+        Returns:
+            float: The percentage of the covered area with more than one image.
+        """
+        _, covered, overlap = self.calculate_areas()
+        return (overlap / covered) * 100 if overlap > 0 else 0.0
+
+    def calculate_coverage_n(self, screen=None) -> int:
+        """
+        Calculates the coverage percentage.
+
+        Args:
+            screen: Unused, accepted for compatibility with the raster Coverage class.
+
+        Returns:
+            int: The coverage percentage.
+        """
+        return int(self.coverage_percentage())
+
+    def calculate_overlap_n(self) -> int:
+        """
+        Calculates the overlap percentage.
+
+        Returns:
+            int: The overlap percentage.
+        """
+        return int(self.overlap_percentage())
+
+def circle_polygon(x: float, y: float, radius: float, segments: int) -> np.ndarray:
+    """
+    Approximates a circle with a regular polygon of the same area.
+
+    Args:
+        x (float): x-coordinate of the circle center.
+        y (float): y-coordinate of the circle center.
+        radius (float): Radius of the circle.
+        segments (int): Number of polygon vertices.
+
+    Returns:
+        np.ndarray: The polygon vertices as an (n, 2) array.
+    """
+    step = 2 * np.pi / segments
+    # Scale the circumradius so the polygon area equals the circle area
+    scaled_radius = radius * np.sqrt(step / np.sin(step))
+    angles = np.arange(segments) * step
+    return np.column_stack((x + scaled_radius * np.cos(angles), y + scaled_radius * np.sin(angles)))
+
+def polygon_edges(polygons: list) -> np.ndarray:
+    """
+    Collects the edges of closed polygons.
+
+    Args:
+        polygons (list): List of polygons, each an (n, 2) array of vertices.
+
+    Returns:
+        np.ndarray: The edges as an (m, 4) array of (x1, y1, x2, y2).
+    """
+    if not polygons:
+        return np.empty((0, 4))
+    return np.concatenate([np.hstack((p, np.roll(p, -1, axis=0))) for p in polygons])
+
+def edge_intersections_x(edges: np.ndarray, cell_size: float) -> np.ndarray:
+    """
+    Finds the x-coordinates of all edge intersections.
+    Edges are bucketed into a uniform grid, so only edges sharing a grid cell are tested.
+
+    Args:
+        edges (np.ndarray): The edges as an (m, 4) array of (x1, y1, x2, y2).
+        cell_size (float): The side length of a grid cell.
+
+    Returns:
+        np.ndarray: The x-coordinates of the intersection points.
+    """
+    min_cell = np.floor(np.minimum(edges[:, 0:2], edges[:, 2:4]) / cell_size).astype(int)
+    max_cell = np.floor(np.maximum(edges[:, 0:2], edges[:, 2:4]) / cell_size).astype(int)
+    buckets = {}
+    for index, ((x0, y0), (x1, y1)) in enumerate(zip(min_cell, max_cell)):
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                buckets.setdefault((cx, cy), []).append(index)
+
+    found = []
+    for indices in buckets.values():
+        if len(indices) < 2:
+            continue
+        a, b = np.triu_indices(len(indices), 1)
+        p = edges[np.array(indices)[a]]
+        q = edges[np.array(indices)[b]]
+        r = p[:, 2:4] - p[:, 0:2]
+        s = q[:, 2:4] - q[:, 0:2]
+        qp = q[:, 0:2] - p[:, 0:2]
+        denominator = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (qp[:, 0] * s[:, 1] - qp[:, 1] * s[:, 0]) / denominator
+            u = (qp[:, 0] * r[:, 1] - qp[:, 1] * r[:, 0]) / denominator
+        hit = (denominator != 0) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+        found.append(p[hit, 0] + t[hit] * r[hit, 0])
+    return np.concatenate(found) if found else np.empty(0)
+
+def sweep_areas(boundary_rings: list, photo_polygons: list, cell_size: float = 1) -> tuple:
+    """
+    Integrates the boundary area and the covered and overlapped areas inside the boundary.
+
+    The boundary rings use the even-odd rule, so holes are rings inside other rings.
+    The photo polygons must be convex.
+
+    Args:
+        boundary_rings (list): The boundary rings, each an (n, 2) array of vertices.
+        photo_polygons (list): The photo polygons, each an (n, 2) array of vertices.
+        cell_size (float, optional): The grid cell size used to find edge intersections, ideally the footprint size. Defaults to 1.
+
+    Returns:
+        tuple: The areas (boundary, covered, overlap) in square meters.
+    """
+    boundary_edges = polygon_edges(boundary_rings)
+    photo_edges = polygon_edges(photo_polygons)
+    photo_ids = np.concatenate([np.full(len(p), i) for i, p in enumerate(photo_polygons)]) if photo_polygons else np.empty(0, dtype=int)
+    edges = np.vstack((boundary_edges, photo_edges))
+    if len(boundary_edges) == 0:
+        return 0.0, 0.0, 0.0
+
+    # Event x-coordinates: all vertices and all edge intersections
+    events = np.unique(np.concatenate((edges[:, 0], edges[:, 2], edge_intersections_x(edges, max(cell_size, 1)))))
+    slab_centers = (events[:-1] + events[1:]) / 2
+    slab_widths = np.diff(events)
+
+    # Expand every non-vertical edge into the slabs it spans and evaluate its y at the slab center
+    x_min = np.minimum(edges[:, 0], edges[:, 2])
+    x_max = np.maximum(edges[:, 0], edges[:, 2])
+    first = np.searchsorted(events, x_min)
+    counts = np.maximum(np.searchsorted(events, x_max) - first, 0)
+    edge_index = np.repeat(np.arange(len(edges)), counts)
+    slab = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    x1, y1, x2, y2 = edges[edge_index].T
+    y = y1 + (slab_centers[slab] - x1) * (y2 - y1) / (x2 - x1)
+
+    # Boundary crossings alternate entering and leaving the area within each slab
+    is_boundary = edge_index < len(boundary_edges)
+    b_slab, b_y = slab[is_boundary], y[is_boundary]
+    order = np.lexsort((b_y, b_slab))
+    b_slab, b_y = b_slab[order], b_y[order]
+    b_delta = np.where(np.arange(len(b_y)) % 2 == 0, 1, -1)
+
+    # Every convex photo crosses a slab exactly twice: entering at the lower and leaving at the upper edge
+    p_slab, p_y = slab[~is_boundary], y[~is_boundary]
+    p_id = photo_ids[edge_index[~is_boundary] - len(boundary_edges)]
+    order = np.lexsort((p_y, p_id, p_slab))
+    p_slab, p_y = p_slab[order], p_y[order]
+    p_delta = np.where(np.arange(len(p_y)) % 2 == 0, 1, -1)
+
+    all_slab = np.concatenate((b_slab, p_slab))
+    all_y = np.concatenate((b_y, p_y))
+    order = np.lexsort((all_y, all_slab))
+    all_slab, all_y = all_slab[order], all_y[order]
+    inside = np.cumsum(np.concatenate((b_delta, np.zeros(len(p_y), dtype=int)))[order])
+    depth = np.cumsum(np.concatenate((np.zeros(len(b_y), dtype=int), p_delta))[order])
+
+    # Weigh each segment between consecutive crossings of a slab with the slab width
+    same_slab = all_slab[:-1] == all_slab[1:]
+    segment_area = np.where(same_slab, np.diff(all_y), 0) * slab_widths[all_slab[:-1]]
+    in_area = inside[:-1] > 0
+    boundary_area = segment_area[in_area].sum()
+    covered_area = segment_area[in_area & (depth[:-1] >= 1)].sum()
+    overlap_area = segment_area[in_area & (depth[:-1] >= 2)].sum()
+    return float(boundary_area), float(covered_area), float(overlap_area)
@@ -0,0 +1,361 @@
+import json
+import numpy as np
+from functools import lru_cache
+
+"""
+This file is used to describe the flight area boundary and to check quickly whether positions lie inside it.
+"""
+
+GRID_CELLS_PER_EDGE = 4  # Index cells per polygon edge, so a cell is crossed by few edges on average
+MIN_GRID_CELLS = 64
+MAX_GRID_SIZE = 1024  # Maximum index cells along one axis
+
+class CircleBoundary:
+    """
+    A circular flight area.
+
+    Attributes:
+        x (float): x-coordinate of the center.
+        y (float): y-coordinate of the center.
+        radius (float): The radius.
+    """
+
+    def __init__(self, x: float, y: float, radius: float):
+        """
+        Initializes the circle.
+
+        Args:
+            x (float): x-coordinate of the center.
+            y (float): y-coordinate of the center.
+            radius (float): The radius.
+        """
+        self.x = x
+        self.y = y
+        self.radius = radius
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """
+        Checks which points lie inside (or on) the circle.
+
+        Args:
+            points (np.ndarray): The points in simulation coordinates as an (n, 2) array.
+
+        Returns:
+            np.ndarray: A boolean array, True for the points inside.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return (points[:, 0] - self.x) ** 2 + (points[:, 1] - self.y) ** 2 <= self.radius ** 2
+
+    def contains_point(self, point: tuple) -> bool:
+        """
+        Checks whether a single point lies inside (or on) the circle.
+
+        Args:
+            point (tuple): The point in simulation coordinates as (x, y).
+
+        Returns:
+            bool: True if the point is inside.
+        """
+        return (point[0] - self.x) ** 2 + (point[1] - self.y) ** 2 <= self.radius ** 2
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        """
+        Computes the distances of points to the circle line.
+
+        Args:
+            points (np.ndarray): The points in simulation coordinates as an (n, 2) array.
+
+        Returns:
+            np.ndarray: The distances in meters.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return np.abs(np.hypot(points[:, 0] - self.x, points[:, 1] - self.y) - self.radius)
+
+class PolygonBoundary:
+    """
+    A flight area made of polygon rings with the even-odd rule: a hole is a ring inside another ring,
+    and several outer rings form a multipolygon. Points on an edge count as inside.
+
+    Containment is checked with a uniform grid over the bounding box. Every grid cell knows whether
+    its center is inside and which edges cross it. A point in a cell without edges has the state of
+    the cell center; otherwise only the edges of its cell are checked against the line from the point
+    to the cell center. Both take constant time on average, however many vertices the rings have.
+
+    Attributes:
+        rings (list): The rings, each an (n, 2) array of vertices.
+        edges (np.ndarray): All ring edges as rows of (x1, y1, x2, y2).
+        origin (np.ndarray): The lower left corner of the grid.
+        cell_size (np.ndarray): The width and height of a grid cell.
+        grid_shape (tuple): The number of grid cells along x and y.
+    """
+
+    def __init__(self, rings: list):
+        """
+        Initializes the polygon and builds its grid index.
+
+        Args:
+            rings (list): The rings, each a list of at least three (x, y) vertices.
+        """
+        self.rings = [np.asarray(ring, dtype=float) for ring in rings]
+        for ring in self.rings:
+            if ring.ndim != 2 or ring.shape[1] != 2 or len(ring) < 3:
+                raise ValueError("Every boundary ring needs at least three (x, y) vertices")
+        self.edges = np.vstack([np.hstack((ring, np.roll(ring, -1, axis=0))) for ring in self.rings])
+        vertices = np.vstack(self.rings)
+        self.origin = vertices.min(axis=0)
+        extent = np.maximum(vertices.max(axis=0) - self.origin, 1e-9)
+        cells = max(MIN_GRID_CELLS, GRID_CELLS_PER_EDGE * len(self.edges))
+        nx = int(np.clip(np.ceil(np.sqrt(cells * extent[0] / extent[1])), 1, MAX_GRID_SIZE))
+        ny = int(np.clip(np.ceil(cells / nx), 1, MAX_GRID_SIZE))
+        self.grid_shape = (nx, ny)
+        self.cell_size = extent / self.grid_shape
+        self.build_index()
+
+    def build_index(self) -> None:
+        """
+        Finds the edges crossing every grid cell and the state of every cell center.
+        """
+        nx, ny = self.grid_shape
+        x1, y1, x2, y2 = self.edges.T
+        # Candidate cells: the cells overlapped by the bounding box of every edge
+        low = self.cell_of(np.column_stack((np.minimum(x1, x2), np.minimum(y1, y2))))
+        high = self.cell_of(np.column_stack((np.maximum(x1, x2), np.maximum(y1, y2))))
+        spans = high - low + 1
+        counts = spans[:, 0] * spans[:, 1]
+        edge_ids = np.repeat(np.arange(len(self.edges)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = low[edge_ids, 0] + offsets // spans[edge_ids, 1]
+        cell_y = low[edge_ids, 1] + offsets % spans[edge_ids, 1]
+
+        # Keep the candidates whose cell corners are not all strictly on one side of the edge line
+        side = None
+        for corner_x, corner_y in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            corner = self.origin + (np.column_stack((cell_x + corner_x, cell_y + corner_y))) * self.cell_size
+            cross = np.sign((x2 - x1)[edge_ids] * (corner[:, 1] - y1[edge_ids]) - (y2 - y1)[edge_ids] * (corner[:, 0] - x1[edge_ids]))
+            side = cross if side is None else np.where(side == cross, side, 0)
+        crossing = side == 0
+        edge_ids, cells = edge_ids[crossing], (cell_x * ny + cell_y)[crossing]
+
+        order = np.argsort(cells, kind='stable')
+        self.cell_edges = edge_ids[order]
+        self.cell_starts = np.searchsorted(cells[order], np.arange(nx * ny + 1))
+        self.cell_centers = self.origin + (np.stack(np.meshgrid(np.arange(nx), np.arange(ny), indexing='ij'), axis=-1) + 0.5) * self.cell_size
+        rows = self.cell_centers.transpose(1, 0, 2).reshape(-1, 2)
+        self.center_inside = self.scanline_contains(rows, nx).reshape(ny, nx).T.ravel()
+        # Plain lists for the scalar checks in contains_point, which are faster than NumPy for a single point
+        self.lookup = {"center_inside": self.center_inside.tolist(), "centers": self.cell_centers.reshape(-1, 2).tolist(),
+                       "edges": self.cell_edges.tolist(), "starts": self.cell_starts.tolist(), "edge_list": self.edges.tolist()}
+
+    def scanline_contains(self, points: np.ndarray, row_length: int) -> np.ndarray:
+        """
+        Checks points with a horizontal ray to the right against all edges, for points in rows of equal y.
+        Only used to build the index.
+
+        Args:
+            points (np.ndarray): The points as an (n, 2) array, consecutive runs of `row_length` points in the same row.
+            row_length (int): The number of points per row.
+
+        Returns:
+            np.ndarray: A boolean array, True for the points inside.
+        """
+        x1, y1, x2, y2 = self.edges.T
+        inside = np.zeros(len(points), dtype=bool)
+        for start in range(0, len(points), row_length):
+            row = points[start:start + row_length]
+            y = row[0, 1]
+            spans = (y1 <= y) != (y2 <= y)
+            crossings = np.sort(x1[spans] + (y - y1[spans]) * (x2[spans] - x1[spans]) / (y2[spans] - y1[spans]))
+            inside[start:start + row_length] = (len(crossings) - np.searchsorted(crossings, row[:, 0], side='right')) % 2 == 1
+        return inside
+
+    def cell_of(self, points: np.ndarray) -> np.ndarray:
+        """
+        Returns the grid cells of points, clipped to the grid.
+
+        Args:
+            points (np.ndarray): The points as an (n, 2) array.
+
+        Returns:
+            np.ndarray: The cell indices as an (n, 2) integer array.
+        """
+        return np.clip(np.floor((points - self.origin) / self.cell_size).astype(int), 0, np.array(self.grid_shape) - 1)
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """
+        Checks which points lie inside (or on) the boundary.
+
+        Args:
+            points (np.ndarray): The points in simulation coordinates as an (n, 2) array.
+
+        Returns:
+            np.ndarray: A boolean array, True for the points inside.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        # Compared in cell units like contains_point, origin + grid_shape * cell_size can round below the highest vertex
+        grid_position = (points - self.origin) / self.cell_size
+        in_grid = np.all((grid_position >= 0) & (grid_position <= self.grid_shape), axis=1)
+        inside = np.zeros(len(points), dtype=bool)
+        point_ids = np.flatnonzero(in_grid)
+        cells = self.cell_of(points[point_ids])
+        cells = cells[:, 0] * self.grid_shape[1] + cells[:, 1]
+        inside[point_ids] = self.center_inside[cells]
+
+        # Points in cells crossed by edges: count the edges crossing the line to the cell center
+        counts = self.cell_starts[cells + 1] - self.cell_starts[cells]
+        pair_points = np.repeat(np.arange(len(point_ids)), counts)
+        pair_edges = self.cell_edges[np.repeat(self.cell_starts[cells], counts) + np.arange(counts.sum())
+                                     - np.repeat(np.cumsum(counts) - counts, counts)]
+        if len(pair_points) == 0:
+            return inside
+        p = points[point_ids[pair_points]]
+        q = self.cell_centers.reshape(-1, 2)[cells[pair_points]]
+        a, b = self.edges[pair_edges, 0:2], self.edges[pair_edges, 2:4]
+        side_p = cross(a, b, p)
+        side_q = cross(a, b, q)
+        # Half-open sides, so a line through a vertex shared by two edges is counted correctly
+        crosses = ((side_p > 0) != (side_q > 0)) & ((cross(p, q, a) > 0) != (cross(p, q, b) > 0))
+        on_edge = (side_p == 0) & (np.minimum(a, b) <= p).all(axis=1) & (p <= np.maximum(a, b)).all(axis=1)
+        flips = np.bincount(pair_points, weights=crosses, minlength=len(point_ids)) % 2 == 1
+        touching = np.bincount(pair_points, weights=on_edge, minlength=len(point_ids)) > 0
+        inside[point_ids] = (inside[point_ids] ^ flips) | touching
+        return inside
+
+    def contains_point(self, point: tuple) -> bool:
+        """
+        Checks whether a single point lies inside (or on) the boundary.
+
+        Args:
+            point (tuple): The point in simulation coordinates as (x, y).
+
+        Returns:
+            bool: True if the point is inside.
+        """
+        x, y = point
+        cell_x = (x - self.origin[0]) / self.cell_size[0]
+        cell_y = (y - self.origin[1]) / self.cell_size[1]
+        nx, ny = self.grid_shape
+        if not (0 <= cell_x <= nx and 0 <= cell_y <= ny):
+            return False
+        cell = min(int(cell_x), nx - 1) * ny + min(int(cell_y), ny - 1)
+        inside = self.lookup["center_inside"][cell]
+        center_x, center_y = self.lookup["centers"][cell]
+        for edge in self.lookup["edges"][self.lookup["starts"][cell]:self.lookup["starts"][cell + 1]]:
+            x1, y1, x2, y2 = self.lookup["edge_list"][edge]
+            side_p = (x2 - x1) * (y - y1) - (y2 - y1) * (x - x1)
+            if side_p == 0 and min(x1, x2) <= x <= max(x1, x2) and min(y1, y2) <= y <= max(y1, y2):
+                return True
+            side_q = (x2 - x1) * (center_y - y1) - (y2 - y1) * (center_x - x1)
+            side_a = (center_x - x) * (y1 - y) - (center_y - y) * (x1 - x)
+            side_b = (center_x - x) * (y2 - y) - (center_y - y) * (x2 - x)
+            if ((side_p > 0) != (side_q > 0)) and ((side_a > 0) != (side_b > 0)):
+                inside = not inside
+        return inside
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        """
+        Computes the distances of points to the nearest edge. Every point is checked against
+        all edges, so this is meant for the few points outside the boundary, not for whole paths.
+
+        Args:
+            points (np.ndarray): The points in simulation coordinates as an (n, 2) array.
+
+        Returns:
+            np.ndarray: The distances in meters.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 1, 2)
+        a, b = self.edges[:, 0:2], self.edges[:, 2:4]
+        direction = b - a
+        length_squared = np.maximum((direction ** 2).sum(axis=1), 1e-12)
+        t = np.clip(((points - a) * direction).sum(axis=2) / length_squared, 0, 1)
+        nearest = a + t[:, :, np.newaxis] * direction
+        return np.sqrt(((points - nearest) ** 2).sum(axis=2)).min(axis=1)
+
+def cross(a: np.ndarray, b: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """
+    Returns the z-component of the cross product (b - a) x (p - a), positive if p is left of the line from a to b.
+
+    Args:
+        a (np.ndarray): The line starts as an (n, 2) array.
+        b (np.ndarray): The line ends as an (n, 2) array.
+        p (np.ndarray): The points as an (n, 2) array.
+
+    Returns:
+        np.ndarray: The cross products.
+    """
+    return (b[:, 0] - a[:, 0]) * (p[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (p[:, 0] - a[:, 0])
+
+def convex_hull(points: list) -> np.ndarray:
+    """
+    Orders points along their convex hull, counterclockwise (Andrew's monotone chain).
+
+    Args:
+        points (list): The points as (x, y) tuples.
+
+    Returns:
+        np.ndarray: The hull vertices as an (n, 2) array.
+    """
+    points = sorted(set(map(tuple, points)))
+    if len(points) < 3:
+        return np.array(points, dtype=float)
+
+    def half_hull(ordered):
+        hull = []
+        for point in ordered:
+            while len(hull) >= 2 and ((hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1])
+                                      - (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0])) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull[:-1]
+
+    return np.array(half_hull(points) + half_hull(points[::-1]), dtype=float)
+
+def boundary_rings(shape: str, params: dict) -> list:
+    """
+    Returns the polygon rings of a polygonal boundary shape.
+
+    Args:
+        shape (str): 'rectangle', 'polygon' or 'multipolygon'.
+        params (dict): The boundary parameters as defined in the settings.
+
+    Returns:
+        list: The rings, each a list of (x, y) vertices.
+    """
+    if shape == 'rectangle':
+        # The vertices may be given in any order, the hull orders them around the (possibly rotated) rectangle
+        return [convex_hull([params.get(v) for v in ('v1', 'v2', 'v3', 'v4')])]
+    if shape == 'polygon':
+        return [params['vertices']] + list(params.get('holes', []))
+    if shape == 'multipolygon':
+        return [ring for polygon in params['polygons'] for ring in boundary_rings('polygon', polygon)]
+    raise ValueError(f"Unknown boundary shape '{shape}', expected 'circle', 'rectangle', 'polygon' or 'multipolygon'")
+
+def get_boundary(shape: str, params: dict):
+    """
+    Returns the boundary for a shape and its parameters. Boundaries are cached, so the
+    polygon index is only built once per boundary.
+
+    Args:
+        shape (str): 'circle', 'rectangle', 'polygon' or 'multipolygon'.
+        params (dict): The boundary parameters as defined in the settings.
+
+    Returns:
+        CircleBoundary or PolygonBoundary: The boundary.
+    """
+    return cached_boundary(shape, json.dumps(params, sort_keys=True))
+
+@lru_cache(maxsize=32)
+def cached_boundary(shape: str, params_json: str):
+    """
+    Creates a boundary from a shape and its JSON encoded parameters, see get_boundary.
+
+    Args:
+        shape (str): The boundary shape.
+        params_json (str): The boundary parameters as JSON.
+
+    Returns:
+        CircleBoundary or PolygonBoundary: The boundary.
+    """
+    params = json.loads(params_json)
+    if shape == 'circle':
+        return CircleBoundary(params.get('x'), params.get('y'), params.get('radius'))
+    return PolygonBoundary(boundary_rings(shape, params))
@@ -0,0 +1,64 @@
+import numpy as np
+
+"""
+This file is used to compute the ground footprint of a photo from the flight height and the camera.
+"""
+
+def camera_footprint(height: float, fov: float, gimbal_angle: float, aspect_ratio: float = 16 / 9) -> np.ndarray:
+    """
+    Computes the ground footprint of a photo taken with the drone heading north (yaw 0).
+
+    The camera has a horizontal field of view of `fov` degrees on a sensor with the given aspect ratio,
+    and photos are cropped to a square of the short side. The gimbal tilts the camera forward:
+    -90 degrees looks straight down and gives a square, higher angles give a trapezoid that
+    is wider and longer at the far edge.
+
+    Args:
+        height (float): The flight height in meters.
+        fov (float): The horizontal field of view in degrees.
+        gimbal_angle (float): The gimbal pitch in degrees, -90 is straight down.
+        aspect_ratio (float, optional): The sensor aspect ratio (width / height). Defaults to 16 / 9.
+
+    Returns:
+        np.ndarray: The footprint corners as a (4, 2) array in meters relative to the drone,
+                    counterclockwise, starting at the near left corner.
+    """
+    half_tan = np.tan(np.radians(fov) / 2) / aspect_ratio
+    tilt = np.radians(90 + gimbal_angle)
+    image = np.array([(-half_tan, -half_tan), (half_tan, -half_tan), (half_tan, half_tan), (-half_tan, half_tan)])
+    # Rays through the image corners: x to the right, y forward and z down
+    forward = image[:, 1] * np.cos(tilt) + np.sin(tilt)
+    down = np.cos(tilt) - image[:, 1] * np.sin(tilt)
+    if np.any(down <= 0):
+        raise ValueError(f"The camera with a gimbal angle of {gimbal_angle} degrees sees the horizon, the footprint is unbounded")
+    scale = height / down
+    return np.column_stack((image[:, 0] * scale, forward * scale))
+
+def photo_footprint(config) -> np.ndarray:
+    """
+    Computes the ground footprint of a photo for a configuration.
+
+    Args:
+        config (SimConfig): The configuration with FLIGHT_HEIGHT, CAMERA_FOV, GIMBAL_ANGLE and CAMERA_ASPECT_RATIO.
+
+    Returns:
+        np.ndarray: The footprint corners as a (4, 2) array in meters relative to the drone.
+    """
+    return camera_footprint(config.FLIGHT_HEIGHT, config.CAMERA_FOV, config.GIMBAL_ANGLE, config.CAMERA_ASPECT_RATIO)
+
+def rotate_footprint(footprint: np.ndarray, yaws: np.ndarray) -> np.ndarray:
+    """
+    Rotates a footprint to the given yaws. The yaw turns clockwise, which is a negative
+    rotation in simulation coordinates.
+
+    Args:
+        footprint (np.ndarray): The footprint corners as an (n, 2) array.
+        yaws (np.ndarray): The yaws in degrees.
+
+    Returns:
+        np.ndarray: The rotated corners as an (m, n, 2) array, one footprint per yaw.
+    """
+    theta = np.radians(-np.asarray(yaws, dtype=float))[:, np.newaxis]
+    x = footprint[:, 0] * np.cos(theta) - footprint[:, 1] * np.sin(theta)
+    y = footprint[:, 0] * np.sin(theta) + footprint[:, 1] * np.cos(theta)
+    return np.stack((x, y), axis=-1)
@@ -0,0 +1,64 @@
+import numpy as np
+from functools import lru_cache
+
+"""
+This file is used to map values to colors without matplotlib. It contains the colormap tables,
+so drawing the coverage doesn't need to import matplotlib at startup.
+"""
+
+# The 256 colors of matplotlib's 'plasma' colormap as RGB hex strings, each channel scaled to 0-255 and truncated
+PLASMA = (
+    "0c0786", "100787", "130689", "15068a", "18068b", "1b068c", "1d068d", "1f058e",
+    "21058f", "230590", "250591", "270592", "290593", "2b0594", "2d0494", "2f0495",
+    "310496", "330497", "340498", "360498", "380499", "3a049a", "3b039a", "3d039b",
+    "3f039c", "40039c", "42039d", "44039e", "45039e", "47029f", "49029f", "4a02a0",
+    "4c02a1", "4e02a1", "4f02a2", "5101a2", "5201a3", "5401a3", "5601a3", "5701a4",
+    "5901a4", "5a00a5", "5c00a5", "5e00a5", "5f00a6", "6100a6", "6200a6", "6400a7",
+    "6500a7", "6700a7", "6800a7", "6a00a7", "6c00a8", "6d00a8", "6f00a8", "7000a8",
+    "7200a8", "7300a8", "7500a8", "7601a8", "7801a8", "7901a8", "7b02a8", "7c02a7",
+    "7e03a7", "7f03a7", "8104a7", "8204a7", "8405a6", "8506a6", "8607a6", "8807a5",
+    "8908a5", "8b09a4", "8c0aa4", "8e0ca4", "8f0da3", "900ea3", "920fa2", "9310a1",
+    "9511a1", "9612a0", "9713a0", "99149f", "9a159e", "9b179e", "9d189d", "9e199c",
+    "9f1a9b", "a01b9b", "a21c9a", "a31d99", "a41e98", "a51f97", "a72197", "a82296",
+    "a92395", "aa2494", "ac2593", "ad2692", "ae2791", "af2890", "b02a8f", "b12b8f",
+    "b22c8e", "b42d8d", "b52e8c", "b62f8b", "b7308a", "b83289", "b93388", "ba3487",
+    "bb3586", "bc3685", "bd3784", "be3883", "bf3982", "c03b81", "c13c80", "c23d80",
+    "c33e7f", "c43f7e", "c5407d", "c6417c", "c7427b", "c8447a", "c94579", "ca4678",
+    "cb4777", "cc4876", "cd4975", "ce4a75", "cf4b74", "d04d73", "d14e72", "d14f71",
+    "d25070", "d3516f", "d4526e", "d5536d", "d6556d", "d7566c", "d7576b", "d8586a",
+    "d95969", "da5a68", "db5b67", "dc5d66", "dc5e66", "dd5f65", "de6064", "df6163",
+    "df6262", "e06461", "e16560", "e26660", "e3675f", "e3685e", "e46a5d", "e56b5c",
+    "e56c5b", "e66d5a", "e76e5a", "e87059", "e87158", "e97257", "ea7356", "ea7455",
+    "eb7654", "ec7754", "ec7853", "ed7952", "ed7b51", "ee7c50", "ef7d4f", "ef7e4e",
+    "f0804d", "f0814d", "f1824c", "f2844b", "f2854a", "f38649", "f38748", "f48947",
+    "f48a47", "f58b46", "f58d45", "f68e44", "f68f43", "f69142", "f79241", "f79341",
+    "f89540", "f8963f", "f8983e", "f9993d", "f99a3c", "fa9c3b", "fa9d3a", "fa9f3a",
+    "faa039", "fba238", "fba337", "fba436", "fca635", "fca735", "fca934", "fcaa33",
+    "fcac32", "fcad31", "fdaf31", "fdb030", "fdb22f", "fdb32e", "fdb52d", "fdb62d",
+    "fdb82c", "fdb92b", "fdbb2b", "fdbc2a", "fdbe29", "fdc029", "fdc128", "fdc328",
+    "fdc427", "fdc626", "fcc726", "fcc926", "fccb25", "fccc25", "fcce25", "fbd024",
+    "fbd124", "fbd324", "fad524", "fad624", "fad824", "f9d924", "f9db24", "f8dd24",
+    "f8df24", "f7e024", "f7e225", "f6e425", "f6e525", "f5e726", "f5e926", "f4ea26",
+    "f3ec26", "f3ee26", "f2f026", "f2f126", "f1f326", "f0f525", "f0f623", "eff821",
+)
+
+COLORMAPS = {"plasma": PLASMA}
+
+@lru_cache(maxsize=None)
+def colormap_lut(cmap_name: str = "plasma") -> np.ndarray:
+    """
+    Builds a lookup table with the RGBA colors of a built-in colormap.
+    The table is created once per colormap and cached.
+
+    Args:
+        cmap_name (str, optional): The name of the colormap, one of COLORMAPS. Defaults to "plasma".
+
+    Returns:
+        np.ndarray: The read-only colors as an (N, 4) uint8 array, N being the colormap size (256).
+    """
+    if cmap_name not in COLORMAPS:
+        raise ValueError(f"Unknown colormap '{cmap_name}', expected one of {', '.join(COLORMAPS)}")
+    colors = [(int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16), 255) for color in COLORMAPS[cmap_name]]
+    lut = np.array(colors, dtype=np.uint8)
+    lut.flags.writeable = False
+    return lut
@@ -0,0 +1,85 @@
+import importlib.util
+import settings
+
+class SimConfig:
+    """
+    The configuration of a single simulation.
+
+    A SimConfig has the same upper-case attributes as a settings file (e.g. `config.BOUNDARY_SHAPE`),
+    but belongs to one simulation instead of the whole process. Every class takes its configuration
+    as an argument, so differently configured simulations can run side by side in one process.
+    """
+
+    def __init__(self, **values):
+        """
+        Initializes the configuration from setting values.
+
+        Args:
+            **values: The settings by their upper-case names.
+        """
+        self.__dict__.update(values)
+
+    @classmethod
+    def from_module(cls, module, defaults: "SimConfig" = None) -> "SimConfig":
+        """
+        Creates a configuration from the upper-case names of a settings module.
+
+        Args:
+            module: The settings module.
+            defaults (SimConfig, optional): Values for the settings the module does not define. Defaults to None.
+
+        Returns:
+            SimConfig: The configuration.
+        """
+        values = dict(vars(defaults)) if defaults is not None else {}
+        values.update({name: getattr(module, name) for name in dir(module) if name.isupper()})
+        return cls(**values)
+
+    @classmethod
+    def default(cls) -> "SimConfig":
+        """
+        Creates a configuration from the `settings` module.
+
+        Returns:
+            SimConfig: The default configuration.
+        """
+        return cls.from_module(settings)
+
+    @classmethod
+    def load(cls, settings_file: str) -> "SimConfig":
+        """
+        Loads a configuration from a settings file, e.g. one of the `examples/*_settings.py` files.
+        Settings the file does not define are taken from the `settings` module.
+
+        Args:
+            settings_file (str): The path to the settings file.
+
+        Returns:
+            SimConfig: The loaded configuration.
+        """
+        spec = importlib.util.spec_from_file_location("custom_settings", settings_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return cls.from_module(module, defaults=cls.default())
+
+    def replace(self, **overrides) -> "SimConfig":
+        """
+        Creates a copy of the configuration with some settings changed.
+        The screen center follows the screen size, unless it is overridden as well.
+
+        Args:
+            **overrides: The changed settings by their upper-case names.
+
+        Returns:
+            SimConfig: The new configuration.
+        """
+        values = dict(vars(self))
+        values.update(overrides)
+        if "WIDTH" in overrides and "CENTER_X" not in overrides:
+            values["CENTER_X"] = values["WIDTH"] // 2
+        if "HEIGHT" in overrides and "CENTER_Y" not in overrides:
+            values["CENTER_Y"] = values["HEIGHT"] // 2
+        return SimConfig(**values)
+
+    def __repr__(self) -> str:
+        return f"SimConfig({self.BOUNDARY_SHAPE!r}, {self.BOUNDARY_PARAMS!r})"
@@ -0,0 +1,254 @@
+import numpy as np
+
+"""
+This file is used to check a flight against the mission constraints while it runs: the flight area boundary,
+the flight duration, the value ranges of `adjust_flight_parameters` and, in a fleet, the separation between drones.
+"""
+
+# The kinds of constraint violations
+VIOLATION_KINDS = ("boundary", "duration", "velocity", "yaw", "separation")
+
+class FlightTerminated(Exception):
+    """
+    Raised when a flight is ended early because it violated a constraint listed in STOP_ON_VIOLATION.
+
+    Attributes:
+        violation (dict): The violation that ended the flight.
+    """
+    def __init__(self, violation: dict):
+        super().__init__(f"Flight terminated: {describe_violation(violation)}")
+        self.violation = violation
+
+class ConstraintMonitor:
+    """
+    Records the constraint violations of a flight.
+
+    A violation is a dictionary with the 'kind' (one of VIOLATION_KINDS), the simulated 'time' and
+    position ('x', 'y') at which it started, and the 'excess' over the limit: the distance outside the
+    boundary in meters, the seconds beyond the flight duration, the amount by which a velocity (m/s)
+    or yaw value exceeded its range, or how much closer than FLEET_MIN_SEPARATION another drone of a fleet
+    came. A boundary violation lasts until the drone re-enters the area; its excess is the largest distance
+    reached outside and 'end_time' is set when it ends. Samples less than BOUNDARY_TOLERANCE outside still
+    count as inside. A separation violation is recorded by the fleet, with the number of the 'other' drone.
+    Starting the flight outside the boundary counts as a violation at time 0.
+
+    Attributes:
+        boundary (CircleBoundary or PolygonBoundary): The flight area.
+        stop_on (frozenset): The violation kinds that end the flight.
+        max_flight_time (float): The flight duration limit in seconds.
+        violations (list): The violations so far, in the order they started.
+        excursion (dict): The boundary violation in progress while the drone is outside, otherwise None.
+    """
+
+    def __init__(self, boundary, config):
+        """
+        Initializes the monitor with the limits of a configuration.
+
+        Args:
+            boundary (CircleBoundary or PolygonBoundary): The flight area.
+            config (SimConfig): The configuration with FLIGHT_DURATION, BOUNDARY_TOLERANCE, the MIN/MAX_PITCH_ROLL_VALUE
+                                and MIN/MAX_YAW_VALUE limits and STOP_ON_VIOLATION.
+        """
+        self.boundary = boundary
+        self.config = config
+        self.stop_on = frozenset(config.STOP_ON_VIOLATION)
+        unknown = self.stop_on.difference(VIOLATION_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown violation kinds {sorted(unknown)}, expected some of {VIOLATION_KINDS}")
+        self.max_flight_time = config.FLIGHT_DURATION * 60
+        self.violations = []
+        self.excursion = None
+
+    def check_parameters(self, time: float, position: np.ndarray, velocity: np.ndarray, yaw: float) -> list:
+        """
+        Checks the values passed to `adjust_flight_parameters` against their ranges.
+
+        Args:
+            time (float): The simulated time of the call.
+            position (np.ndarray): The drone position.
+            velocity (np.ndarray): The x and y velocity.
+            yaw (float): The yaw value.
+
+        Returns:
+            list: The new violations.
+        """
+        config = self.config
+        found = []
+        excess = max(np.max(velocity) - config.MAX_PITCH_ROLL_VALUE, config.MIN_PITCH_ROLL_VALUE - np.min(velocity))
+        if excess > 0:
+            found.append(self.record("velocity", time, position, excess))
+        excess = max(yaw - config.MAX_YAW_VALUE, config.MIN_YAW_VALUE - yaw)
+        if excess > 0:
+            found.append(self.record("yaw", time, position, excess))
+        return found
+
+    def check_path(self, times: np.ndarray, positions: np.ndarray, inside: np.ndarray, was_inside: bool) -> list:
+        """
+        Checks path samples against the boundary. Every exit starts a violation, which is
+        extended by the following samples outside and ends at the next sample inside.
+
+        Args:
+            times (np.ndarray): The sample times.
+            positions (np.ndarray): The sample positions as an (n, 2) array.
+            inside (np.ndarray): Whether each sample is inside the boundary.
+            was_inside (bool): Whether the drone was inside before the first sample.
+
+        Returns:
+            list: The new violations.
+        """
+        found = []
+        if was_inside and inside.all():
+            return found
+        distances = np.zeros(len(inside))
+        outside = np.flatnonzero(~inside)
+        if len(outside):
+            distances[outside] = self.boundary.distance(positions[outside])
+        # Samples within the tolerance are rounding errors of a path along the boundary, not exits
+        inside = inside | (distances <= self.config.BOUNDARY_TOLERANCE)
+        previous = np.concatenate(([was_inside], inside[:-1]))
+        changes = np.flatnonzero(inside != previous)
+        bounds = np.concatenate(([0], changes, [len(inside)]))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if start == stop or inside[start]:
+                if start < stop and self.excursion is not None:
+                    self.excursion["end_time"] = float(times[start])
+                    self.excursion = None
+                continue
+            if self.excursion is None:
+                self.excursion = self.record("boundary", times[start], positions[start], distances[start])
+                found.append(self.excursion)
+                if "boundary" in self.stop_on:
+                    break  # The flight ends at this sample
+            self.excursion["excess"] = max(self.excursion["excess"], float(distances[start:stop].max()))
+        return found
+
+    def check_time(self, previous_time: float, time: float, position_at) -> list:
+        """
+        Checks whether the flight exceeded its duration limit since the previous update.
+        The excess grows with every update, unless the violation ends the flight at the limit.
+
+        Args:
+            previous_time (float): The simulated time of the previous update.
+            time (float): The current simulated time.
+            position_at (callable): Returns the drone position at a simulated time of the current update.
+
+        Returns:
+            list: The new violations.
+        """
+        if previous_time <= self.max_flight_time < time:
+            excess = 0.0 if "duration" in self.stop_on else time - self.max_flight_time
+            return [self.record("duration", self.max_flight_time, position_at(self.max_flight_time), excess)]
+        if time > self.max_flight_time and self.violations_of("duration"):
+            self.violations_of("duration")[0]["excess"] = time - self.max_flight_time
+        return []
+
+    def check_update(self, previous_time: float, time: float, sample_times: np.ndarray, positions: np.ndarray,
+                     inside: np.ndarray, was_inside: bool, position_at) -> tuple:
+        """
+        Checks the flight since the previous update against the flight duration and the boundary.
+        When the duration ends the flight, the samples after the limit are not checked.
+
+        Args:
+            previous_time (float): The simulated time of the previous update.
+            time (float): The current simulated time.
+            sample_times (np.ndarray): The path sample times since the previous update, ending at `time`.
+            positions (np.ndarray): The sample positions as an (n, 2) array.
+            inside (np.ndarray): Whether each sample is inside the boundary.
+            was_inside (bool): Whether the drone was inside before the first sample.
+            position_at (callable): Returns the drone position at a simulated time of the current update.
+
+        Returns:
+            tuple: The new violations up to the time the flight ends, the violation that ends the flight
+                   (or None), and the number of checked samples.
+        """
+        violations = self.check_time(previous_time, time, position_at)
+        stop = self.first_stop(violations)
+        count = len(sample_times)
+        if stop is not None:
+            # Nothing after the flight ends at the duration limit counts
+            count = int(np.searchsorted(sample_times, stop["time"], side="right"))
+        violations = self.check_path(sample_times[:count], positions[:count], inside[:count], was_inside) + violations
+        stop = self.first_stop(violations)
+        end_time = stop["time"] if stop is not None else time
+        return [violation for violation in violations if violation["time"] <= end_time], stop, count
+
+    def record(self, kind: str, time: float, position: np.ndarray, excess: float) -> dict:
+        """
+        Records a new violation.
+
+        Args:
+            kind (str): The violation kind.
+            time (float): The simulated time at which it started.
+            position (np.ndarray): The drone position at that time.
+            excess (float): The excess over the limit.
+
+        Returns:
+            dict: The violation.
+        """
+        violation = {"kind": kind, "time": float(time), "x": float(position[0]), "y": float(position[1]), "excess": float(excess)}
+        if kind == "boundary":
+            violation["end_time"] = None
+        # Violations are mostly recorded in time order, so the position is searched from the end
+        position = len(self.violations)
+        while position and self.violations[position - 1]["time"] > violation["time"]:
+            position -= 1
+        self.violations.insert(position, violation)
+        return violation
+
+    def violations_of(self, kind: str) -> list:
+        """
+        Returns the violations of one kind.
+
+        Args:
+            kind (str): The violation kind.
+
+        Returns:
+            list: The violations.
+        """
+        return [violation for violation in self.violations if violation["kind"] == kind]
+
+    def first_stop(self, violations: list):
+        """
+        Finds the earliest of the given violations that ends the flight.
+
+        Args:
+            violations (list): The violations.
+
+        Returns:
+            dict: The violation, or None if none of them ends the flight.
+        """
+        stops = [violation for violation in violations if violation["kind"] in self.stop_on]
+        return min(stops, key=lambda violation: violation["time"]) if stops else None
+
+    def discard_after(self, time: float) -> None:
+        """
+        Forgets the violations that started after a time, when the flight was ended at that time.
+
+        Args:
+            time (float): The simulated time the flight ended.
+        """
+        self.violations = [violation for violation in self.violations if violation["time"] <= time]
+        if self.excursion is not None and self.excursion["time"] > time:
+            self.excursion = None
+
+def describe_violation(violation: dict) -> str:
+    """
+    Describes a violation in words.
+
+    Args:
+        violation (dict): The violation.
+
+    Returns:
+        str: The description.
+    """
+    kind, excess = violation["kind"], violation["excess"]
+    position = f"at ({violation['x']:.1f}, {violation['y']:.1f})"
+    if kind == "boundary":
+        return f"left the boundary {position} after {violation['time']:.1f} s, up to {excess:.1f} m outside"
+    if kind == "duration":
+        return f"exceeded the flight duration of {violation['time']:.0f} s" + (f" by {excess:.1f} s" if excess > 0 else "")
+    if kind == "separation":
+        return f"came up to {excess:.1f} m closer than allowed to drone {violation['other']} {position} after {violation['time']:.1f} s"
+    if kind == "velocity":
+        return f"velocity out of range by {excess:g} m/s {position} after {violation['time']:.1f} s"
+    return f"yaw out of range by {excess:g} {position} after {violation['time']:.1f} s"
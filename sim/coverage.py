@@ -1,33 +1,150 @@
-import pygame
 import numpy as np
-import settings
-from sim.utils import rotate_point, value_to_color, to_screen_coords
+from sim.config import SimConfig
+from functools import lru_cache
+from sim.utils import values_to_colors, to_screen_coords
+from sim.trajectory import photo_arrays
+from sim.camera import photo_footprint, rotate_footprint
+from sim.boundary import CircleBoundary, PolygonBoundary, get_boundary
+
+@lru_cache(maxsize=16)
+def polygon_boundary_mask(boundary: PolygonBoundary, width: int, height: int, center_x: int, center_y: int) -> np.ndarray:
+    """
+    Builds a read-only mask of the map cells inside a polygon boundary, cached by the boundary and the map.
+
+    Args:
+        boundary (PolygonBoundary): The boundary.
+        width (int): Width of the coverage map.
+        height (int): Height of the coverage map.
+        center_x (int): Screen x-coordinate of the simulation origin.
+        center_y (int): Screen y-coordinate of the simulation origin.
+
+    Returns:
+        np.ndarray: Boolean mask of shape (width, height).
+    """
+    mask = np.zeros((width, height), dtype=bool)
+    vertices = np.vstack(boundary.rings)
+    # Only the cells within the bounding box of the boundary are checked
+    min_x, max_x = max(int(np.floor(vertices[:, 0].min())) + center_x, 0), min(int(np.ceil(vertices[:, 0].max())) + center_x + 1, width)
+    min_y, max_y = max(center_y - int(np.ceil(vertices[:, 1].max())), 0), min(center_y - int(np.floor(vertices[:, 1].min())) + 1, height)
+    if min_x < max_x and min_y < max_y:
+        i, j = np.meshgrid(np.arange(min_x, max_x), np.arange(min_y, max_y), indexing='ij')
+        points = np.column_stack(((i - center_x).ravel(), (center_y - j).ravel()))
+        mask[min_x:max_x, min_y:max_y] = boundary.contains(points).reshape(i.shape)
+    mask.flags.writeable = False
+    return mask
+
+@lru_cache(maxsize=16)
+def circle_boundary_mask(x: int, y: int, radius: float, width: int, height: int) -> np.ndarray:
+    """
+    Builds a read-only mask of the map cells inside a circle, cached by its parameters.
+
+    Args:
+        x (int): Screen x-coordinate of the circle center.
+        y (int): Screen y-coordinate of the circle center.
+        radius (float): Radius of the circle.
+        width (int): Width of the coverage map.
+        height (int): Height of the coverage map.
+
+    Returns:
+        np.ndarray: Boolean mask of shape (width, height).
+    """
+    i, j = np.ogrid[:width, :height]
+    mask = (i - x) ** 2 + (j - y) ** 2 <= radius ** 2
+    mask.flags.writeable = False
+    return mask
+
+@lru_cache(maxsize=1024)
+def footprint_stamp(footprint: tuple, yaw: float) -> tuple:
+    """
+    Rasterizes a footprint rotated to a yaw into a stamp, cached by the footprint and the yaw.
+    A map cell belongs to the stamp if its center lies inside the rotated footprint.
+
+    Args:
+        footprint (tuple): The convex footprint corners in simulation coordinates, counterclockwise, as a tuple of (x, y) tuples.
+        yaw (float): The yaw in degrees, quantized by the caller so the cache stays small.
+
+    Returns:
+        tuple: The read-only stamp as an array of ones and zeros, and the map offset (x, y) of its first cell from the photo center.
+    """
+    corners = rotate_footprint(np.array(footprint), [yaw])[0]
+    # Screen coordinates, the y-axis points down
+    corners[:, 1] *= -1
+    low = np.floor(corners.min(axis=0)).astype(int)
+    high = np.ceil(corners.max(axis=0)).astype(int)
+    x, y = np.ogrid[low[0]:high[0] + 1, low[1]:high[1] + 1]
+    inside = np.ones((len(x), y.shape[1]), dtype=bool)
+    # The y flip made the corners clockwise, so the inside is to the right of every edge
+    for (x0, y0), (x1, y1) in zip(corners, np.roll(corners, -1, axis=0)):
+        inside &= (x1 - x0) * (y - y0) - (y1 - y0) * (x - x0) <= 1e-9
+    stamp = inside.astype(float)
+    stamp.flags.writeable = False
+    return stamp, (int(low[0]), int(low[1]))
+
+class CoverageTargetReached(Exception):
+    """
+    Raised when a photo brings the coverage to COVERAGE_TARGET, which ends the flight early.
+
+    Attributes:
+        coverage (float): The coverage percentage reached.
+    """
+    def __init__(self, coverage: float):
+        super().__init__(f"Coverage target reached: {coverage:.1f}%")
+        self.coverage = coverage
 
 class Coverage:
     """
     Class to manage and calculate coverage and overlap on a 2D grid.
+
+    Every map cell inside the area holds its image count, cells outside are NaN. The number of
+    area cells, covered cells and cells with more than one image are kept as running counters,
+    updated by every photo in the time of its footprint, so the coverage and overlap are known at
+    any time during the flight without scanning the map.
+
+    Attributes:
+        area_cells (int): The number of map cells inside the boundary.
+        covered_cells (int): The number of area cells with at least one image.
+        overlap_cells (int): The number of area cells with more than one image.
     """
 
-    def __init__(self):
+    def __init__(self, config=None):
         """
         Initializes the coverage map with NaN values.
+
+        Args:
+            config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
         """
-        self.coverage_map = np.empty([settings.WIDTH, settings.HEIGHT])
+        self.config = config or SimConfig.default()
+        self.footprint = tuple(map(tuple, photo_footprint(self.config).round(6)))
+        self.coverage_map = np.empty([self.config.WIDTH, self.config.HEIGHT])
         self.coverage_map[:] = np.nan
+        self.area_cells = 0
+        self.covered_cells = 0
+        self.overlap_cells = 0
 
-    def add_rectangle_boundary_to_coverage_map_n(self, min_x: int, max_x: int, min_y: int, max_y: int) -> None:
+    def add_boundary_to_coverage_map_n(self, shape: str, params: dict) -> None:
         """
-        Adds a rectangular boundary to the coverage map.
+        Adds the boundary described by a shape and its parameters to the coverage map.
 
         Args:
-            min_x (int): Minimum x-coordinate of the rectangle.
-            max_x (int): Maximum x-coordinate of the rectangle.
-            min_y (int): Minimum y-coordinate of the rectangle.
-            max_y (int): Maximum y-coordinate of the rectangle.
+            shape (str): The boundary shape, 'circle', 'rectangle', 'polygon' or 'multipolygon'.
+            params (dict): The boundary parameters as defined in the settings.
+        """
+        boundary = get_boundary(shape, params)
+        if isinstance(boundary, CircleBoundary):
+            self.add_circle_boundary_to_coverage_map_n(boundary.x, boundary.y, boundary.radius)
+        else:
+            self.add_polygon_boundary_to_coverage_map_n(boundary)
+
+    def add_polygon_boundary_to_coverage_map_n(self, boundary: PolygonBoundary) -> None:
         """
-        for x in range(min_x, max_x + 1):
-            for y in range(min_y, max_y + 1):
-                self.coverage_map[int(x), int(y)] = 0
+        Adds a polygon boundary, with holes or several parts, to the coverage map.
+
+        Args:
+            boundary (PolygonBoundary): The boundary.
+        """
+        width, height = self.coverage_map.shape
+        self.coverage_map[polygon_boundary_mask(boundary, width, height, self.config.CENTER_X, self.config.CENTER_Y)] = 0
+        self.count_cells()
 
     def add_circle_boundary_to_coverage_map_n(self, x: float, y: float, radius: float) -> None:
         """
@@ -38,69 +155,115 @@ class Coverage:
             y (float): y-coordinate of the circle center.
             radius (float): Radius of the circle.
         """
-        point = (x, y)
-        point = to_screen_coords(point)
-        x, y = point
-        for i in range(int(x - radius), int(x + radius) + 1):
-            for j in range(int(y - radius), int(y + radius) + 1):
-                if (i - x) ** 2 + (j - y) ** 2 <= radius ** 2:
-                    self.coverage_map[int(i), int(j)] = 0
+        x, y = to_screen_coords((x, y), self.config)
+        width, height = self.coverage_map.shape
+        self.coverage_map[circle_boundary_mask(x, y, radius, width, height)] = 0
+        self.count_cells()
+
+    def count_cells(self) -> None:
+        """
+        Recounts the area, covered and overlapped cells of the whole map, after the boundary changed.
+        """
+        self.area_cells = np.count_nonzero(self.coverage_map >= 0)
+        self.covered_cells = np.count_nonzero(self.coverage_map > 0)
+        self.overlap_cells = np.count_nonzero(self.coverage_map > 1)
 
     def add_photos_to_coverage_map_n(self, photos: list) -> None:
         """
         Adds photos to the coverage map.
+        Every photo adds the cached footprint stamp of its yaw, quantized to FOOTPRINT_YAW_STEP degrees,
+        to a slice of the map. Cells outside the area are NaN and stay NaN.
 
         Args:
-            photos (list): List of photos, each represented by a tuple (center, angle).
-        """
-        for photo in photos:
-            center = photo[0]
-            center = to_screen_coords(center)
-            half_size = settings.PHOTO_SIZE // 2
-            photo_array = np.empty((settings.PHOTO_SIZE, settings.PHOTO_SIZE), dtype=object)
-            for i in range(settings.PHOTO_SIZE):
-                for j in range(settings.PHOTO_SIZE):
-                    x = center[0] - half_size + i
-                    y = center[1] - half_size + j
-                    photo_array[i, j] = (x, y)
-            angle = photo[1]
-            rotated_photo = [rotate_point(x, y, center[0], center[1], angle) for x, y in photo_array.flat]
-            for p in rotated_photo:
-                x, y = p
-                if self.coverage_map[int(x), int(y)] >= 0:
-                    self.coverage_map[int(x), int(y)] += 1
-
-    def calculate_coverage_n(self, screen) -> None:
-        """
-        Calculates and displays the coverage percentage on the screen.
+            photos: A PhotoLog, or a list of photos, each represented by a tuple (center, angle).
+        """
+        if len(photos) == 0:
+            return
+        positions, yaws = photo_arrays(photos)
+        # Same conversion as to_screen_coords, applied to all photos at once
+        centers = np.column_stack((positions[:, 0] + self.config.CENTER_X, -positions[:, 1] + self.config.CENTER_Y)).astype(int)
+        step = self.config.FOOTPRINT_YAW_STEP
+        yaws = (np.round(yaws / step) * step) % 360
+        for (center_x, center_y), yaw in zip(centers.tolist(), yaws.tolist()):
+            self.add_stamp(center_x, center_y, yaw)
+
+    def add_photo_to_coverage_map_n(self, x: float, y: float, yaw: float) -> None:
+        """
+        Adds a single photo to the coverage map, like `add_photos_to_coverage_map_n`.
 
         Args:
-            screen: Pygame screen object to draw the coverage.
-        """
-        area = 0
-        coverCount = 0
-        for (i, j), value in np.ndenumerate(self.coverage_map):
-            if value >= 0:
-                area += 1
-            if value > 0:
-                coverCount += 1
-                color = value_to_color(value)
-                pygame.draw.rect(screen, color, (i, j, 1, 1))
-        coverage = int((coverCount / area) * 100)
-        print(f"Coverage: {coverage}%")
-
-    def calculate_overlap_n(self) -> None:
-        """
-        Calculates and displays the overlap percentage.
-        """
-        coveredArea = 0
-        overlapCount = 0
-        for (i, j), value in np.ndenumerate(self.coverage_map):
-            if value == 1:
-                coveredArea += 1
-            if value > 1:
-                coveredArea += 1
-                overlapCount += 1
-        overlap = int((overlapCount / coveredArea) * 100) if overlapCount != 0 else 0
-        print(f"Overlap: {overlap}%")
-        pygame.display.update()
\ No newline at end of file
+            x (float): x-coordinate of the photo center.
+            y (float): y-coordinate of the photo center.
+            yaw (float): The yaw of the drone when the photo was taken.
+        """
+        step = self.config.FOOTPRINT_YAW_STEP
+        self.add_stamp(int(x + self.config.CENTER_X), int(-y + self.config.CENTER_Y), float(np.round(yaw / step) * step % 360))
+
+    def add_stamp(self, center_x: int, center_y: int, yaw: float) -> None:
+        """
+        Adds the footprint stamp of a yaw at a map cell and updates the cell counters from the
+        image counts under the stamp before it is added.
+
+        Args:
+            center_x (int): Map x-coordinate of the photo center.
+            center_y (int): Map y-coordinate of the photo center.
+            yaw (float): The quantized yaw in degrees.
+        """
+        width, height = self.coverage_map.shape
+        stamp, (offset_x, offset_y) = footprint_stamp(self.footprint, yaw)
+        x0, y0 = center_x + offset_x, center_y + offset_y
+        x1, y1 = x0 + stamp.shape[0], y0 + stamp.shape[1]
+        if x1 <= 0 or y1 <= 0 or x0 >= width or y0 >= height:
+            return
+        cells = self.coverage_map[max(x0, 0):min(x1, width), max(y0, 0):min(y1, height)]
+        stamp = stamp[max(-x0, 0):stamp.shape[0] - max(x1 - width, 0), max(-y0, 0):stamp.shape[1] - max(y1 - height, 0)]
+        counts = cells[stamp > 0]
+        self.covered_cells += np.count_nonzero(counts == 0)
+        self.overlap_cells += np.count_nonzero(counts == 1)
+        cells += stamp
+
+    def coverage_percentage(self) -> float:
+        """
+        Returns the current coverage percentage from the cell counters.
+
+        Returns:
+            float: The percentage of the area covered by at least one image.
+        """
+        return (self.covered_cells / self.area_cells) * 100 if self.area_cells else 0.0
+
+    def overlap_percentage(self) -> float:
+        """
+        Returns the current overlap percentage from the cell counters.
+
+        Returns:
+            float: The percentage of the covered area with more than one image.
+        """
+        return (self.overlap_cells / self.covered_cells) * 100 if self.overlap_cells else 0.0
+
+    def calculate_coverage_n(self, screen=None) -> int:
+        """
+        Calculates the coverage percentage and draws the coverage on the screen.
+
+        Args:
+            screen: Pygame screen object to draw the coverage. Defaults to None, which skips drawing.
+
+        Returns:
+            int: The coverage percentage.
+        """
+        if screen is not None:
+            import pygame  # Only needed to draw, headless runs don't load pygame
+            covered = self.coverage_map > 0
+            # Write the whole heatmap into the screen pixels in one vectorized assignment
+            pixels = pygame.surfarray.pixels3d(screen)
+            pixels[covered] = values_to_colors(self.coverage_map[covered])[:, :3]
+            del pixels
+        return int(self.coverage_percentage())
+
+    def calculate_overlap_n(self) -> int:
+        """
+        Calculates the overlap percentage.
+
+        Returns:
+            int: The overlap percentage.
+        """
+        return int(self.overlap_percentage())
@@ -0,0 +1,600 @@
+import numpy as np
+from functools import lru_cache
+from sim.config import SimConfig
+from sim.utils import custom_print
+from sim.boundary import get_boundary
+from sim.constraints import ConstraintMonitor, FlightTerminated, describe_violation
+from sim.coverage import Coverage, CoverageTargetReached
+from sim.analytic_coverage import AnalyticCoverage
+from sim.trajectory import Trajectory, PhotoLog
+from sim.telemetry import TelemetryWriter
+from tools.lua_runner import LuaRunner
+from tools.scheduler import ScriptScheduler
+
+"""
+This file is used to simulate a fleet of drones that split one flight area, each flown by its own Lua script.
+"""
+
+SEPARATION_CHUNK = 256  # Path samples checked for separation at once, bounds the memory of long updates of large fleets
+
+@lru_cache(maxsize=64)
+def drone_pairs(count: int) -> tuple:
+    """
+    Returns the pairs of drones among a number of flying drones, cached by the number.
+
+    Args:
+        count (int): The number of drones.
+
+    Returns:
+        tuple: The read-only index arrays of the first and the second drone of every pair, in the order of the
+               upper triangle of a (count, count) matrix.
+    """
+    first, second = np.triu_indices(count, 1)
+    first.flags.writeable = False
+    second.flags.writeable = False
+    return first, second
+
+class Fleet:
+    """
+    A fleet of drones sharing one flight area, one simulated clock and one coverage map.
+
+    The state of all drones is kept in arrays with one row per drone, so an update advances every drone in
+    the same vectorized step. Like a DroneFlight, every drone flies straight segments whose positions are
+    computed in closed form, and the path samples of all drones are checked against the boundary and against
+    each other at once. Only the drones with something to report, like a boundary exit or the end of the flight
+    duration, are handled one by one by their ConstraintMonitor. Two flying drones closer than FLEET_MIN_SEPARATION
+    record a 'separation' violation each, once per encounter.
+
+    The drones are flown through their FleetDrone views, which provide the flight API of a DroneFlight.
+    Drones are numbered from 1 in the telemetry log, the violations and the messages.
+
+    Attributes:
+        config (SimConfig): The simulation configuration.
+        size (int): The number of drones.
+        sim_time (float): The simulated time of all drones.
+        positions (np.ndarray): The drone positions as an (n, 2) array.
+        velocities (np.ndarray): The drone velocities as an (n, 2) array.
+        yaws (np.ndarray): The drone yaws.
+        segment_start_times (np.ndarray): The start time of the current segment of every drone.
+        segment_start_positions (np.ndarray): The start position of the current segment of every drone as an (n, 2) array.
+        running (np.ndarray): Whether every drone is still flying.
+        inside_boundary (np.ndarray): Whether every drone was inside the boundary at the last update.
+        flight_times (np.ndarray): The flight time of every drone, set when its flight ends.
+        paths (list): The Trajectory of every drone.
+        photos (list): The PhotoLog of every drone.
+        monitors (list): The ConstraintMonitor of every drone.
+        terminations (list): The violation that ended the flight of every drone, or None.
+        encounters (dict): The separation violations of the drone pairs that are too close, by their indices.
+        coverage (Coverage): The live coverage of the photos of all drones.
+        target_reached (bool): Whether a photo brought the coverage to COVERAGE_TARGET, which ends all flights.
+        drones (list): The FleetDrone view of every drone.
+    """
+
+    def __init__(self, size: int, start_positions=None, telemetry=None, config=None):
+        """
+        Initializes the fleet with all drones at their start positions.
+
+        Args:
+            size (int): The number of drones.
+            start_positions (np.ndarray, optional): The start positions as an (n, 2) array. Defaults to a row along
+                                                    the x-axis from the origin, FLEET_START_SPACING meters apart.
+            telemetry (TelemetryWriter, optional): Log to stream the events of all drones to, with their 'drone' number.
+            config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        """
+        self.config = config or SimConfig.default()
+        self.size = size
+        self.telemetry = telemetry
+        self.sim_time = 0.0
+        if start_positions is None:
+            start_positions = np.column_stack((np.arange(size) * self.config.FLEET_START_SPACING, np.zeros(size)))
+        self.positions = np.array(start_positions, dtype=float).reshape(size, 2)
+        self.velocities = np.zeros((size, 2))
+        self.yaws = np.zeros(size)
+        self.segment_start_times = np.zeros(size)
+        self.segment_start_positions = self.positions.copy()
+        self.running = np.ones(size, dtype=bool)
+        self.flight_times = np.zeros(size)
+        self.paths = [Trajectory(min_spacing=self.config.PATH_MIN_SPACING, tolerance=self.config.PATH_SIMPLIFY_TOLERANCE)
+                      for _ in range(size)]
+        self.photos = [PhotoLog() for _ in range(size)]
+        for path, (x, y) in zip(self.paths, self.positions):
+            path.append(0.0, x, y, 0.0)
+        self.boundary = get_boundary(self.config.BOUNDARY_SHAPE, self.config.BOUNDARY_PARAMS)
+        self.inside_boundary = self.boundary.contains(self.positions)
+        self.monitors = [ConstraintMonitor(self.boundary, self.config) for _ in range(size)]
+        self.terminations = [None] * size
+        self.encounters = {}
+        self.coverage = Coverage(self.config)
+        self.coverage.add_boundary_to_coverage_map_n(self.config.BOUNDARY_SHAPE, self.config.BOUNDARY_PARAMS)
+        self.target_reached = False
+        self.drones = [FleetDrone(self, index) for index in range(size)]
+        # A start outside the area is recorded, but doesn't end the flight before the script could react
+        for index in np.flatnonzero(~self.inside_boundary):
+            self.report_violations(index, self.monitors[index].check_path(np.zeros(1), self.positions[index][np.newaxis], np.array([False]), True))
+
+    def log_event(self, index: int, event: str, time: float = None, **fields) -> None:
+        """
+        Write an event of a drone to the telemetry log, if there is one.
+
+        Args:
+            index (int): The drone index.
+            event (str): The event name.
+            time (float, optional): The simulated time of the event. Defaults to the current time.
+            **fields: The event data.
+        """
+        if self.telemetry is not None:
+            self.telemetry.write(event, self.sim_time if time is None else time, drone=int(index) + 1, **fields)
+
+    def position_at(self, sim_time) -> np.ndarray:
+        """
+        Compute the positions of all drones at a time within their current segments in closed form.
+
+        Args:
+            sim_time (float or np.ndarray): The simulated time, or an array of times.
+
+        Returns:
+            np.ndarray: The positions as an (n, 2) array, or an (m, n, 2) array for m times.
+        """
+        elapsed = np.subtract.outer(sim_time, self.segment_start_times)
+        return self.segment_start_positions + self.velocities * elapsed[..., np.newaxis]
+
+    def drone_position_at(self, index: int, sim_time: float) -> np.ndarray:
+        """
+        Compute the position of one drone at a time within its current segment.
+
+        Args:
+            index (int): The drone index.
+            sim_time (float): The simulated time.
+
+        Returns:
+            np.ndarray: The position.
+        """
+        return self.segment_start_positions[index] + self.velocities[index] * (sim_time - self.segment_start_times[index])
+
+    def start_segment(self, index: int, velocity: np.ndarray, sim_time: float = None) -> None:
+        """
+        Start a new straight segment of a drone with the given velocity at its position.
+
+        Args:
+            index (int): The drone index.
+            velocity (np.ndarray): The velocity of the new segment.
+            sim_time (float, optional): The start time, at most the current time. Defaults to the current time.
+        """
+        sim_time = self.sim_time if sim_time is None else sim_time
+        position = self.drone_position_at(index, sim_time)
+        self.paths[index].append(sim_time, position[0], position[1], self.yaws[index])
+        self.positions[index] = position
+        self.segment_start_times[index] = sim_time
+        self.segment_start_positions[index] = position
+        self.velocities[index] = velocity
+
+    def adjust_flight_parameters(self, index: int, x_velocity: float, y_velocity: float, yaw: float) -> None:
+        """
+        Adjust the flight parameters of a drone.
+
+        Args:
+            index (int): The drone index.
+            x_velocity (float): The velocity in the x direction.
+            y_velocity (float): The velocity in the y direction.
+            yaw (float): The yaw angle adjustment.
+
+        Raises:
+            FlightTerminated: If the values violate a constraint in STOP_ON_VIOLATION. The flight of the drone is ended first.
+        """
+        self.start_segment(index, np.array([x_velocity, y_velocity], dtype=float))
+        self.yaws[index] += yaw
+        position, velocity = self.positions[index], self.velocities[index]
+        self.log_event(index, "adjust", x=position[0], y=position[1], vx=velocity[0], vy=velocity[1], yaw=self.yaws[index])
+        violations = self.monitors[index].check_parameters(self.sim_time, position, velocity, yaw)
+        self.report_violations(index, violations)
+        stop = self.monitors[index].first_stop(violations)
+        if stop is not None:
+            self.terminate(index, stop)
+            raise FlightTerminated(stop)
+
+    def update(self, delta_time: float) -> None:
+        """
+        Advance the simulated time and the positions of all drones in one step.
+
+        Args:
+            delta_time (float): The time elapsed since the last update.
+        """
+        previous_time = self.sim_time
+        self.sim_time += delta_time
+        self.positions = self.position_at(self.sim_time)
+        self.check_constraints(previous_time)
+
+    def check_constraints(self, previous_time: float) -> None:
+        """
+        Check the flights since the previous update against the boundary, the flight duration and the separation.
+        The segments of all flying drones are sampled at the path sample step and checked at once; the monitor of
+        a drone is only consulted if it was or went outside, or the flight duration is over.
+
+        Args:
+            previous_time (float): The simulated time of the previous update.
+        """
+        flying = np.flatnonzero(self.running)
+        if len(flying) == 0:
+            return
+        sample_times = np.append(np.arange(previous_time, self.sim_time, self.config.PATH_SAMPLE_STEP)[1:], self.sim_time)
+        positions = self.position_at(sample_times)[:, flying]
+        inside = self.boundary.contains(positions.reshape(-1, 2)).reshape(len(sample_times), len(flying))
+        end_times = np.full(len(flying), self.sim_time)
+        stops = {}
+        over_time = self.sim_time > self.monitors[0].max_flight_time
+        for k in np.flatnonzero(over_time | ~inside.all(axis=0) | ~self.inside_boundary[flying]):
+            index = flying[k]
+            violations, stop, count = self.monitors[index].check_update(
+                previous_time, self.sim_time, sample_times, positions[:, k], inside[:, k], self.inside_boundary[index],
+                lambda sim_time: self.drone_position_at(index, sim_time))
+            if self.telemetry is not None:
+                crossings = np.concatenate(([self.inside_boundary[index]], inside[:count, k])).astype(int)
+                for i in np.flatnonzero(np.diff(crossings)):
+                    if stop is None or sample_times[i] <= stop["time"]:
+                        self.log_event(index, "boundary", float(sample_times[i]), x=positions[i, k, 0], y=positions[i, k, 1], inside=bool(inside[i, k]))
+            if count:
+                self.inside_boundary[index] = inside[count - 1, k]
+            self.report_violations(index, violations)
+            if stop is not None:
+                stops[index] = stop
+                end_times[k] = stop["time"]
+
+        if len(flying) > 1:
+            # Samples after a drone's flight ended don't count
+            valid = sample_times[:, np.newaxis] <= end_times
+            for start in range(0, len(sample_times), SEPARATION_CHUNK):
+                chunk = slice(start, start + SEPARATION_CHUNK)
+                for index, stop in self.check_separation(flying, sample_times[chunk], positions[chunk], valid[chunk]).items():
+                    if index not in stops or stop["time"] < stops[index]["time"]:
+                        stops[index] = stop
+        for index, stop in stops.items():
+            self.terminate(index, stop)
+
+    def check_separation(self, flying: np.ndarray, sample_times: np.ndarray, positions: np.ndarray, valid: np.ndarray) -> dict:
+        """
+        Checks path samples of the flying drones against the minimum separation. Every pair of drones that comes
+        too close starts an encounter, a separation violation of both drones, which is extended by the following
+        samples that are too close and ends at the next sample far enough apart.
+        Only the pairs whose bounding boxes over the samples come closer than the separation, and the pairs of the
+        encounters in progress, are checked sample by sample.
+
+        Args:
+            flying (np.ndarray): The indices of the flying drones.
+            sample_times (np.ndarray): The sample times.
+            positions (np.ndarray): The sample positions of the flying drones as an (m, n, 2) array.
+            valid (np.ndarray): Whether every sample of every drone is before the end of its flight, as an (m, n) array.
+
+        Returns:
+            dict: The separation violations that end flights, by the drone index.
+        """
+        separation = self.config.FLEET_MIN_SEPARATION
+        first, second = drone_pairs(len(flying))
+        low, high = positions.min(axis=0), positions.max(axis=0)
+        near = ((low[first] - high[second] < separation) & (low[second] - high[first] < separation)).all(axis=1)
+        ongoing = np.zeros(len(first), dtype=bool)
+        if self.encounters:
+            # Encounters in progress end at the first sample far enough apart. The drones of an encounter are
+            # flying, so their positions a < b in `flying` give the pair's column of the upper triangle.
+            a, b = np.searchsorted(flying, np.array(list(self.encounters)).T)
+            ongoing[a * len(flying) - a * (a + 1) // 2 + b - a - 1] = True
+        pairs = np.flatnonzero(near | ongoing)
+        if len(pairs) == 0:
+            return {}
+        first, second = first[pairs], second[pairs]
+        offsets = positions[:, first] - positions[:, second]
+        distances = np.sqrt(offsets[..., 0] ** 2 + offsets[..., 1] ** 2)
+        close = (distances < separation) & valid[:, first] & valid[:, second]
+        candidates = np.flatnonzero(close.any(axis=0) | ongoing[pairs])
+        # The samples of every candidate pair split into runs that are all too close or all far enough apart.
+        # A run starts at the first sample and wherever the pair changes from the previous sample, or from
+        # its encounter in progress; the runs of all pairs are found at once in the (pairs, samples) matrix.
+        close = close[:, candidates].T
+        distances = distances[:, candidates].T
+        changes = close != np.column_stack((ongoing[pairs[candidates]], close[:, :-1]))
+        changes[:, 0] = True
+        runs = np.flatnonzero(changes)
+        nearest = np.minimum.reduceat(distances.ravel(), runs)
+        columns, starts = np.divmod(runs, len(sample_times))
+        first, second = first[candidates], second[candidates]
+        drones = list(zip(flying[first].tolist(), flying[second].tolist()))
+        first, second, times = first.tolist(), second.tolist(), sample_times.tolist()
+        stops = {}
+        broken = set()
+        for q, start, run_close, start_distance, run_nearest in zip(columns.tolist(), starts.tolist(), close.ravel()[runs].tolist(),
+                                                                    distances.ravel()[runs].tolist(), nearest.tolist()):
+            if q in broken:
+                continue
+            a, b, pair = first[q], second[q], drones[q]
+            if not run_close:
+                self.encounters.pop(pair, None)
+                continue
+            if any(index in stops and times[start] > stops[index]["time"] for index in pair):
+                broken.add(q)  # The flight ended at an earlier encounter
+                continue
+            if pair not in self.encounters:
+                shortfall = float(separation - start_distance)
+                self.encounters[pair] = []
+                for index, k, other in ((pair[0], a, pair[1]), (pair[1], b, pair[0])):
+                    violation = self.monitors[index].record("separation", times[start], positions[start, k], shortfall)
+                    violation["other"] = int(other) + 1
+                    self.encounters[pair].append(violation)
+                    self.report_violations(index, [violation])
+                    if "separation" in self.monitors[index].stop_on and index not in stops:
+                        stops[index] = violation
+                if any(index in stops for index in pair):
+                    broken.add(q)  # The flights end at this sample
+                    continue
+            shortfall = float(separation - run_nearest)
+            for violation in self.encounters[pair]:
+                violation["excess"] = max(violation["excess"], shortfall)
+        return stops
+
+    def report_violations(self, index: int, violations: list) -> None:
+        """
+        Log and print new constraint violations of a drone.
+
+        Args:
+            index (int): The drone index.
+            violations (list): The violations, see ConstraintMonitor.
+        """
+        for violation in violations:
+            if self.telemetry is not None:
+                self.log_event(index, "violation", violation["time"], **{k: v for k, v in violation.items() if k != "time"})
+            custom_print(f"Constraint violation of drone {index + 1}: {describe_violation(violation)}", config=self.config)
+
+    def terminate(self, index: int, violation: dict) -> None:
+        """
+        End the flight of a drone at the time of a violation. Unlike DroneFlight.terminate this doesn't raise,
+        because the other drones fly on.
+
+        Args:
+            index (int): The drone index.
+            violation (dict): The violation that ends the flight.
+        """
+        sim_time = min(violation["time"], self.sim_time)
+        self.monitors[index].discard_after(sim_time)
+        self.terminations[index] = violation
+        self.end_flight(index, sim_time)
+        self.inside_boundary[index] = self.boundary.contains_point(self.positions[index])
+
+    def take_photo(self, index: int) -> None:
+        """
+        Simulate taking a photo with a drone and update the shared live coverage.
+
+        Args:
+            index (int): The drone index.
+
+        Raises:
+            CoverageTargetReached: If the photo brought the coverage to COVERAGE_TARGET. All flights are ended first.
+        """
+        x, y = self.positions[index]
+        self.photos[index].append(self.sim_time, x, y, self.yaws[index])
+        self.coverage.add_photo_to_coverage_map_n(x, y, self.yaws[index])
+        coverage = self.coverage.coverage_percentage()
+        self.log_event(index, "photo", x=x, y=y, yaw=self.yaws[index], coverage=coverage, overlap=self.coverage.overlap_percentage())
+        custom_print(f"Drone {index + 1} took a photo at ({x}, {y})", config=self.config)
+        target = self.config.COVERAGE_TARGET
+        if target is not None and coverage >= target:
+            self.target_reached = True
+            for other in np.flatnonzero(self.running):
+                self.end_flight(other)
+            raise CoverageTargetReached(coverage)
+
+    def end_flight(self, index: int, sim_time: float = None) -> None:
+        """
+        End the flight of a drone and record its flight time.
+
+        Args:
+            index (int): The drone index.
+            sim_time (float, optional): The time the flight ends, at most the current time. Defaults to the current time.
+        """
+        sim_time = self.sim_time if sim_time is None else sim_time
+        self.start_segment(index, np.zeros(2), sim_time)
+        self.running[index] = False
+        self.flight_times[index] = sim_time
+        self.encounters = {pair: violations for pair, violations in self.encounters.items() if index not in pair}
+        self.log_event(index, "end", sim_time, x=self.positions[index, 0], y=self.positions[index, 1], flight_time=sim_time)
+        custom_print(f"Drone {index + 1} ended its flight", config=self.config)
+
+class FleetDrone:
+    """
+    The flight API of one drone of a fleet, with the same functions as a DroneFlight, so a LuaRunner can fly it.
+    The drone is always headless, its time is the simulated time of the fleet.
+
+    Attributes:
+        fleet (Fleet): The fleet.
+        index (int): The index of the drone in the fleet.
+        config (SimConfig): The configuration of the fleet.
+    """
+
+    def __init__(self, fleet: Fleet, index: int):
+        """
+        Initializes the view of a drone.
+
+        Args:
+            fleet (Fleet): The fleet.
+            index (int): The index of the drone in the fleet.
+        """
+        self.fleet = fleet
+        self.index = index
+        self.config = fleet.config
+
+    @property
+    def sim_time(self) -> float:
+        """
+        The simulated time of the fleet.
+        """
+        return self.fleet.sim_time
+
+    @property
+    def position(self) -> np.ndarray:
+        """
+        The position of the drone.
+        """
+        return self.fleet.positions[self.index]
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the drone is still flying.
+        """
+        return bool(self.fleet.running[self.index])
+
+    def log_event(self, event: str, **fields) -> None:
+        """
+        Write an event of the drone at the current simulated time to the telemetry log, if there is one.
+
+        Args:
+            event (str): The event name.
+            **fields: The event data.
+        """
+        self.fleet.log_event(self.index, event, **fields)
+
+    def adjust_flight_parameters(self, xVelocity: float, yVelocity: float, yaw: float) -> None:
+        """
+        Adjust the flight parameters of the drone, see DroneFlight.adjust_flight_parameters.
+        """
+        self.fleet.adjust_flight_parameters(self.index, xVelocity, yVelocity, yaw)
+
+    def take_photo(self) -> None:
+        """
+        Take a photo at the drone's current position, see Fleet.take_photo.
+        """
+        self.fleet.take_photo(self.index)
+
+    def end_flight(self) -> None:
+        """
+        End the flight of the drone.
+        """
+        if self.running:
+            self.fleet.end_flight(self.index)
+
+    def get_distance_to_origin(self) -> float:
+        """
+        Get the distance of the drone from the origin.
+
+        Returns:
+            float: The distance to the origin.
+        """
+        distance = np.linalg.norm(self.position)
+        self.log_event("query", name="get_distance_to_origin", value=distance)
+        return distance
+
+    def get_x_coordinate(self) -> float:
+        """
+        Get the x coordinate of the drone's position.
+
+        Returns:
+            float: The x coordinate.
+        """
+        self.log_event("query", name="get_x_coordinate", value=self.position[0])
+        return self.position[0]
+
+    def get_y_coordinate(self) -> float:
+        """
+        Get the y coordinate of the drone's position.
+
+        Returns:
+            float: The y coordinate.
+        """
+        self.log_event("query", name="get_y_coordinate", value=self.position[1])
+        return self.position[1]
+
+    def get_compass_heading(self) -> float:
+        """
+        Get the compass heading (yaw) of the drone.
+
+        Returns:
+            float: The compass heading, or 200 outside of [-180, 180].
+        """
+        yaw = self.fleet.yaws[self.index]
+        self.log_event("query", name="get_compass_heading", value=yaw)
+        return yaw if -180 <= yaw <= 180 else 200
+
+    def get_coverage(self) -> float:
+        """
+        Get the percentage of the area covered by the photos of all drones so far.
+
+        Returns:
+            float: The coverage percentage.
+        """
+        coverage = self.fleet.coverage.coverage_percentage()
+        self.log_event("query", name="get_coverage", value=coverage)
+        return coverage
+
+    def get_overlap(self) -> float:
+        """
+        Get the percentage of the covered area with more than one photo of any drone so far.
+
+        Returns:
+            float: The overlap percentage.
+        """
+        overlap = self.fleet.coverage.overlap_percentage()
+        self.log_event("query", name="get_overlap", value=overlap)
+        return overlap
+
+def run_fleet(lua_script_paths: list, start_positions=None, telemetry_file: str = None, config: SimConfig = None) -> dict:
+    """
+    Runs a fleet headless on the simulated clock, every drone flown by its own Lua script.
+
+    The scripts run as coroutines on a ScriptScheduler and take turns: a script runs until it pauses, and when
+    all scripts are paused, the fleet advances in one update to the earliest time a pause ends. Scripts whose pauses end at
+    the same time continue in the order of their drones, so the results only depend on the scripts and the
+    configuration. Every script sees the Lua globals DRONE_ID (from 1) and FLEET_SIZE, so the same script can
+    fly a different part of the area on every drone. A script stops when its drone's flight ended, and a
+    flight ends when its script ends.
+
+    Args:
+        lua_script_paths (list): The path of the Lua script of every drone.
+        start_positions (np.ndarray, optional): The start positions as an (n, 2) array, see Fleet.
+        telemetry_file (str, optional): Path to stream a telemetry log of all drones to. Defaults to None.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+
+    Returns:
+        dict: The fleet results with the keys 'flight_time' (of the longest flight), 'photo_count', 'coverage' and
+              'overlap' of all drones, 'violations' (with the 'drone' number), 'target_reached', and 'drones',
+              the 'script', 'flight_time', 'photo_count', 'violations' and 'terminated' of every drone.
+    """
+    config = config or SimConfig.default()
+    telemetry = TelemetryWriter(telemetry_file, config) if telemetry_file else None
+    fleet = Fleet(len(lua_script_paths), start_positions, telemetry, config)
+    runners = []
+    scheduler = ScriptScheduler(lambda: fleet.sim_time, fleet.update, lambda: fleet.running.any())
+    try:
+        for drone, lua_script_path in zip(fleet.drones, lua_script_paths):
+            runner = LuaRunner(drone, lua_script_path=lua_script_path,
+                               script_globals={"DRONE_ID": drone.index + 1, "FLEET_SIZE": fleet.size})
+            runners.append(runner)
+            scheduler.add(runner, drone.end_flight)
+        scheduler.run()
+        for index in np.flatnonzero(fleet.running):
+            fleet.end_flight(index)
+    finally:
+        for runner in runners:
+            runner.close()
+        if telemetry is not None:
+            telemetry.close()
+
+    if config.COVERAGE_BACKEND == 'analytic':
+        coverage = AnalyticCoverage(config)
+        coverage.add_boundary_to_coverage_map_n(config.BOUNDARY_SHAPE, config.BOUNDARY_PARAMS)
+        for photos in fleet.photos:
+            coverage.add_photos_to_coverage_map_n(photos)
+    else:
+        coverage = fleet.coverage
+    violations = [dict(violation, drone=index + 1) for index, monitor in enumerate(fleet.monitors) for violation in monitor.violations]
+    return {
+        "flight_time": float(fleet.flight_times.max()),
+        "photo_count": sum(len(photos) for photos in fleet.photos),
+        "coverage": coverage.calculate_coverage_n(),
+        "overlap": coverage.calculate_overlap_n(),
+        "violations": sorted(violations, key=lambda violation: violation["time"]),
+        "target_reached": fleet.target_reached,
+        "drones": [{
+            "script": lua_script_path,
+            "flight_time": float(fleet.flight_times[index]),
+            "photo_count": len(fleet.photos[index]),
+            "violations": fleet.monitors[index].violations,
+            "terminated": describe_violation(fleet.terminations[index]) if fleet.terminations[index] is not None else None,
+        } for index, lua_script_path in enumerate(lua_script_paths)],
+    }
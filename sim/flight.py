@@ -1,25 +1,87 @@
 import numpy as np
 import time
-import settings
+from sim.config import SimConfig
 from sim.utils import custom_print
+from sim.boundary import get_boundary
+from sim.constraints import ConstraintMonitor, FlightTerminated, describe_violation
+from sim.coverage import Coverage, CoverageTargetReached
+from sim.trajectory import Trajectory, PhotoLog
 
 class DroneFlight:
     """
     A class to represent a drone flight simulation.
+
+    The velocity only changes when the flight parameters are adjusted, so the drone moves in a
+    straight line in between. The flight is integrated event-driven: each velocity change starts
+    a new segment, and the position at any time is computed in closed form from the segment start.
+    The path only records the segment vertices; uniform samples are generated on demand with sample_path.
+
+    Every update and parameter adjustment is checked by a ConstraintMonitor. Violations of a kind listed
+    in STOP_ON_VIOLATION end the flight at the time of the violation and raise FlightTerminated.
+
+    The raster coverage map of the flight is only allocated once it is needed: for COVERAGE_TARGET, a telemetry
+    log, the `get_coverage`/`get_overlap` API or the `coverage` attribute, e.g. to score or draw the flight. From
+    then on every photo is added to it, so the coverage and overlap are known during the flight. A photo that
+    brings the coverage to COVERAGE_TARGET ends the flight and raises CoverageTargetReached. The target is always
+    checked against the raster coverage, also with the analytic COVERAGE_BACKEND, which would have to integrate
+    all photos again after every photo; the two backends differ by about a percentage point.
     """
 
-    def __init__(self):
+    def __init__(self, headless: bool = False, telemetry=None, config=None):
         """
         Initialize the drone flight with default parameters.
+
+        Parameters:
+        headless (bool): If True, the flight time is taken from the simulated clock
+                         instead of the wall clock.
+        telemetry (TelemetryWriter, optional): Log to stream the API calls, photos and boundary events to.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
         """
+        self.config = config or SimConfig.default()
+        self.headless = headless
+        self.telemetry = telemetry
+        self.sim_time = 0.0
         self.position = np.array((0, 0), dtype=float)
         self.velocity = np.array([0, 0], dtype=float)
         self.yaw = 0
-        self.path = []
-        self.photos = []
+        self.path = Trajectory(min_spacing=self.config.PATH_MIN_SPACING, tolerance=self.config.PATH_SIMPLIFY_TOLERANCE)
+        self.photos = PhotoLog()
+        self.segment_start_time = 0.0
+        self.segment_start_position = self.position.copy()
+        self.path.append(self.sim_time, self.position[0], self.position[1], self.yaw)
         self.running = True
         self.start_time = time.time()
         self.flight_time = 0
+        self.boundary = get_boundary(self.config.BOUNDARY_SHAPE, self.config.BOUNDARY_PARAMS)
+        self.inside_boundary = self.boundary.contains_point(self.position)
+        self.monitor = ConstraintMonitor(self.boundary, self.config)
+        self.termination = None
+        self.live_coverage = None
+        self.target_reached = False
+        # A start outside the area is recorded, but doesn't end the flight before the script could react
+        self.report_violations(self.monitor.check_path(np.zeros(1), self.position[np.newaxis], np.array([self.inside_boundary]), True))
+
+    @property
+    def coverage(self) -> Coverage:
+        """
+        Coverage: The live raster coverage of the flight. It is created on first use with the photos taken so far.
+        """
+        if self.live_coverage is None:
+            self.live_coverage = Coverage(self.config)
+            self.live_coverage.add_boundary_to_coverage_map_n(self.config.BOUNDARY_SHAPE, self.config.BOUNDARY_PARAMS)
+            self.live_coverage.add_photos_to_coverage_map_n(self.photos)
+        return self.live_coverage
+
+    def log_event(self, event: str, **fields) -> None:
+        """
+        Write an event at the current simulated time to the telemetry log, if there is one.
+
+        Parameters:
+        event (str): The event name.
+        **fields: The event data.
+        """
+        if self.telemetry is not None:
+            self.telemetry.write(event, self.sim_time, **fields)
 
     def adjust_flight_parameters(self, xVelocity: float, yVelocity: float, yaw: float) -> None:
         """
@@ -30,35 +92,161 @@ class DroneFlight:
         yVelocity (float): The velocity in the y direction.
         yaw (float): The yaw angle adjustment.
         """
-        self.velocity = np.array([xVelocity, yVelocity], dtype=float)
+        self.start_segment(np.array([xVelocity, yVelocity], dtype=float))
         self.yaw += yaw
-        custom_print(f"Adjusted flight parameters to x_vel: {self.velocity[0]}, y_vel: {self.velocity[1]}, yaw: {self.yaw}")
+        self.log_event("adjust", x=self.position[0], y=self.position[1], vx=self.velocity[0], vy=self.velocity[1], yaw=self.yaw)
+        custom_print(f"Adjusted flight parameters to x_vel: {self.velocity[0]}, y_vel: {self.velocity[1]}, yaw: {self.yaw}", config=self.config)
+        violations = self.monitor.check_parameters(self.sim_time, self.position, self.velocity, yaw)
+        self.report_violations(violations)
+        stop = self.monitor.first_stop(violations)
+        if stop is not None:
+            self.terminate(stop)
+
+    def start_segment(self, velocity: np.ndarray) -> None:
+        """
+        Start a new straight flight segment with the given velocity at the current position.
+
+        Parameters:
+        velocity (np.ndarray): The velocity of the new segment.
+        """
+        self.path.append(self.sim_time, self.position[0], self.position[1], self.yaw)
+        self.segment_start_time = self.sim_time
+        self.segment_start_position = self.position.copy()
+        self.velocity = velocity
+
+    def position_at(self, sim_time: float) -> np.ndarray:
+        """
+        Compute the drone's position at a time within the current segment in closed form.
+
+        Parameters:
+        sim_time (float): The simulated time.
+
+        Returns:
+        np.ndarray: The position at that time.
+        """
+        return self.segment_start_position + self.velocity * (sim_time - self.segment_start_time)
 
     def update(self, delta_time: float) -> None:
         """
-        Update the drone's position based on the velocity and time elapsed.
+        Advance the simulated time and update the drone's position.
+        The position is computed in closed form, so the result does not depend on the step size.
 
         Parameters:
         delta_time (float): The time elapsed since the last update.
         """
-        self.position += self.velocity * delta_time
-        self.path.append(tuple(self.position.copy()))
+        previous_time = self.sim_time
+        self.sim_time += delta_time
+        self.position = self.position_at(self.sim_time)
+        self.check_constraints(previous_time)
+
+    def check_constraints(self, previous_time: float) -> None:
+        """
+        Check the flight since the previous update against the boundary and the flight duration,
+        and log every time the drone left or re-entered the boundary.
+        The segment is checked at the path sample step, all samples at once.
+
+        Parameters:
+        previous_time (float): The simulated time of the previous update.
+        """
+        sample_times = np.append(np.arange(previous_time, self.sim_time, self.config.PATH_SAMPLE_STEP)[1:], self.sim_time)
+        positions = self.segment_start_position + self.velocity * (sample_times - self.segment_start_time)[:, np.newaxis]
+        inside = self.boundary.contains(positions)
+        violations, stop, count = self.monitor.check_update(previous_time, self.sim_time, sample_times, positions,
+                                                            inside, self.inside_boundary, self.position_at)
+        end_time = stop["time"] if stop is not None else self.sim_time
+        sample_times, positions, inside = sample_times[:count], positions[:count], inside[:count]
+
+        if self.telemetry is not None:
+            previous = np.concatenate(([self.inside_boundary], inside[:-1]))
+            for i in np.flatnonzero((inside != previous) & (sample_times <= end_time)):
+                self.telemetry.write("boundary", float(sample_times[i]), x=positions[i, 0], y=positions[i, 1], inside=bool(inside[i]))
+        if len(inside):
+            self.inside_boundary = bool(inside[-1])
+        self.report_violations(violations)
+        if stop is not None:
+            self.terminate(stop)
+
+    def report_violations(self, violations: list) -> None:
+        """
+        Log and print new constraint violations.
+
+        Parameters:
+        violations (list): The violations, see ConstraintMonitor.
+        """
+        for violation in violations:
+            if self.telemetry is not None:
+                self.telemetry.write("violation", violation["time"], **{k: v for k, v in violation.items() if k != "time"})
+            custom_print(f"Constraint violation: {describe_violation(violation)}", config=self.config)
+
+    def terminate(self, violation: dict) -> None:
+        """
+        End the flight at the time of a violation and stop the script.
+
+        Parameters:
+        violation (dict): The violation that ends the flight.
+
+        Raises:
+        FlightTerminated: Always, so the running Lua script is aborted.
+        """
+        if violation["time"] < self.sim_time:
+            self.sim_time = violation["time"]
+            self.position = self.position_at(self.sim_time)
+            self.inside_boundary = self.boundary.contains_point(self.position)
+        self.monitor.discard_after(self.sim_time)
+        self.termination = violation
+        self.end_flight()
+        raise FlightTerminated(violation)
+
+    def sample_path(self, step: float) -> np.ndarray:
+        """
+        Generate path samples at a fixed time step from the recorded segment vertices.
+
+        Parameters:
+        step (float): The simulated time between two samples.
+
+        Returns:
+        np.ndarray: The sampled positions as an (n, 2) array, ending at the current position.
+        """
+        times = np.append(self.path.times, self.sim_time)
+        points = np.vstack((self.path.points, self.position))
+        sample_times = np.append(np.arange(times[0], self.sim_time, step), self.sim_time)
+        return np.column_stack((np.interp(sample_times, times, points[:, 0]),
+                                np.interp(sample_times, times, points[:, 1])))
 
     def take_photo(self) -> None:
         """
-        Simulate taking a photo at the drone's current position.
+        Simulate taking a photo at the drone's current position and update the live coverage, if it is in use.
+
+        Raises:
+        CoverageTargetReached: If the photo brought the coverage to COVERAGE_TARGET. The flight is ended first.
         """
-        custom_print(f"Photo taken at ({self.position[0]}, {self.position[1]})")
-        self.photos.append([tuple(self.position.copy()), self.yaw])
+        custom_print(f"Photo taken at ({self.position[0]}, {self.position[1]})", config=self.config)
+        self.photos.append(self.sim_time, self.position[0], self.position[1], self.yaw)
+        target = self.config.COVERAGE_TARGET
+        if self.live_coverage is not None:
+            self.live_coverage.add_photo_to_coverage_map_n(self.position[0], self.position[1], self.yaw)
+        elif self.telemetry is None and target is None:
+            return
+        coverage = self.coverage.coverage_percentage()
+        self.log_event("photo", x=self.position[0], y=self.position[1], yaw=self.yaw,
+                       coverage=coverage, overlap=self.coverage.overlap_percentage())
+        if target is not None and coverage >= target:
+            self.target_reached = True
+            self.end_flight()
+            raise CoverageTargetReached(coverage)
 
     def end_flight(self) -> None:
         """
         End the drone flight and calculate the total flight time.
         """
-        self.velocity = np.array([0, 0])
+        self.start_segment(np.array([0, 0], dtype=float))
         self.running = False
-        self.flight_time = (time.time() - self.start_time) * settings.SIMULATION_SPEED
-        custom_print("Ended flight")
+        if self.headless:
+            self.flight_time = self.sim_time
+        else:
+            self.flight_time = (time.time() - self.start_time) * self.config.SIMULATION_SPEED
+        self.log_event("end", x=self.position[0], y=self.position[1], flight_time=self.flight_time)
+        custom_print("Ended flight", config=self.config)
 
     def get_distance_to_origin(self) -> float:
         """
@@ -68,7 +256,8 @@ class DroneFlight:
         float: The distance to the origin.
         """
         distance = np.linalg.norm(self.position)
-        custom_print("Got distance to origin:", distance)
+        self.log_event("query", name="get_distance_to_origin", value=distance)
+        custom_print("Got distance to origin:", distance, config=self.config)
         return distance
     
     def get_x_coordinate(self) -> float:
@@ -78,7 +267,8 @@ class DroneFlight:
         Returns:
         float: The x coordinate.
         """
-        custom_print("Got 'x' coordinate:", self.position[0])
+        self.log_event("query", name="get_x_coordinate", value=self.position[0])
+        custom_print("Got 'x' coordinate:", self.position[0], config=self.config)
         return self.position[0]
 
     def get_y_coordinate(self) -> float:
@@ -88,7 +278,8 @@ class DroneFlight:
         Returns:
         float: The y coordinate.
         """
-        custom_print("Got 'y' coordinate:", self.position[1])
+        self.log_event("query", name="get_y_coordinate", value=self.position[1])
+        custom_print("Got 'y' coordinate:", self.position[1], config=self.config)
         return self.position[1]
     
     def get_compass_heading(self) -> float:
@@ -98,5 +289,30 @@ class DroneFlight:
         Returns:
         float: The compass heading.
         """
-        custom_print("compass heading:", self.yaw)
+        self.log_event("query", name="get_compass_heading", value=self.yaw)
+        custom_print("compass heading:", self.yaw, config=self.config)
         return self.yaw if -180 <= self.yaw <= 180 else 200
+
+    def get_coverage(self) -> float:
+        """
+        Get the percentage of the area covered by the photos taken so far.
+
+        Returns:
+        float: The coverage percentage.
+        """
+        coverage = self.coverage.coverage_percentage()
+        self.log_event("query", name="get_coverage", value=coverage)
+        custom_print("Got coverage:", coverage, config=self.config)
+        return coverage
+
+    def get_overlap(self) -> float:
+        """
+        Get the percentage of the covered area with more than one photo so far.
+
+        Returns:
+        float: The overlap percentage.
+        """
+        overlap = self.coverage.overlap_percentage()
+        self.log_event("query", name="get_overlap", value=overlap)
+        custom_print("Got overlap:", overlap, config=self.config)
+        return overlap
@@ -0,0 +1,91 @@
+from sim.config import SimConfig
+from sim.flight import DroneFlight
+from sim.coverage import CoverageTargetReached
+from sim.analytic_coverage import AnalyticCoverage
+from sim.constraints import FlightTerminated, describe_violation
+from sim.telemetry import TelemetryWriter
+from tools.lua_runner import LuaRunner
+from tools.sandbox import SandboxedLuaRunner
+from tools.profiler import profile_phase
+
+def run_headless(lua_script_path: str = None, telemetry_file: str = None, sandboxed: bool = False,
+                 runtime_pool=None, config: SimConfig = None, script_globals: dict = None, profiler=None,
+                 image_file: str = None, image_width: int = None) -> dict:
+    """
+    Runs a Lua script against a drone flight on a simulated clock, without a window.
+
+    Every pause advances the flight in a single closed-form step, so the results only depend
+    on the script and the configuration, not on the machine load. A flight ended early by a
+    violation in STOP_ON_VIOLATION is scored up to the time it was ended, and a flight that reached
+    COVERAGE_TARGET up to the photo that reached it. The raster coverage is the live coverage of the
+    flight, built from its photos after the flight unless the flight already needed it.
+
+    Args:
+        lua_script_path (str, optional): Path to the Lua script. Defaults to config.LUA_SCRIPT_PATH.
+        telemetry_file (str, optional): Path to stream a telemetry log of the run to. Defaults to None.
+        sandboxed (bool): If True, run the script in a SandboxedLuaRunner with the budgets from the configuration.
+                          Exceeding a budget raises ScriptBudgetExceeded. Defaults to False.
+        runtime_pool (LuaRuntimePool, optional): A pool to take a warm Lua runtime from, and return it to afterwards.
+                                                 Defaults to None, which creates a fresh runtime.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        script_globals (dict, optional): Lua globals overriding the script's constants, see LuaRunner. Defaults to None.
+        profiler (Profiler, optional): A profiler measuring the setup, the script, the flight updates, the Lua API
+                                       calls and the coverage calculation. Defaults to None.
+        image_file (str, optional): Path to save an image of the result to, rendered offscreen with the heatmap,
+                                    the colorbar and the flight path, see render_result. Defaults to None.
+        image_width (int, optional): Scale the image to this width in pixels. Defaults to None, which keeps the screen size.
+
+    Returns:
+        dict: The flight results with the keys 'flight_time', 'photo_count', 'coverage', 'overlap',
+              'boundary_violations', 'violations' (all constraint violations, see ConstraintMonitor),
+              'terminated' (a description of the violation that ended the flight, or None) and
+              'target_reached' (whether the flight was ended by reaching COVERAGE_TARGET).
+    """
+    config = config or SimConfig.default()
+    telemetry = TelemetryWriter(telemetry_file, config) if telemetry_file else None
+    flight = DroneFlight(headless=True, telemetry=telemetry, config=config)
+    lua_runner = None
+    try:
+        runner_class = SandboxedLuaRunner if sandboxed else LuaRunner
+        with profile_phase(profiler, "setup"):
+            lua_runner = runner_class(flight, lua_script_path=lua_script_path, runtime_pool=runtime_pool,
+                                      script_globals=script_globals)
+        if profiler is not None:
+            profiler.instrument(flight, "update")
+            profiler.instrument_runner(lua_runner)
+        try:
+            with profile_phase(profiler, "lua"):
+                lua_runner.execute()
+        except (FlightTerminated, CoverageTargetReached):
+            pass
+        if flight.running:
+            flight.end_flight()
+    finally:
+        if lua_runner is not None:
+            lua_runner.close()
+        if telemetry is not None:
+            telemetry.close()
+
+    with profile_phase(profiler, "coverage"):
+        if config.COVERAGE_BACKEND == 'analytic':
+            coverage = AnalyticCoverage(config)
+            coverage.add_boundary_to_coverage_map_n(config.BOUNDARY_SHAPE, config.BOUNDARY_PARAMS)
+            coverage.add_photos_to_coverage_map_n(flight.photos)
+        else:
+            coverage = flight.coverage
+        coverage_percentage = coverage.calculate_coverage_n()
+        overlap_percentage = coverage.calculate_overlap_n()
+    if image_file is not None:
+        from tools.export import render_result  # Loads pygame, runs without an image don't need it
+        with profile_phase(profiler, "image"):
+            render_result(flight, image_file, width=image_width)
+    return {
+        "flight_time": flight.flight_time,
+        "photo_count": len(flight.photos),
+        "coverage": coverage_percentage,
+        "overlap": overlap_percentage,
+        "boundary_violations": len(flight.monitor.violations_of("boundary")),
+        "violations": flight.monitor.violations,
+        "terminated": describe_violation(flight.termination) if flight.termination is not None else None,
+        "target_reached": flight.target_reached,
+    }
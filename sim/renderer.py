@@ -1,7 +1,13 @@
 import pygame
-import settings
-from sim.utils import value_to_color, to_screen_coords
-from sim.coverage import Coverage
+import numpy as np
+from sim.config import SimConfig
+from sim.utils import values_to_colors, to_screen_coords
+from sim.boundary import CircleBoundary, get_boundary
+from sim.camera import photo_footprint, rotate_footprint
+from sim.snapshot import SnapshotPublisher
+
+PATH_LAYER_COLORKEY = (255, 0, 255)
+METRICS_POSITION = (10, 10)  # Screen position of the live coverage and overlap
 
 class DroneRenderer:
     """
@@ -9,98 +15,196 @@ class DroneRenderer:
     
     Attributes:
         flight (DroneFlight): The flight object controlling the drone, containing photos, path, and position.
-        screen: The Pygame display surface.
-        boundary_shape: The shape of the boundary (circle or rectangle).
+        screen: The Pygame display surface, or a plain surface when offscreen.
+        offscreen: Whether the renderer draws without a window, e.g. to export images.
+        boundary_shape: The shape of the boundary (circle, rectangle, polygon or multipolygon).
         boundary_params: The parameters defining the boundary.
-        coverage: The coverage object to calculate coverage and overlap.
+        boundary: The boundary object built from the shape and parameters.
+        boundary_surface: The pre-drawn boundary, blitted on every frame.
+        photo_layer: The accumulated photos, only new photos are drawn onto it.
+        path_layer: The accumulated path, only new path segments are drawn onto it.
+        metrics_surface: The rendered live coverage and overlap of the flight, re-rendered after new photos.
+        publisher: Takes the snapshots of the flight drawn by `draw` when it isn't given one.
+        config: The simulation configuration.
     """
-    def __init__(self, flight):
+    def __init__(self, flight, boundary_shape: str = None, boundary_params: dict = None, config=None, offscreen: bool = False):
         """
         Initializes the DroneRenderer with flight data and Pygame settings.
         
         Args:
             flight (DroneFlight): The flight object controlling the drone, containing photos, path, and position.
+            boundary_shape (str, optional): The shape of the boundary. Defaults to config.BOUNDARY_SHAPE.
+            boundary_params (dict, optional): The parameters defining the boundary. Defaults to config.BOUNDARY_PARAMS.
+            config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+            offscreen (bool, optional): Draw onto a surface in memory instead of a window, so no display is needed.
+                                        Defaults to False.
+        """
+        self.config = config or SimConfig.default()
+        self.offscreen = offscreen
+        if offscreen:
+            self.screen = pygame.Surface((self.config.WIDTH, self.config.HEIGHT))
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.config.WIDTH, self.config.HEIGHT))
+            pygame.display.set_caption("Drone Simulation")
+        self.boundary_shape = boundary_shape or self.config.BOUNDARY_SHAPE
+        self.boundary_params = boundary_params or self.config.BOUNDARY_PARAMS
+        self.boundary = get_boundary(self.boundary_shape, self.boundary_params)
+        self.boundary_surface = pygame.Surface((self.config.WIDTH, self.config.HEIGHT), pygame.SRCALPHA)
+        if isinstance(self.boundary, CircleBoundary):
+            self.draw_circle_boundary(self.boundary_surface)
+        else:
+            self.draw_polygon_boundary(self.boundary_surface)
+        self.boundary_rect = self.boundary_surface.get_bounding_rect()
+
+        # Persistent layers, drawn incrementally and recomposed only where they changed
+        self.footprint = photo_footprint(self.config)
+        self.photo_layer = pygame.Surface((self.config.WIDTH, self.config.HEIGHT), pygame.SRCALPHA)
+        self.path_layer = pygame.Surface((self.config.WIDTH, self.config.HEIGHT))
+        self.path_layer.set_colorkey(PATH_LAYER_COLORKEY)
+        pygame.font.init()
+        self.font = pygame.font.SysFont("Arial", 20)
+        self.reset(flight)
+
+    def reset(self, flight) -> None:
+        """
+        Clears the photo and path layers and starts rendering the given flight from scratch.
+
+        Args:
+            flight (DroneFlight): The flight object to render.
         """
         self.flight = flight
-        pygame.init()
-        self.screen = pygame.display.set_mode((settings.WIDTH, settings.HEIGHT))
-        pygame.display.set_caption("Drone Simulation")
-        self.boundary_shape = settings.BOUNDARY_SHAPE
-        self.boundary_params = settings.BOUNDARY_PARAMS
-        self.coverage = Coverage()
+        self.publisher = SnapshotPublisher(flight)
+        self.photo_layer.fill((0, 0, 0, 0))
+        self.path_layer.fill(PATH_LAYER_COLORKEY)
+        self.path_position = tuple(self.flight.position)
+        self.drone_rect = pygame.Rect(0, 0, 0, 0)
+        self.metrics_surface = None
+        self.metrics_rect = pygame.Rect(METRICS_POSITION, (0, 0))
+        self.metrics_photos = None
+        self.full_redraw = True
     
-    def draw(self) -> None:
+    def draw(self, snapshot=None) -> None:
+        """
+        Draws the simulation including photos, path, drone, boundary and the live coverage.
+        Only new photos and path points are added to their layers, and only the changed
+        parts of the screen are recomposed and updated.
+
+        Args:
+            snapshot (FlightSnapshot, optional): The state to draw, published by the thread running the flight.
+                                                 Defaults to None, which takes a snapshot of the flight now.
         """
-        Draws the entire simulation including photos, path, drone, and boundary.
+        if snapshot is None:
+            snapshot = self.publisher.take()
+        drone_rect = pygame.Rect(0, 0, 3, 3)
+        drone_rect.center = to_screen_coords(snapshot.position, self.config)
+        dirty = self.draw_photos(snapshot) + self.draw_path(snapshot) + self.draw_metrics(snapshot) + [self.drone_rect, drone_rect]
+        if self.full_redraw:
+            dirty = [self.screen.get_rect()]
+            self.full_redraw = False
+        for rect in dirty:
+            self.screen.fill(self.config.BACKGROUND_COLOR, rect)
+            self.screen.blit(self.photo_layer, rect.topleft, rect)
+            self.screen.blit(self.path_layer, rect.topleft, rect)
+        self.draw_drone(snapshot.position)
+        for rect in dirty:
+            self.draw_boundary(rect)
+        self.screen.blit(self.metrics_surface, self.metrics_rect)
+        self.drone_rect = drone_rect
+        if not self.offscreen:
+            pygame.display.update(dirty)
+
+    def draw_photos(self, snapshot) -> list:
         """
-        self.screen.fill(settings.BACKGROUND_COLOR)
-        self.draw_photos()
-        self.draw_path()
-        self.draw_drone()
-        self.draw_boundary()
-        pygame.display.update()
+        Draws the photos taken since the last frame onto the photo layer.
+
+        Args:
+            snapshot (FlightSnapshot): The drawn state, with the new photos.
 
-    def draw_photos(self) -> None:
+        Returns:
+            list: The screen areas changed by the new photos.
         """
-        Draws the photos taken by the drone on the screen.
+        if len(snapshot.photos) == 0:
+            return []
+        polygons = rotate_footprint(self.footprint, snapshot.photos[:, 2]) + snapshot.photos[:, np.newaxis, :2]
+        rects = [pygame.draw.polygon(self.photo_layer, self.config.PHOTO_COLOR, [to_screen_coords(corner, self.config) for corner in polygon])
+                 for polygon in polygons]
+        return [rects[0].unionall(rects[1:])]
+
+    def draw_metrics(self, snapshot) -> list:
+        """
+        Renders the live coverage and overlap of the flight when photos were added since the last frame.
+
+        Args:
+            snapshot (FlightSnapshot): The drawn state, with the live coverage and overlap.
+
+        Returns:
+            list: The screen area of the old and the new text, if it changed.
         """
-        for photo in self.flight.photos:
-            surf = pygame.Surface((settings.PHOTO_SIZE, settings.PHOTO_SIZE), pygame.SRCALPHA)
-            pygame.draw.rect(surf, settings.PHOTO_COLOR, (0, 0, settings.PHOTO_SIZE, settings.PHOTO_SIZE))
-            rot_surf = pygame.transform.rotate(surf, photo[1] * -1)
-            rot_rect = rot_surf.get_rect(center=to_screen_coords(photo[0]))
-            self.screen.blit(rot_surf, rot_rect.topleft)
+        if self.metrics_photos == snapshot.photo_count:
+            return []
+        self.metrics_photos = snapshot.photo_count
+        text = f"Coverage: {snapshot.coverage:.1f}%  Overlap: {snapshot.overlap:.1f}%"
+        self.metrics_surface = self.font.render(text, True, (0, 0, 0))
+        rect = self.metrics_surface.get_rect(topleft=METRICS_POSITION)
+        dirty = [self.metrics_rect.union(rect)]
+        self.metrics_rect = rect
+        return dirty
 
-    def draw_path(self) -> None:
+    def draw_path(self, snapshot) -> list:
         """
-        Draws the path of the drone on the screen.
+        Extends the path on the path layer from the last drawn position, through the segment
+        vertices recorded since the last frame, to the current position.
+
+        Args:
+            snapshot (FlightSnapshot): The drawn state, with the new path vertices.
+
+        Returns:
+            list: The screen areas changed by the new path segments.
         """
-        for point in self.flight.path:
-            pygame.draw.circle(self.screen, settings.PATH_COLOR, to_screen_coords(point), 1)
+        points = [to_screen_coords(point, self.config) for point in [self.path_position] + snapshot.path.tolist() + [snapshot.position]]
+        self.path_position = snapshot.position
+        return [pygame.draw.lines(self.path_layer, self.config.PATH_COLOR, False, points, 3)]
 
-    def draw_drone(self) -> None:
+    def draw_drone(self, position) -> None:
         """
         Draws the current position of the drone on the screen.
+
+        Args:
+            position: The position (x, y) of the drone.
         """
-        pygame.draw.circle(self.screen, (0, 0, 0), to_screen_coords(self.flight.position), 1)
+        pygame.draw.circle(self.screen, (0, 0, 0), to_screen_coords(position, self.config), 1)
 
-    def draw_boundary(self) -> None:
+    def draw_boundary(self, rect=None) -> None:
         """
-        Draws the boundary of the simulation area on the screen.
+        Draws the pre-drawn boundary of the simulation area on the screen.
+
+        Args:
+            rect (pygame.Rect, optional): Only redraw the boundary inside this screen area. Defaults to None.
         """
-        if self.boundary_shape == 'circle':
-            self.draw_circle_boundary()
-        elif self.boundary_shape == 'rectangle':
-            self.draw_rectangle_boundary()
+        area = self.boundary_rect.clip(rect) if rect is not None else self.boundary_rect
+        if area.width and area.height:
+            self.screen.blit(self.boundary_surface, area.topleft, area)
 
-    def draw_circle_boundary(self) -> None:
+    def draw_circle_boundary(self, surface) -> None:
         """
-        Draws a circular boundary on the screen and updates the coverage map.
+        Draws a circular boundary on the given surface.
+
+        Args:
+            surface: The Pygame surface to draw on.
         """
-        circle_center = to_screen_coords((self.boundary_params.get('x'), self.boundary_params.get('y')))
-        circle_radius = self.boundary_params.get('radius')
-        pygame.draw.circle(self.screen, (255, 0, 0), circle_center, circle_radius, 1)
-        self.coverage.add_circle_boundary_to_coverage_map_n(self.boundary_params.get('x'),
-                                                       self.boundary_params.get('y'),
-                                                       circle_radius)
+        circle_center = to_screen_coords((self.boundary.x, self.boundary.y), self.config)
+        pygame.draw.circle(surface, (255, 0, 0), circle_center, self.boundary.radius, 1)
         
-    def draw_rectangle_boundary(self) -> None:
-        """
-        Draws a rectangular boundary on the screen and updates the coverage map.
-        """
-        rectangle_vertices = [
-            self.boundary_params.get('v1'),
-            self.boundary_params.get('v2'),
-            self.boundary_params.get('v3'),
-            self.boundary_params.get('v4')
-        ]
-        screen_rect_vertices = [to_screen_coords(v) for v in rectangle_vertices]
-        min_x = min(v[0] for v in screen_rect_vertices)
-        max_y = max(v[1] for v in screen_rect_vertices)
-        max_x = max(v[0] for v in screen_rect_vertices)
-        min_y = min(v[1] for v in screen_rect_vertices)
-        pygame.draw.rect(self.screen, (255, 0, 0), (min_x, min_y, (max_x - min_x), (max_y - min_y)), 1)
-        self.coverage.add_rectangle_boundary_to_coverage_map_n(min_x, max_x, min_y, max_y)
+    def draw_polygon_boundary(self, surface) -> None:
+        """
+        Draws the rings of a polygon boundary, including holes, on the given surface.
+
+        Args:
+            surface: The Pygame surface to draw on.
+        """
+        for ring in self.boundary.rings:
+            pygame.draw.polygon(surface, (255, 0, 0), [to_screen_coords(v, self.config) for v in ring], 1)
 
     def draw_colorbar(self, x: int, y: int, width: int, height: int, min_val: int = 1, max_val: int = 10, cmap_name: str = "plasma") -> None:
         """
@@ -115,29 +219,40 @@ class DroneRenderer:
             max_val: The maximum value of the colorbar.
             cmap_name: The name of the colormap to use.
         """
-        pygame.font.init()
-        title = pygame.font.SysFont("Arial", 20).render("Image count", True, (0, 0, 0))
+        title = self.font.render("Image count", True, (0, 0, 0))
         self.screen.blit(title, (x, y - 25))
-        ten = pygame.font.SysFont("Arial", 20).render(" - 10", True, (0, 0, 0))
+        ten = self.font.render(" - 10", True, (0, 0, 0))
         self.screen.blit(ten, (x + width, y))
-        one = pygame.font.SysFont("Arial", 20).render(" - 1", True, (0, 0, 0))
+        one = self.font.render(" - 1", True, (0, 0, 0))
         self.screen.blit(one, (x + width, y + height - 20))
-        for j in range(height):
-            value = min_val + ((height - j) / height) * (max_val - min_val)
-            color = value_to_color(value, cmap_name)
-            pygame.draw.line(self.screen, color, (x, y + j), (x + width, y + j))
+        values = min_val + ((height - np.arange(height)) / height) * (max_val - min_val)
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        pixels[x:x + width + 1, y:y + height] = values_to_colors(values, cmap_name)[np.newaxis, :, :3]
+        del pixels
+
+    def draw_result(self) -> None:
+        """
+        Draws the result of the flight over the last frame: the colorbar, the coverage heatmap and the whole flight path.
+        """
+        self.draw_colorbar(50, int(self.config.HEIGHT / 4), 50, int(self.config.HEIGHT / 2))
+        self.flight.coverage.calculate_coverage_n(self.screen)
+        path_points = [to_screen_coords(point, self.config) for point in self.flight.path]
+        if len(path_points) > 1:
+            pygame.draw.lines(self.screen, self.config.PATH_COLOR, False, path_points, 3)
+        if not self.offscreen:
+            pygame.display.update()
 
     def print_info(self) -> None:
         """
-        Prints the flight information and calculates coverage and overlap.
+        Prints the flight information. The coverage and overlap are the live values of the flight,
+        which already contain every photo.
         """
         minutes = int(self.flight.flight_time // 60)
         seconds = int(self.flight.flight_time % 60)
         print("\n################################\n")
         print(f"Total flight time: {minutes} Minutes, {seconds} Seconds")
-        self.coverage.add_photos_to_coverage_map_n(self.flight.photos)
-        self.coverage.calculate_coverage_n(self.screen)
-        self.coverage.calculate_overlap_n()
+        print(f"Coverage: {self.flight.coverage.calculate_coverage_n()}%")
+        print(f"Overlap: {self.flight.coverage.calculate_overlap_n()}%")
         print("\n################################\n")
 
     def wait_for_exit(self) -> None:
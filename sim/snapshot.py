@@ -0,0 +1,138 @@
+import threading
+from typing import NamedTuple
+import numpy as np
+
+"""
+This file is used to hand the state of a running flight to a renderer in another thread, as immutable snapshots.
+"""
+
+def frozen(array: np.ndarray) -> np.ndarray:
+    """
+    Makes an array read-only.
+
+    Args:
+        array (np.ndarray): The array, which must not be a view of an array still being written.
+
+    Returns:
+        np.ndarray: The read-only array.
+    """
+    array.flags.writeable = False
+    return array
+
+class FlightSnapshot(NamedTuple):
+    """
+    An immutable view of a flight at one simulated time.
+
+    The photos and path are append-only, so a snapshot only carries what was added since the previous
+    snapshot, and a renderer draws it onto its persistent layers. Snapshots that were never drawn are
+    merged into the next one, so dropping a frame never loses a photo or a path segment.
+
+    Attributes:
+        sim_time (float): The simulated time.
+        position (tuple): The position (x, y) of the drone.
+        photos (np.ndarray): The new photos as a read-only (n, 3) array of x, y and yaw.
+        path (np.ndarray): The new path vertices as a read-only (n, 2) array of x and y.
+        photo_count (int): The number of photos taken so far.
+        coverage (float): The live coverage percentage.
+        overlap (float): The live overlap percentage.
+    """
+    sim_time: float
+    position: tuple
+    photos: np.ndarray
+    path: np.ndarray
+    photo_count: int
+    coverage: float
+    overlap: float
+
+    def merge(self, newer: "FlightSnapshot") -> "FlightSnapshot":
+        """
+        Combines this snapshot with the following one, for a renderer that skipped this one.
+
+        Args:
+            newer (FlightSnapshot): The snapshot taken after this one.
+
+        Returns:
+            FlightSnapshot: The newer snapshot with the photos and path vertices of both.
+        """
+        return newer._replace(photos=frozen(np.concatenate((self.photos, newer.photos))),
+                              path=frozen(np.concatenate((self.path, newer.path))))
+
+class SnapshotPublisher:
+    """
+    Takes snapshots of a flight, each with the photos and path vertices added since the previous one.
+
+    Attributes:
+        flight (DroneFlight): The flight, or any object with the same position, photos, path and coverage.
+        photos_taken (int): The number of photos in earlier snapshots.
+        path_taken (int): The number of path vertices in earlier snapshots.
+    """
+    def __init__(self, flight):
+        """
+        Initializes a publisher whose first snapshot contains every photo and path vertex of the flight.
+
+        Args:
+            flight (DroneFlight): The flight.
+        """
+        self.flight = flight
+        self.photos_taken = 0
+        self.path_taken = 0
+
+    def take(self) -> FlightSnapshot:
+        """
+        Takes a snapshot of the flight. Must be called in the thread running the flight.
+
+        Returns:
+            FlightSnapshot: The snapshot.
+        """
+        flight = self.flight
+        photos = flight.photos.data[self.photos_taken:, 1:].copy()
+        self.photos_taken += len(photos)
+        new_vertices = flight.path.count - self.path_taken
+        path = flight.path[-new_vertices:].copy() if new_vertices > 0 else np.empty((0, 2))
+        self.path_taken = flight.path.count
+        return FlightSnapshot(flight.sim_time, tuple(flight.position.tolist()), frozen(photos), frozen(path),
+                              self.photos_taken, flight.coverage.coverage_percentage(), flight.coverage.overlap_percentage())
+
+class SnapshotChannel:
+    """
+    Hands snapshots from the simulation thread to the rendering thread. Only the latest snapshot is kept:
+    a snapshot published before the previous one was taken is merged with it and counted as a dropped frame,
+    so the simulation never waits for the renderer.
+
+    Attributes:
+        published (int): The number of published snapshots.
+        dropped (int): The number of snapshots merged into a later one instead of being drawn.
+    """
+    def __init__(self):
+        """
+        Initializes an empty channel.
+        """
+        self.lock = threading.Lock()
+        self.latest = None
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, snapshot: FlightSnapshot) -> None:
+        """
+        Publishes a snapshot.
+
+        Args:
+            snapshot (FlightSnapshot): The snapshot.
+        """
+        with self.lock:
+            if self.latest is not None:
+                snapshot = self.latest.merge(snapshot)
+                self.dropped += 1
+            self.latest = snapshot
+            self.published += 1
+
+    def take(self):
+        """
+        Takes the latest snapshot.
+
+        Returns:
+            FlightSnapshot: The snapshot, or None if nothing was published since the last call.
+        """
+        with self.lock:
+            snapshot, self.latest = self.latest, None
+        return snapshot
@@ -0,0 +1,60 @@
+import json
+from sim.config import SimConfig
+
+# The settings that determine the photo footprint
+CAMERA_SETTINGS = ("FLIGHT_HEIGHT", "CAMERA_FOV", "GIMBAL_ANGLE", "CAMERA_ASPECT_RATIO")
+
+class TelemetryWriter:
+    """
+    Class to stream a line-delimited JSON telemetry log of a flight to disk.
+
+    Every line is one record with the simulated time 't', the event name 'event' and the event fields.
+    The file is line buffered, so the log is complete up to the last event even if the run is aborted.
+    The first record ('start') describes the flight area and the camera, so a log can be replayed on its own.
+    """
+
+    def __init__(self, path: str, config=None):
+        """
+        Opens the telemetry log and writes the start record.
+
+        Args:
+            path (str): The path of the log file.
+            config (SimConfig, optional): The configuration of the logged flight. Defaults to SimConfig.default().
+        """
+        config = config or SimConfig.default()
+        self.path = path
+        self.file = open(path, "w", buffering=1)
+        self.write("start", 0.0, boundary_shape=config.BOUNDARY_SHAPE, boundary_params=config.BOUNDARY_PARAMS,
+                   camera={name: getattr(config, name) for name in CAMERA_SETTINGS})
+
+    def write(self, event: str, time: float, **fields) -> None:
+        """
+        Writes a single record.
+
+        Args:
+            event (str): The event name, e.g. 'adjust', 'photo', 'pause', 'query', 'boundary' or 'end'.
+            time (float): The simulated time of the event in seconds.
+            **fields: The event data, must be JSON serializable.
+        """
+        record = {"t": time, "event": event}
+        record.update(fields)
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        """
+        Closes the log file.
+        """
+        self.file.close()
+
+def read_telemetry(path: str) -> list:
+    """
+    Reads all records of a telemetry log.
+
+    Args:
+        path (str): The path of the log file.
+
+    Returns:
+        list: The records as dictionaries, in the order they were written.
+    """
+    with open(path, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
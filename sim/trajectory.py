@@ -0,0 +1,271 @@
+import numpy as np
+
+class RecordBuffer:
+    """
+    A growable, preallocated buffer of fixed-width float records.
+    The capacity doubles when the buffer is full, so appending is amortized O(1)
+    and no Python object is allocated per record.
+
+    Attributes:
+        columns (tuple): The names of the record columns.
+    """
+    columns = ()
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initializes an empty buffer.
+
+        Args:
+            capacity (int): The number of records to preallocate. Defaults to 1024.
+        """
+        self._data = np.empty((max(capacity, 1), len(self.columns)))
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        np.ndarray: A view of the stored records with one column per entry in `columns`.
+        """
+        return self._data[:self._size]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a view of a single column.
+
+        Args:
+            name (str): The column name.
+
+        Returns:
+            np.ndarray: The column values of all stored records.
+        """
+        return self._data[:self._size, self.columns.index(name)]
+
+    def append(self, *record: float) -> None:
+        """
+        Appends a record, growing the buffer if it is full.
+
+        Args:
+            *record (float): One value per column.
+        """
+        if self._size == len(self._data):
+            self._grow()
+        self._data[self._size] = record
+        self._size += 1
+
+    def _grow(self) -> None:
+        """
+        Doubles the capacity of the buffer.
+        """
+        data = np.empty((2 * len(self._data), len(self.columns)))
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    @property
+    def nbytes(self) -> int:
+        """
+        int: The memory allocated by the buffer in bytes.
+        """
+        return self._data.nbytes
+
+class Trajectory(RecordBuffer):
+    """
+    The recorded flight path with the columns time, x, y and yaw.
+
+    The path kept in memory can be decimated: a point closer than `min_spacing` meters
+    to the last recorded point is dropped, and when the buffer is full it is first simplified
+    with the Ramer-Douglas-Peucker algorithm using `tolerance` meters before it grows. Only the
+    points recorded since the previous simplification are simplified, starting at its last kept
+    point, so every recorded point stays within `tolerance` of the path however long the flight.
+
+    Attributes:
+        min_spacing (float): The minimum distance between recorded points, 0 keeps every point.
+        tolerance (float): The simplification tolerance, 0 disables the simplification.
+        count (int): The number of points recorded so far, including points removed by the simplification.
+        simplified (int): The number of leading points that were already simplified and are kept for good.
+    """
+    columns = ("time", "x", "y", "yaw")
+
+    def __init__(self, capacity: int = 1024, min_spacing: float = 0.0, tolerance: float = 0.0):
+        """
+        Initializes an empty trajectory.
+
+        Args:
+            capacity (int): The number of points to preallocate. Defaults to 1024.
+            min_spacing (float): The minimum distance between recorded points. Defaults to 0.
+            tolerance (float): The simplification tolerance. Defaults to 0.
+        """
+        super().__init__(capacity)
+        self.min_spacing = min_spacing
+        self.tolerance = tolerance
+        self.count = 0
+        self.simplified = 0
+
+    def append(self, time: float, x: float, y: float, yaw: float) -> None:
+        """
+        Records a path point unless it is closer than `min_spacing` to the last recorded point.
+
+        Args:
+            time (float): The simulated time of the point.
+            x (float): The x-coordinate.
+            y (float): The y-coordinate.
+            yaw (float): The yaw angle.
+        """
+        if self.min_spacing > 0 and self._size > 0:
+            last = self._data[self._size - 1]
+            if (x - last[1]) ** 2 + (y - last[2]) ** 2 < self.min_spacing ** 2:
+                return
+        super().append(time, x, y, yaw)
+        self.count += 1
+
+    def _grow(self) -> None:
+        """
+        Simplifies the full buffer and only doubles its capacity if that freed less than half of it.
+        """
+        if self.tolerance > 0:
+            self.simplify(self.tolerance)
+            if self._size <= len(self._data) // 2:
+                return
+        super()._grow()
+
+    def simplify(self, tolerance: float) -> None:
+        """
+        Simplifies the points recorded since the previous simplification in place with the
+        Ramer-Douglas-Peucker algorithm, anchored at the last point kept by the previous simplification.
+        Points are never simplified twice, so the deviations of several simplifications don't add up.
+
+        Args:
+            tolerance (float): The maximum distance of a removed point from the simplified path.
+        """
+        start = max(self.simplified - 1, 0)
+        keep = simplify_path(self.points[start:], tolerance)
+        kept = self.data[start:][keep]
+        self._size = start + len(kept)
+        self._data[start:self._size] = kept
+        self.simplified = self._size
+
+    @property
+    def times(self) -> np.ndarray:
+        """
+        np.ndarray: The simulated times of the recorded points.
+        """
+        return self._data[:self._size, 0]
+
+    @property
+    def points(self) -> np.ndarray:
+        """
+        np.ndarray: The recorded points as an (n, 2) array of x and y.
+        """
+        return self._data[:self._size, 1:3]
+
+    def __getitem__(self, index):
+        """
+        Returns a point as a tuple (x, y), or an (n, 2) array of points for a slice.
+        """
+        if isinstance(index, slice):
+            return self.points[index]
+        return tuple(self.points[index].tolist())
+
+    def __iter__(self):
+        """
+        Iterates over the recorded points as tuples (x, y).
+        """
+        return iter(map(tuple, self.points.tolist()))
+
+class PhotoLog(RecordBuffer):
+    """
+    The log of taken photos with the columns time, x, y and yaw.
+    Single photos are returned as a tuple (center, yaw), like the photo lists used by Coverage.
+    """
+    columns = ("time", "x", "y", "yaw")
+
+    def __init__(self, capacity: int = 256):
+        """
+        Initializes an empty photo log.
+
+        Args:
+            capacity (int): The number of photos to preallocate. Defaults to 256.
+        """
+        super().__init__(capacity)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        np.ndarray: The photo centers as an (n, 2) array of x and y.
+        """
+        return self._data[:self._size, 1:3]
+
+    @property
+    def yaws(self) -> np.ndarray:
+        """
+        np.ndarray: The yaw angles of the photos.
+        """
+        return self._data[:self._size, 3]
+
+    def __getitem__(self, index):
+        """
+        Returns a photo as a tuple ((x, y), yaw), or a list of photos for a slice.
+        """
+        if isinstance(index, slice):
+            return [((x, y), yaw) for _, x, y, yaw in self.data[index].tolist()]
+        _, x, y, yaw = self.data[index].tolist()
+        return ((x, y), yaw)
+
+    def __iter__(self):
+        """
+        Iterates over the photos as tuples ((x, y), yaw).
+        """
+        return iter(self[:])
+
+def photo_arrays(photos) -> tuple:
+    """
+    Returns the photo centers and yaw angles as arrays.
+
+    Args:
+        photos: A PhotoLog, or a list of photos, each represented by a tuple (center, angle).
+
+    Returns:
+        tuple: The centers as an (n, 2) array and the yaw angles as an (n,) array.
+    """
+    if isinstance(photos, PhotoLog):
+        return photos.positions, photos.yaws
+    positions = np.array([photo[0] for photo in photos], dtype=float).reshape(-1, 2)
+    yaws = np.array([photo[1] for photo in photos], dtype=float)
+    return positions, yaws
+
+def simplify_path(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Selects the points of a polyline kept by the Ramer-Douglas-Peucker algorithm.
+
+    Args:
+        points (np.ndarray): The polyline as an (n, 2) array.
+        tolerance (float): The maximum distance of a removed point from the simplified polyline.
+
+    Returns:
+        np.ndarray: A boolean mask of the kept points. The first and last points are always kept.
+    """
+    keep = np.zeros(len(points), dtype=bool)
+    if len(points) == 0:
+        return keep
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length > 0:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        else:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return keep
@@ -1,6 +1,6 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import settings
+from sim.boundary import get_boundary
+from sim.colormaps import colormap_lut
 
 def rotate_point(x: float, y: float, cx: float, cy: float, angle: float) -> tuple:
     """
@@ -23,9 +23,26 @@ def rotate_point(x: float, y: float, cx: float, cy: float, angle: float) -> tupl
     y_rot = sin_t * x_shifted + cos_t * y_shifted + cy
     return int(round(x_rot)), int(round(y_rot))
 
+def values_to_colors(values: np.ndarray, cmap_name: str = "plasma") -> np.ndarray:
+    """
+    Map an array of numeric values to RGBA colors using a cached colormap lookup table.
+
+    Parameters:
+    values (np.ndarray): The numeric values to map to colors.
+    cmap_name (str): The name of the colormap to use. Default is "plasma".
+
+    Returns:
+    np.ndarray: The RGBA colors as a uint8 array with one row per value.
+    """
+    values = np.asarray(values, dtype=float)
+    lut = colormap_lut(cmap_name)
+    norm = np.clip(np.where(values > 0, (values * 10) / 100, values / 100), 0, 1)
+    indices = np.minimum((norm * len(lut)).astype(int), len(lut) - 1)
+    return lut[indices]
+
 def value_to_color(value: float, cmap_name: str = "plasma", alpha: int = 255) -> tuple:
     """
-    Map a numeric value to an RGBA color using a matplotlib colormap.
+    Map a numeric value to an RGBA color using a built-in colormap.
 
     Parameters:
     value (float): The numeric value to map to a color.
@@ -35,31 +52,44 @@ def value_to_color(value: float, cmap_name: str = "plasma", alpha: int = 255) ->
     Returns:
     tuple: The RGBA color as a tuple (r, g, b, a).
     """
-    norm = (value * 10) / 100 if value > 0 else value / 100
-    norm = np.clip(norm, 0, 1)
-    cmap = plt.get_cmap(cmap_name)
-    r, g, b, _ = cmap(norm)
-    return (int(r * 255), int(g * 255), int(b * 255), alpha)
+    r, g, b, _ = values_to_colors(value, cmap_name)
+    return (int(r), int(g), int(b), alpha)
 
-def to_screen_coords(pos: tuple) -> tuple:
+def to_screen_coords(pos: tuple, config) -> tuple:
     """
     Convert simulation coordinates to screen coordinates.
 
     Parameters:
     pos (tuple): The position in simulation coordinates as (x, y).
+    config (SimConfig): The configuration with the screen center.
 
     Returns:
     tuple: The position in screen coordinates as (x_screen, y_screen).
     """
-    return (int(pos[0] + settings.CENTER_X), int(-pos[1] + settings.CENTER_Y))
+    return (int(pos[0] + config.CENTER_X), int(-pos[1] + config.CENTER_Y))
+
+def is_within_boundary(pos: tuple, shape: str, params: dict) -> bool:
+    """
+    Check whether a position lies inside the flight area boundary.
+
+    Parameters:
+    pos (tuple): The position in simulation coordinates as (x, y).
+    shape (str): The boundary shape, 'circle', 'rectangle', 'polygon' or 'multipolygon'.
+    params (dict): The boundary parameters as defined in the settings.
+
+    Returns:
+    bool: True if the position is inside (or on) the boundary.
+    """
+    return get_boundary(shape, params).contains_point(pos)
 
-def custom_print(*args, **kwargs):
+def custom_print(*args, config, **kwargs):
     """
     Custom print function that prints output based on a setting.
 
     Parameters:
     *args: Variable length argument list to pass to the print function.
+    config (SimConfig): The configuration with the PRINT_OUTPUT setting.
     **kwargs: Arbitrary keyword arguments to pass to the print function.
     """
-    if settings.PRINT_OUTPUT:
+    if config.PRINT_OUTPUT:
         print(*args, **kwargs)
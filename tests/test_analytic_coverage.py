@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sim.config import SimConfig
+from sim.coverage import Coverage
+from sim.analytic_coverage import AnalyticCoverage, circle_polygon, sweep_areas
+
+def square(x: float, y: float, size: float) -> np.ndarray:
+    """
+    Returns the counterclockwise corners of an axis-aligned square with its lower left corner at (x, y).
+    """
+    return np.array([(x, y), (x + size, y), (x + size, y + size), (x, y + size)], dtype=float)
+
+def test_single_photo_inside_the_boundary():
+    boundary, covered, overlap = sweep_areas([square(0, 0, 100)], [square(10, 10, 20)], 20)
+    assert boundary == pytest.approx(10000)
+    assert covered == pytest.approx(400)
+    assert overlap == pytest.approx(0)
+
+def test_overlapping_photos():
+    boundary, covered, overlap = sweep_areas([square(0, 0, 100)], [square(10, 10, 20), square(20, 20, 20)], 20)
+    assert covered == pytest.approx(700)
+    assert overlap == pytest.approx(100)
+
+def test_photo_is_clipped_to_the_boundary():
+    _, covered, overlap = sweep_areas([square(0, 0, 100)], [square(90, -10, 20)], 20)
+    assert covered == pytest.approx(100)
+    assert overlap == pytest.approx(0)
+
+def test_rotated_photo_keeps_its_area():
+    angle = np.radians(30)
+    rotation = np.array([(np.cos(angle), -np.sin(angle)), (np.sin(angle), np.cos(angle))])
+    photo = (square(-10, -10, 20) @ rotation.T) + 50
+    _, covered, _ = sweep_areas([square(0, 0, 100)], [photo], 20)
+    assert covered == pytest.approx(400)
+
+def test_holes_are_excluded():
+    outer = square(0, 0, 100)
+    hole = square(40, 40, 20)
+    boundary, covered, overlap = sweep_areas([outer, hole], [square(30, 30, 20), square(35, 35, 20)], 20)
+    assert boundary == pytest.approx(10000 - 400)
+    # The photos cover 575 in total, 225 of it in the hole, and overlap on 225, 100 of it in the hole
+    assert covered == pytest.approx(575 - 225)
+    assert overlap == pytest.approx(225 - 100)
+
+def test_circle_polygon_keeps_the_circle_area():
+    boundary, _, _ = sweep_areas([circle_polygon(100, 0, 130, 720)], [], 20)
+    assert boundary == pytest.approx(np.pi * 130 ** 2)
+
+def test_analytic_matches_raster_coverage():
+    config = SimConfig.default()
+    rng = np.random.default_rng(1)
+    angles = rng.uniform(0, 2 * np.pi, 150)
+    radii = 130 * np.sqrt(rng.uniform(0, 1, 150))
+    photos = [((100 + r * np.cos(a), r * np.sin(a)), yaw) for r, a, yaw in zip(radii, angles, rng.uniform(0, 360, 150))]
+
+    raster = Coverage(config)
+    raster.add_boundary_to_coverage_map_n(config.BOUNDARY_SHAPE, config.BOUNDARY_PARAMS)
+    raster.add_photos_to_coverage_map_n(photos)
+    analytic = AnalyticCoverage(config)
+    analytic.add_boundary_to_coverage_map_n(config.BOUNDARY_SHAPE, config.BOUNDARY_PARAMS)
+    analytic.add_photos_to_coverage_map_n(photos)
+
+    assert analytic.coverage_percentage() == pytest.approx(raster.coverage_percentage(), abs=3)
+    assert analytic.overlap_percentage() == pytest.approx(raster.overlap_percentage(), abs=3)
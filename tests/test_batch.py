@@ -0,0 +1,49 @@
+import csv
+import pytest
+from sim.config import SimConfig
+from tools.batch import RESULT_FIELDS, run_batch
+
+SCRIPTS = {
+    "ok": "adjust_flight_parameters(5, 0, 0)\npause_script_execution(10)\ntake_photo()\n",
+    "terminated": "adjust_flight_parameters(10, 0, 0)\npause_script_execution(10)\n",
+    "loop": "while true do end\n",
+    "sim_time": "while true do pause_script_execution(100) end\n",
+    "memory": "local t = {} for i = 1, 10000000 do t[i] = {i} end\n",
+    "error": 'error("boom")\n',
+    "execute": 'os.execute("true")\n',
+}
+
+@pytest.fixture
+def results(tmp_path):
+    for name, source in SCRIPTS.items():
+        (tmp_path / f"{name}.lua").write_text(source)
+    config = SimConfig.default().replace(PRINT_OUTPUT=False, STOP_ON_VIOLATION=("velocity",), SANDBOX_MAX_INSTRUCTIONS=1_000_000,
+                                         SANDBOX_MAX_SIM_TIME=600, SANDBOX_MAX_MEMORY=8 * 1024 * 1024)
+    output = str(tmp_path / "results.csv")
+    rows = run_batch(str(tmp_path), jobs=1, output_file=output, config=config)
+    with open(output, newline="") as file:
+        return rows, list(csv.DictReader(file))
+
+def test_statuses(results):
+    rows, _ = results
+    by_name = {row["script"].rsplit("/", 1)[-1][:-4]: row for row in rows}
+    assert {name: row["status"] for name, row in by_name.items()} == {
+        "ok": "ok", "terminated": "terminated", "loop": "timeout", "sim_time": "timeout",
+        "memory": "memory", "error": "error", "execute": "error"}
+    assert by_name["ok"]["error"] is None
+    assert by_name["ok"]["photo_count"] == 1
+    assert by_name["ok"]["flight_time"] == 10
+    assert by_name["terminated"]["error"].startswith("velocity out of range by 4")
+    assert by_name["terminated"]["flight_time"] == 0
+    assert by_name["loop"]["error"].startswith("instructions:")
+    assert by_name["sim_time"]["error"].startswith("sim_time:")
+    assert by_name["memory"]["error"] == "LuaMemoryError: memory limit exceeded"
+    assert "boom" in by_name["error"]["error"]
+    assert "execute" in by_name["execute"]["error"]
+    assert by_name["error"]["coverage"] is None
+
+def test_csv_has_one_row_per_script_in_order(results):
+    rows, csv_rows = results
+    assert list(csv_rows[0]) == RESULT_FIELDS
+    assert [row["script"] for row in csv_rows] == sorted(row["script"] for row in rows)
+    assert [row["status"] for row in csv_rows] == [row["status"] for row in rows]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from sim.boundary import CircleBoundary, PolygonBoundary, get_boundary
+
+def ray_cast(rings: list, point: tuple) -> bool:
+    """
+    Brute-force even-odd check with a horizontal ray to the right against every edge.
+    """
+    x, y = point
+    inside = False
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring, np.roll(ring, -1, axis=0)):
+            if (y1 <= y) != (y2 <= y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+def star(x: float, y: float, outer: float, inner: float, points: int) -> np.ndarray:
+    """
+    Returns a concave star polygon with alternating outer and inner vertices.
+    """
+    angles = np.arange(2 * points) * np.pi / points
+    radii = np.where(np.arange(2 * points) % 2 == 0, outer, inner)
+    return np.column_stack((x + radii * np.cos(angles), y + radii * np.sin(angles)))
+
+SHAPES = {
+    "rectangle": ("rectangle", {"v1": (0, 25), "v3": (50, -25), "v2": (50, 25), "v4": (0, -25)}),
+    "star": ("polygon", {"vertices": star(0, 0, 100, 40, 50).tolist()}),
+    "holes": ("polygon", {"vertices": [(-100, -80), (120, -60), (90, 100), (-80, 70)],
+                          "holes": [star(0, 0, 40, 15, 7).tolist(), [(60, 40), (80, 40), (70, 60)]]}),
+    "multipolygon": ("multipolygon", {"polygons": [
+        {"vertices": star(-60, 0, 50, 20, 9).tolist()},
+        {"vertices": [(20, -40), (110, -40), (110, 40), (20, 40)], "holes": [[(40, -20), (90, -20), (90, 20), (40, 20)]]}]}),
+}
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_polygon_contains_matches_ray_cast(name):
+    boundary = get_boundary(*SHAPES[name])
+    assert isinstance(boundary, PolygonBoundary)
+    rng = np.random.default_rng(2)
+    points = rng.uniform(-150, 150, (1500, 2))
+    # Points on or next to an edge count as inside, which the ray cast doesn't handle
+    points = points[boundary.distance(points) > 1e-6]
+    expected = np.array([ray_cast(boundary.rings, point) for point in points])
+    assert expected.any() and not expected.all()
+    assert np.array_equal(boundary.contains(points), expected)
+    assert [boundary.contains_point(tuple(point)) for point in points] == expected.tolist()
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_vertices_and_edges_are_inside(name):
+    boundary = get_boundary(*SHAPES[name])
+    vertices = np.vstack(boundary.rings)
+    midpoints = (boundary.edges[:, 0:2] + boundary.edges[:, 2:4]) / 2
+    assert boundary.contains(vertices).all()
+    assert all(boundary.contains_point(tuple(point)) for point in vertices)
+    # Midpoints of sloped edges are rarely exactly on the edge in floating point, so only axis-aligned ones
+    aligned = (boundary.edges[:, 0] == boundary.edges[:, 2]) | (boundary.edges[:, 1] == boundary.edges[:, 3])
+    assert boundary.contains(midpoints[aligned]).all()
+
+def test_hole_is_outside():
+    boundary = get_boundary(*SHAPES["holes"])
+    assert not boundary.contains_point((0, 0))
+    assert not boundary.contains_point((70, 45))
+    assert boundary.contains_point((-90, -70))
+
+def test_circle_contains():
+    boundary = get_boundary("circle", {"x": 100, "y": 0, "radius": 130})
+    assert isinstance(boundary, CircleBoundary)
+    assert boundary.contains(np.array([(100, 0), (230, 0), (231, 0)])).tolist() == [True, True, False]
+    assert boundary.distance(np.array([(100, 0)]))[0] == pytest.approx(130)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from sim.config import SimConfig
+from sim.constraints import ConstraintMonitor, FlightTerminated
+from sim.boundary import get_boundary
+from sim.flight import DroneFlight
+from sim.headless import run_headless
+
+SQUARE = {"vertices": [(-50, -50), (50, -50), (50, 50), (-50, 50)]}
+
+@pytest.fixture
+def config():
+    return SimConfig.default().replace(PRINT_OUTPUT=False, BOUNDARY_SHAPE="polygon", BOUNDARY_PARAMS=SQUARE)
+
+def test_boundary_exit_lasts_until_the_drone_is_back(config):
+    flight = DroneFlight(headless=True, config=config)
+    flight.adjust_flight_parameters(4, 0, 0)
+    flight.update(20)  # Out at x = 50 after 12.5 s, 30 m outside at the end
+    flight.adjust_flight_parameters(-4, 0, 0)
+    flight.update(20)  # Back inside after 7.5 s
+    [violation] = flight.monitor.violations
+    assert violation["kind"] == "boundary"
+    assert violation["time"] == pytest.approx(12.6)
+    assert violation["excess"] == pytest.approx(30)
+    assert violation["end_time"] == pytest.approx(27.5)
+    assert flight.monitor.excursion is None
+
+def test_flight_duration(config):
+    flight = DroneFlight(headless=True, config=config.replace(FLIGHT_DURATION=1))
+    flight.update(90)
+    [violation] = flight.monitor.violations
+    assert (violation["kind"], violation["time"], violation["excess"]) == ("duration", 60, 30)
+    flight.update(10)
+    assert violation["excess"] == 40
+    assert len(flight.monitor.violations) == 1
+
+def test_velocity_and_yaw_ranges(config):
+    flight = DroneFlight(headless=True, config=config)
+    flight.adjust_flight_parameters(8, -6, 0)
+    flight.update(1)
+    flight.adjust_flight_parameters(0, 0, -150)
+    flight.adjust_flight_parameters(1, 1, 10)
+    velocity, yaw = flight.monitor.violations
+    assert (velocity["kind"], velocity["time"], velocity["excess"]) == ("velocity", 0, 2)
+    assert (yaw["kind"], yaw["time"], yaw["excess"], yaw["x"]) == ("yaw", 1, 50, 8)
+
+def test_first_stop_and_discard_after(config):
+    monitor = ConstraintMonitor(get_boundary("polygon", SQUARE), config.replace(STOP_ON_VIOLATION=("yaw", "duration")))
+    velocity = monitor.record("velocity", 3, (0, 0), 1)
+    late_yaw = monitor.record("yaw", 8, (0, 0), 1)
+    yaw = monitor.record("yaw", 5, (0, 0), 1)
+    assert monitor.violations == [velocity, yaw, late_yaw]
+    assert monitor.first_stop([velocity]) is None
+    assert monitor.first_stop([velocity, late_yaw, yaw]) is yaw
+    monitor.excursion = monitor.record("boundary", 6, (60, 0), 10)
+    monitor.discard_after(5)
+    assert monitor.violations == [velocity, yaw]
+    assert monitor.excursion is None
+
+def test_unknown_violation_kind(config):
+    with pytest.raises(ValueError, match="Unknown violation kinds"):
+        ConstraintMonitor(get_boundary("polygon", SQUARE), config.replace(STOP_ON_VIOLATION=("speed",)))
+
+def test_stop_on_boundary_ends_the_flight_at_the_exit(config):
+    flight = DroneFlight(headless=True, config=config.replace(STOP_ON_VIOLATION=("boundary",)))
+    flight.adjust_flight_parameters(4, 0, 0)
+    with pytest.raises(FlightTerminated) as error:
+        flight.update(30)
+    assert error.value.violation is flight.termination
+    assert flight.sim_time == pytest.approx(12.6)
+    assert flight.position == pytest.approx((50.4, 0))
+    assert not flight.running
+    assert flight.flight_time == flight.sim_time
+    assert flight.path.times.max() == pytest.approx(12.6)
+
+def test_stop_on_velocity_raises_at_the_call(config):
+    flight = DroneFlight(headless=True, config=config.replace(STOP_ON_VIOLATION=("velocity",)))
+    flight.update(3)
+    with pytest.raises(FlightTerminated):
+        flight.adjust_flight_parameters(10, 0, 0)
+    assert flight.flight_time == 3
+    assert not flight.running
+
+def test_termination_cuts_the_script_at_the_violation(tmp_path, config):
+    script = tmp_path / "out.lua"
+    script.write_text("adjust_flight_parameters(4, 0, 0)\nfor i = 1, 30 do\n    pause_script_execution(1)\n    take_photo()\nend\n")
+    result = run_headless(str(script), config=config.replace(STOP_ON_VIOLATION=("boundary",)))
+    assert result["flight_time"] == pytest.approx(12.6)
+    assert result["photo_count"] == 12
+    assert [violation["kind"] for violation in result["violations"]] == ["boundary"]
+    assert result["terminated"].startswith("left the boundary at (50.4, 0.0) after 12.6 s")
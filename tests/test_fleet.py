@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from sim.config import SimConfig
+from sim.fleet import Fleet, drone_pairs
+
+@pytest.fixture
+def config():
+    return SimConfig.default().replace(PRINT_OUTPUT=False, FLEET_MIN_SEPARATION=5)
+
+def separations(fleet: Fleet, index: int) -> list:
+    return fleet.monitors[index].violations_of("separation")
+
+def test_drones_flying_at_each_other_record_an_encounter(config):
+    fleet = Fleet(3, start_positions=[(0, 0), (40, 0), (0, 60)], config=config)
+    fleet.adjust_flight_parameters(0, 5, 0, 0)
+    fleet.adjust_flight_parameters(1, -5, 0, 0)
+    fleet.update(10)
+    first, second = separations(fleet, 0), separations(fleet, 1)
+    assert len(first) == len(second) == 1
+    assert first[0]["other"] == 2 and second[0]["other"] == 1
+    # The drones are closer than 5 m from t = 3.5 s until they have passed each other at t = 4.5 s
+    assert first[0]["time"] == pytest.approx(3.6)
+    assert first[0]["excess"] == pytest.approx(5)
+    assert separations(fleet, 2) == []
+    assert (0, 1) not in fleet.encounters
+
+def test_encounter_spans_several_updates(config):
+    fleet = Fleet(2, start_positions=[(0, 0), (3, 0)], config=config)
+    fleet.adjust_flight_parameters(0, 1, 0, 0)
+    fleet.adjust_flight_parameters(1, 1, 0, 0)
+    for _ in range(5):
+        fleet.update(1)
+    assert len(separations(fleet, 0)) == 1
+    assert (0, 1) in fleet.encounters
+    fleet.adjust_flight_parameters(1, 10, 0, 0)
+    fleet.update(1)
+    assert (0, 1) not in fleet.encounters
+    assert len(separations(fleet, 0)) == 1
+
+def test_separation_ends_the_flights(config):
+    fleet = Fleet(2, start_positions=[(0, 0), (40, 0)], config=config.replace(STOP_ON_VIOLATION=("separation",)))
+    fleet.adjust_flight_parameters(0, 5, 0, 0)
+    fleet.adjust_flight_parameters(1, -5, 0, 0)
+    fleet.update(10)
+    assert not fleet.running.any()
+    assert fleet.flight_times == pytest.approx([3.6, 3.6])
+
+def test_drone_pairs_are_cached():
+    first, second = drone_pairs(4)
+    assert drone_pairs(4)[0] is first
+    assert list(zip(first, second)) == [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]
+    assert not first.flags.writeable
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from sim.config import SimConfig
+from sim.coverage import CoverageTargetReached
+from sim.flight import DroneFlight
+
+def fly_photos(flight: DroneFlight, count: int) -> None:
+    flight.adjust_flight_parameters(20, 5, 30)
+    for _ in range(count):
+        flight.update(1.0)
+        flight.take_photo()
+
+def test_coverage_map_is_only_allocated_when_used():
+    flight = DroneFlight(headless=True, config=SimConfig.default().replace(PRINT_OUTPUT=False))
+    fly_photos(flight, 5)
+    assert flight.live_coverage is None
+    assert flight.get_coverage() > 0
+    assert flight.live_coverage is not None
+
+def test_lazy_coverage_matches_live_coverage():
+    config = SimConfig.default().replace(PRINT_OUTPUT=False)
+    lazy = DroneFlight(headless=True, config=config)
+    live = DroneFlight(headless=True, config=config)
+    live.get_coverage()
+    fly_photos(lazy, 8)
+    fly_photos(live, 8)
+    assert np.array_equal(lazy.coverage.coverage_map, live.coverage.coverage_map, equal_nan=True)
+    assert lazy.get_overlap() == live.get_overlap()
+
+def test_coverage_target_uses_the_raster_map_with_the_analytic_backend():
+    config = SimConfig.default().replace(PRINT_OUTPUT=False, COVERAGE_BACKEND="analytic", COVERAGE_TARGET=1)
+    flight = DroneFlight(headless=True, config=config)
+    with pytest.raises(CoverageTargetReached):
+        fly_photos(flight, 50)
+    assert flight.target_reached
+    assert flight.live_coverage is not None
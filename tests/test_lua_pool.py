@@ -0,0 +1,61 @@
+import pytest
+from sim.config import SimConfig
+from sim.headless import run_headless
+from tools.lua_pool import LuaRuntimePool
+
+LEAKING_SCRIPT = """
+leaked = 1
+math.pi = 3
+string.upper = function() return "leaked" end
+getmetatable("").__index = {lower = function() return "leaked" end}
+getmetatable("").__len = function() return 0 end
+"""
+
+ISOLATED_SCRIPT = """
+assert(leaked == nil, "global leaked")
+assert(math.pi > 3.14, "library field leaked")
+assert(string.upper("a") == "A", "library function leaked")
+assert(("A"):lower() == "a", "string metatable leaked")
+assert(("a"):upper() == "A", "string metatable leaked")
+take_photo()
+"""
+
+@pytest.mark.parametrize("sandboxed", [False, True])
+def test_pooled_runs_are_isolated(tmp_path, sandboxed):
+    leaking = tmp_path / "leaking.lua"
+    leaking.write_text(LEAKING_SCRIPT)
+    isolated = tmp_path / "isolated.lua"
+    isolated.write_text(ISOLATED_SCRIPT)
+    pool = LuaRuntimePool()
+    config = SimConfig.default()
+
+    run_headless(str(leaking), sandboxed=sandboxed, runtime_pool=pool, config=config)
+    result = run_headless(str(isolated), sandboxed=sandboxed, runtime_pool=pool, config=config)
+    assert result["photo_count"] == 1
+    assert sum(len(runtimes) for runtimes in pool.free.values()) == 1
+
+def test_compiled_chunks_are_cached(tmp_path):
+    pool = LuaRuntimePool(max_chunks=2)
+    config = SimConfig.default()
+    scripts = []
+    for number in range(3):
+        script = tmp_path / f"script{number}.lua"
+        script.write_text(f"for i = 1, {number + 1} do take_photo() end")
+        scripts.append(str(script))
+
+    results = [run_headless(script, runtime_pool=pool, config=config)["photo_count"] for script in scripts + scripts[:1]]
+    assert results == [1, 2, 3, 1]
+    (runtime,) = pool.free[next(iter(pool.free))]
+    assert len(runtime.chunks) == 2
+
+def test_chunk_cache_size_follows_the_configuration(tmp_path):
+    pool = LuaRuntimePool()
+    config = SimConfig.default().replace(LUA_CHUNK_CACHE_SIZE=1)
+    for number in range(3):
+        script = tmp_path / f"script{number}.lua"
+        script.write_text(f"for i = 1, {number + 1} do take_photo() end")
+        run_headless(str(script), runtime_pool=pool, config=config)
+
+    (runtime,) = pool.free[next(iter(pool.free))]
+    assert len(runtime.chunks) == 1
+    assert len(pool.sources) == 1
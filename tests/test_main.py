@@ -0,0 +1,26 @@
+import pytest
+from sim.config import SimConfig
+from sim.renderer import DroneRenderer
+from sim.telemetry import read_telemetry
+from main import main_simulation
+
+SCRIPT = """
+adjust_flight_parameters(5, 0, 0)
+pause_script_execution(10)
+take_photo()
+end_flight()
+"""
+
+@pytest.fixture
+def window(monkeypatch):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setattr(DroneRenderer, "wait_for_exit", lambda self: None)
+
+def test_window_log_has_a_single_end_event(window, tmp_path):
+    script = tmp_path / "script.lua"
+    script.write_text(SCRIPT)
+    log = str(tmp_path / "window.jsonl")
+    main_simulation(str(script), log, SimConfig.default().replace(PRINT_OUTPUT=False, SIMULATION_SPEED=0))
+    events = [record["event"] for record in read_telemetry(log)]
+    assert events.count("end") == 1
+    assert events[-1] == "end"
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sim.config import SimConfig
+from sim.fleet import run_fleet
+from sim.headless import run_headless
+from sim.telemetry import read_telemetry
+from tools.export import export_telemetry
+from tools.replay import ReplayFlight, TelemetryReplay, replay_speed
+
+SCRIPT = """
+adjust_flight_parameters(5, 2, 0)
+pause_script_execution(20)
+take_photo()
+adjust_flight_parameters(-3, 4, 90)
+pause_script_execution(15)
+take_photo()
+"""
+
+@pytest.fixture
+def config():
+    return SimConfig.default().replace(PRINT_OUTPUT=False)
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "script.lua"
+    path.write_text(SCRIPT)
+    return str(path)
+
+def test_replay_ends_where_the_flight_ended(tmp_path, config, script):
+    log = str(tmp_path / "flight.jsonl")
+    run_headless(script, telemetry_file=log, config=config)
+    records = read_telemetry(log)
+    replay = TelemetryReplay(records)
+    flight = ReplayFlight(replay, config)
+    flight.advance_to(replay.duration)
+    end = records[-1]
+    assert np.allclose(flight.position, (end["x"], end["y"]))
+    assert len(flight.photos) == 2
+
+def test_fleet_logs_are_refused(tmp_path, config, script):
+    log = str(tmp_path / "fleet.jsonl")
+    run_fleet([script, script], telemetry_file=log, config=config)
+    with pytest.raises(ValueError, match="fleet of 2 drones"):
+        TelemetryReplay(read_telemetry(log))
+    row = export_telemetry(log, str(tmp_path / "fleet.png"), config=config)
+    assert row["error"].startswith("ValueError")
+
+def test_replay_speed_of_0_falls_back_to_the_default(config):
+    assert replay_speed(config.replace(SIMULATION_SPEED=40)) == 40
+    assert replay_speed(config.replace(SIMULATION_SPEED=0)) == SimConfig.default().SIMULATION_SPEED
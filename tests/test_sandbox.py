@@ -0,0 +1,54 @@
+import pytest
+from sim.config import SimConfig
+from sim.headless import run_headless
+from tools.sandbox import ScriptBudgetExceeded
+
+def run_sandboxed(tmp_path, source: str, **settings) -> dict:
+    """
+    Runs a Lua source in the sandbox with the given settings changed.
+    """
+    script = tmp_path / "script.lua"
+    script.write_text(source)
+    return run_headless(str(script), sandboxed=True, config=SimConfig.default().replace(**settings))
+
+def test_instruction_budget(tmp_path):
+    with pytest.raises(ScriptBudgetExceeded) as exceeded:
+        run_sandboxed(tmp_path, "while true do end", SANDBOX_MAX_INSTRUCTIONS=100_000)
+    assert exceeded.value.kind == "instructions"
+
+def test_wall_time_budget(tmp_path):
+    with pytest.raises(ScriptBudgetExceeded) as exceeded:
+        run_sandboxed(tmp_path, "while true do end", SANDBOX_MAX_INSTRUCTIONS=10 ** 12, SANDBOX_MAX_WALL_TIME=0.2)
+    assert exceeded.value.kind == "wall_time"
+
+def test_sim_time_budget(tmp_path):
+    with pytest.raises(ScriptBudgetExceeded) as exceeded:
+        run_sandboxed(tmp_path, "while true do pause_script_execution(10) end", SANDBOX_MAX_SIM_TIME=60)
+    assert exceeded.value.kind == "sim_time"
+
+def test_memory_budget(tmp_path):
+    with pytest.raises(MemoryError):
+        run_sandboxed(tmp_path, "local t = {} for i = 1, 10000000 do t[i] = {i} end", SANDBOX_MAX_MEMORY=4 * 1024 * 1024)
+
+def test_script_within_its_budgets(tmp_path):
+    result = run_sandboxed(tmp_path, "for i = 1, 5 do take_photo() pause_script_execution(1) end")
+    assert result["photo_count"] == 5
+
+@pytest.mark.parametrize("expression", ["io", "debug", "package", "require", "dofile", "loadfile", "python", "os.execute",
+                                        "os.exit", "os.getenv", "string.dump"])
+def test_unsafe_functions_are_removed(tmp_path, expression):
+    run_sandboxed(tmp_path, f"assert({expression} == nil)")
+
+def test_load_refuses_bytecode(tmp_path):
+    run_sandboxed(tmp_path, """
+        local chunk, message = load("\\27Lua")
+        assert(chunk == nil and message:find("binary chunk"))
+        assert(load("return ...", "chunk", "b")(42) == 42)
+        assert(load("return x", "chunk", "t", {x = 1})() == 1)
+    """)
+
+def test_print_follows_print_output(tmp_path, capsys):
+    run_sandboxed(tmp_path, 'print("quiet")')
+    assert "quiet" not in capsys.readouterr().out
+    run_sandboxed(tmp_path, 'print("loud", 1, nil)', PRINT_OUTPUT=True)
+    assert "loud\t1\tnil" in capsys.readouterr().out
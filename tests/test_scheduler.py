@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from sim.config import SimConfig
+from sim.flight import DroneFlight
+from tools.lua_runner import LuaRunner
+from tools.scheduler import ScriptScheduler, SimulationThread
+
+@pytest.fixture
+def config():
+    return SimConfig.default().replace(PRINT_OUTPUT=False)
+
+def make_runner(tmp_path, name: str, source: str, flight: DroneFlight, marks: list) -> LuaRunner:
+    """
+    Returns a runner of a script that can call `mark(label)` to record the label and the simulated time.
+    """
+    path = tmp_path / f"{name}.lua"
+    path.write_text(source)
+    runner = LuaRunner(flight, lua_script_path=str(path))
+    runner.lua.globals().mark = lambda label: marks.append((label, flight.sim_time))
+    return runner
+
+def flight_scheduler(flight: DroneFlight) -> ScriptScheduler:
+    return ScriptScheduler(lambda: flight.sim_time, flight.update, lambda: flight.running)
+
+def test_scripts_waking_together_resume_in_the_order_they_were_added(tmp_path, config):
+    flight = DroneFlight(headless=True, config=config)
+    marks = []
+    scheduler = flight_scheduler(flight)
+    for name in ("first", "second", "third"):
+        scheduler.add(make_runner(tmp_path, name, f'pause_script_execution(2) mark("{name}") pause_script_execution(1) mark("{name}")', flight, marks))
+    scheduler.run()
+    assert marks == [("first", 2), ("second", 2), ("third", 2), ("first", 3), ("second", 3), ("third", 3)]
+
+def test_step_stops_at_every_pause_end(tmp_path, config):
+    flight = DroneFlight(headless=True, config=config)
+    marks = []
+    updates = []
+    scheduler = ScriptScheduler(lambda: flight.sim_time, lambda delta: (updates.append(delta), flight.update(delta)), lambda: flight.running)
+    scheduler.add(make_runner(tmp_path, "script", 'for i = 1, 3 do pause_script_execution(1.5) mark("wake") end pause_script_execution(100)', flight, marks))
+    scheduler.step(4)
+    assert marks == [("wake", 1.5), ("wake", 3.0)]
+    assert updates == pytest.approx([1.5, 1.5, 1.0])
+    assert flight.sim_time == pytest.approx(4)
+    scheduler.step(1)
+    assert marks[-1] == ("wake", 4.5)
+
+def test_scripts_are_dropped_when_the_flight_ended(tmp_path, config):
+    flight = DroneFlight(headless=True, config=config)
+    marks = []
+    finished = []
+    scheduler = flight_scheduler(flight)
+    scheduler.add(make_runner(tmp_path, "ender", 'pause_script_execution(5) end_flight()', flight, marks))
+    scheduler.add(make_runner(tmp_path, "looper", 'while true do pause_script_execution(1) mark("loop") end', flight, marks),
+                  on_finish=lambda: finished.append("looper"))
+    scheduler.run()
+    assert not flight.running
+    assert len(scheduler) == 0
+    assert finished == ["looper"]
+    assert max(time for _, time in marks) <= 5
+
+def test_schedulers_interleave_under_asyncio(tmp_path, config):
+    marks = []
+    schedulers = []
+    for name in ("a", "b"):
+        flight = DroneFlight(headless=True, config=config)
+        scheduler = flight_scheduler(flight)
+        scheduler.add(make_runner(tmp_path, name, f'for i = 1, 4 do pause_script_execution(1) mark("{name}") end', flight, marks))
+        schedulers.append(scheduler)
+
+    async def run_both():
+        await asyncio.gather(schedulers[0].run_async(), schedulers[1].run_async())
+    asyncio.run(run_both())
+    assert [label for label, _ in marks] == ["a", "b"] * 4
+    assert [time for _, time in marks] == [1, 1, 2, 2, 3, 3, 4, 4]
+
+def test_real_time_scheduler_runs_next_to_a_simulated_one(tmp_path, config):
+    marks = []
+    flights = [DroneFlight(headless=True, config=config) for _ in range(2)]
+    schedulers = [flight_scheduler(flight) for flight in flights]
+    schedulers[0].add(make_runner(tmp_path, "fast", 'for i = 1, 3 do pause_script_execution(1) mark("fast") end', flights[0], marks))
+    schedulers[1].add(make_runner(tmp_path, "slow", 'for i = 1, 3 do pause_script_execution(1) mark("slow") end', flights[1], marks))
+
+    async def run_both():
+        await asyncio.gather(schedulers[0].run_async(speed=100), schedulers[1].run_async())
+    asyncio.run(run_both())
+    # The simulated clock doesn't wait for the wall clock, so its script finishes first
+    assert [label for label, _ in marks] == ["slow"] * 3 + ["fast"] * 3
+    assert [time for _, time in marks] == pytest.approx([1, 2, 3, 1, 2, 3])
+
+def test_stop_ends_the_simulation_thread(tmp_path, config):
+    flight = DroneFlight(headless=True, config=config)
+    scheduler = flight_scheduler(flight)
+    scheduler.add(make_runner(tmp_path, "script", 'pause_script_execution(1000)', flight, []))
+    published = []
+    simulation = SimulationThread(scheduler, lambda: published.append(flight.sim_time), speed=1, rate=100)
+    simulation.start()
+    while len(published) < 3:
+        simulation.join(0.01)
+    simulation.stop()
+    simulation.join(2)
+    assert not simulation.is_alive()
+    assert simulation.error is None
+    assert scheduler.stopped
+    assert flight.sim_time < 1000
+    assert len(scheduler) == 1
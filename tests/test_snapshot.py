@@ -0,0 +1,70 @@
+import threading
+import time
+import numpy as np
+import pytest
+from sim.config import SimConfig
+from sim.flight import DroneFlight
+from sim.snapshot import SnapshotChannel, SnapshotPublisher
+
+@pytest.fixture
+def flight():
+    return DroneFlight(headless=True, config=SimConfig.default().replace(PRINT_OUTPUT=False))
+
+def fly_leg(flight: DroneFlight, x_velocity: float) -> None:
+    flight.adjust_flight_parameters(x_velocity, 0, 0)
+    flight.update(2)
+    flight.take_photo()
+
+def test_slow_consumer_gets_the_latest_snapshot_with_all_photos(flight):
+    publisher = SnapshotPublisher(flight)
+    channel = SnapshotChannel()
+    for velocity in (5, -5, 5):
+        fly_leg(flight, velocity)
+        channel.publish(publisher.take())
+    snapshot = channel.take()
+    assert snapshot.sim_time == flight.sim_time
+    assert snapshot.photo_count == 3
+    assert np.array_equal(snapshot.photos, flight.photos.data[:, 1:])
+    assert len(snapshot.path) == flight.path.count
+    assert channel.published == 3
+    assert channel.dropped == 2
+    assert channel.take() is None
+
+def test_no_photo_is_lost_between_threads(flight):
+    publisher = SnapshotPublisher(flight)
+    channel = SnapshotChannel()
+    received = []
+
+    def simulate():
+        for leg in range(200):
+            fly_leg(flight, 5 if leg % 2 else -5)
+            channel.publish(publisher.take())
+
+    simulation = threading.Thread(target=simulate)
+    simulation.start()
+    while simulation.is_alive() or channel.latest is not None:
+        snapshot = channel.take()
+        if snapshot is not None:
+            received.append(snapshot)
+        time.sleep(0.002)
+    simulation.join()
+    assert sum(len(snapshot.photos) for snapshot in received) == 200
+    assert received[-1].photo_count == 200
+    assert len(received) + channel.dropped == channel.published == 200
+
+def test_snapshot_does_not_change_after_later_updates(flight):
+    publisher = SnapshotPublisher(flight)
+    fly_leg(flight, 5)
+    snapshot = publisher.take()
+    photos, path = snapshot.photos.copy(), snapshot.path.copy()
+    for array in (snapshot.photos, snapshot.path):
+        assert not array.flags.writeable
+        with pytest.raises(ValueError):
+            array[...] = 0
+    for velocity in (-5, 3, 4):
+        fly_leg(flight, velocity)
+    publisher.take()
+    assert np.array_equal(snapshot.photos, photos)
+    assert np.array_equal(snapshot.path, path)
+    assert snapshot.position == (10.0, 0.0)
+    assert snapshot.sim_time == 2
@@ -0,0 +1,58 @@
+import pytest
+from sim.config import SimConfig
+import tools.sweep
+from tools.sweep import parse_parameter, pareto_front, read_cache, run_sweep
+
+SCRIPT = """
+local VELOCITY = 1
+adjust_flight_parameters(VELOCITY, 0, 0)
+for i = 1, 3 do
+    take_photo()
+    pause_script_execution(20)
+end
+"""
+
+@pytest.fixture
+def sweep(tmp_path):
+    """
+    Returns a function running a sweep of the test script with a cache in the temporary directory.
+    """
+    script = tmp_path / "script.lua"
+    script.write_text(SCRIPT)
+    config = SimConfig.default().replace(SWEEP_CACHE_FILE=str(tmp_path / "cache.jsonl"))
+    return lambda parameters: run_sweep(str(script), parameters, jobs=1, output_file=str(tmp_path / "results.csv"), config=config)
+
+def test_parse_parameter():
+    assert parse_parameter("VELOCITY=3:5:0.5") == ("VELOCITY", [3, 3.5, 4, 4.5, 5])
+    assert parse_parameter("LAYERS=3,4,5") == ("LAYERS", [3, 4, 5])
+    assert parse_parameter("VELOCITY=3:8") == ("VELOCITY", (3, 8))
+    with pytest.raises(ValueError):
+        parse_parameter("3=1")
+
+def test_pareto_front():
+    rows = [{"status": "ok", "coverage": 50, "overlap": 10, "flight_time": 100},
+            {"status": "ok", "coverage": 40, "overlap": 10, "flight_time": 100},
+            {"status": "ok", "coverage": 30, "overlap": 5, "flight_time": 100},
+            {"status": "error", "coverage": None, "overlap": None, "flight_time": None}]
+    assert pareto_front(rows).tolist() == [True, False, True, False]
+
+def test_rerun_is_served_from_the_cache(sweep, monkeypatch, capsys):
+    first = sweep({"VELOCITY": [1, 2], "FLIGHT_HEIGHT": [20, 30]})
+    assert "(0 cached)" in capsys.readouterr().out
+    assert len({(row["VELOCITY"], row["coverage"]) for row in first}) > 2
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("A cached sweep must not start workers")
+    monkeypatch.setattr(tools.sweep, "Pool", no_pool)
+    second = sweep({"VELOCITY": [1, 2], "FLIGHT_HEIGHT": [20, 30]})
+    assert "(4 cached)" in capsys.readouterr().out
+    assert second == first
+
+def test_interrupted_sweep_resumes(sweep, tmp_path, capsys):
+    sweep({"VELOCITY": [1]})
+    with open(tmp_path / "cache.jsonl", "a") as cache:
+        cache.write('{"key": "cut off')
+    results = sweep({"VELOCITY": [1, 2, 3]})
+    assert "Sweeping 3 combinations (1 cached)" in capsys.readouterr().out
+    assert [row["status"] for row in results] == ["ok"] * 3
+    assert len(read_cache(str(tmp_path / "cache.jsonl"))) == 3
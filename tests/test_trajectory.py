@@ -0,0 +1,31 @@
+import numpy as np
+from sim.trajectory import Trajectory, simplify_path
+
+def distances_to_polyline(points: np.ndarray, polyline: np.ndarray) -> np.ndarray:
+    """
+    Returns the distance of every point to the nearest segment of a polyline.
+    """
+    start, end = polyline[:-1], polyline[1:]
+    segment = end - start
+    lengths = np.maximum((segment ** 2).sum(axis=1), 1e-12)
+    t = np.clip(((points[:, np.newaxis] - start) * segment).sum(axis=2) / lengths, 0, 1)
+    nearest = start + t[:, :, np.newaxis] * segment
+    return np.hypot(*(points[:, np.newaxis] - nearest).transpose(2, 0, 1)).min(axis=1)
+
+def test_simplify_path_keeps_the_ends_and_corners():
+    points = np.array([(0, 0), (1, 0.01), (2, 0), (2, 1), (2, 2)], dtype=float)
+    keep = simplify_path(points, 0.1)
+    assert keep.tolist() == [True, False, True, False, True]
+
+def test_long_flight_stays_within_the_tolerance():
+    tolerance = 0.5
+    times = np.arange(6000) * 0.1
+    recorded = np.column_stack((times, 30 * np.sin(times / 7) + 0.3 * np.sin(times * 3)))
+    path = Trajectory(capacity=64, tolerance=tolerance)
+    for time, (x, y) in zip(times, recorded):
+        path.append(time, x, y, 0)
+
+    assert path.count == len(recorded)
+    assert len(path) < len(recorded) // 4
+    assert distances_to_polyline(recorded, path.points).max() <= tolerance + 1e-9
+    assert np.all(np.diff(path.times) > 0)
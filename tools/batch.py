@@ -0,0 +1,139 @@
+import csv
+import json
+import os
+from functools import partial
+from multiprocessing import Pool
+
+"""
+This file is used to validate many Lua scripts at once by running them headless on a process pool.
+"""
+
+RESULT_FIELDS = ["script", "status", "coverage", "overlap", "flight_time", "boundary_violations", "violations", "photo_count", "target_reached", "error"]
+
+runtime_pool = None  # The Lua runtime pool of the current worker process, created on first use
+
+def get_runtime_pool():
+    """
+    Returns the Lua runtime pool of the current process, so a worker reuses its warm runtimes and compiled chunks.
+
+    Returns:
+        LuaRuntimePool: The pool of the current process.
+    """
+    global runtime_pool
+    if runtime_pool is None:
+        from tools.lua_pool import LuaRuntimePool
+        runtime_pool = LuaRuntimePool()
+    return runtime_pool
+
+def thumbnail_path(lua_file, thumbnail_dir):
+    """
+    Returns the path of the thumbnail of a Lua script: the script's name with '.png' in the thumbnail directory.
+
+    Args:
+        lua_file (str): The path to the Lua script.
+        thumbnail_dir (str): The thumbnail directory.
+
+    Returns:
+        str: The path of the thumbnail.
+    """
+    return os.path.join(thumbnail_dir, os.path.splitext(os.path.basename(lua_file))[0] + ".png")
+
+def evaluate_script(lua_file, config=None, script_globals=None, thumbnail_dir=None):
+    """
+    Run a single Lua script headless in the sandbox and collect its results.
+    Every call creates its own flight. The Lua runtime comes from the worker's pool and its global
+    state is reset before every run, so scripts can't influence each other.
+
+    Args:
+        lua_file (str): The path to the Lua script.
+        config (SimConfig, optional): The simulation configuration. Defaults to SimConfig.default().
+        script_globals (dict, optional): Lua globals overriding the script's constants. Defaults to None.
+        thumbnail_dir (str, optional): Save a thumbnail of the result, EXPORT_THUMBNAIL_WIDTH pixels wide, to this
+                                       directory, rendered offscreen by the worker that flew the script. Defaults to None.
+
+    Returns:
+        dict: The results of the script, with the status 'ok', 'terminated' (the flight was ended early by a
+              violation in STOP_ON_VIOLATION, scored up to that time), 'timeout' (a budget was exceeded),
+              'memory' (the memory cap was exceeded) or 'error'. 'target_reached' is True for flights ended
+              early by reaching COVERAGE_TARGET.
+    """
+    from sim.config import SimConfig
+    from sim.headless import run_headless
+    from tools.sandbox import ScriptBudgetExceeded
+    row = {field: None for field in RESULT_FIELDS}
+    row["script"] = lua_file
+    config = config or SimConfig.default()
+    image_file = thumbnail_path(lua_file, thumbnail_dir) if thumbnail_dir is not None else None
+    try:
+        result = run_headless(lua_file, sandboxed=True, runtime_pool=get_runtime_pool(), config=config,
+                              script_globals=script_globals, image_file=image_file, image_width=config.EXPORT_THUMBNAIL_WIDTH)
+        row.update({field: result[field] for field in RESULT_FIELDS if field in result})
+        row["violations"] = len(result["violations"])
+        row["status"] = "terminated" if result["terminated"] else "ok"
+        row["error"] = result["terminated"]
+    except ScriptBudgetExceeded as e:
+        row["status"] = "timeout"
+        row["error"] = f"{e.kind}: {e}"
+    except MemoryError as e:
+        row["status"] = "memory"
+        row["error"] = f"{type(e).__name__}: {str(e) or 'memory limit exceeded'}"
+    except Exception as e:
+        row["status"] = "error"
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+def find_scripts(directory):
+    """
+    Find all Lua scripts in a directory.
+
+    Args:
+        directory (str): The directory to search.
+
+    Returns:
+        list: The sorted paths of all '.lua' files in the directory.
+    """
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".lua"))
+
+def write_results(results, output_file, fields=RESULT_FIELDS):
+    """
+    Write the batch results to a CSV file, or a JSON file if the filename ends with '.json'.
+
+    Args:
+        results (list): The result rows.
+        output_file (str): The path to the output file.
+        fields (list, optional): The CSV columns. Defaults to RESULT_FIELDS.
+    """
+    if output_file.endswith(".json"):
+        with open(output_file, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        with open(output_file, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(results)
+
+def run_batch(directory, jobs=None, output_file="batch_results.csv", config=None, thumbnail_dir=None):
+    """
+    Run every Lua script in a directory headless on a process pool and save the results.
+
+    Args:
+        directory (str): The directory containing the Lua scripts.
+        jobs (int, optional): The number of worker processes. Defaults to None, which uses all cores.
+        output_file (str): The path to the output file. Defaults to "batch_results.csv".
+        config (SimConfig, optional): The simulation configuration of every script. Defaults to SimConfig.default().
+        thumbnail_dir (str, optional): Save a thumbnail of every flown script to this directory. Defaults to None.
+
+    Returns:
+        list: The result rows, sorted by script path.
+    """
+    scripts = find_scripts(directory)
+    with Pool(jobs) as pool:
+        results = sorted(pool.imap_unordered(partial(evaluate_script, config=config, thumbnail_dir=thumbnail_dir), scripts),
+                         key=lambda row: row["script"])
+
+    write_results(results, output_file)
+    failed = sum(1 for row in results if row["status"] != "ok")
+    print(f"Evaluated {len(results)} scripts ({failed} failed), saved results to '{output_file}'")
+    if thumbnail_dir is not None:
+        print(f"Saved thumbnails to '{thumbnail_dir}'")
+    return results
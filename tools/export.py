@@ -0,0 +1,252 @@
+import os
+import shutil
+import subprocess
+from functools import partial
+from multiprocessing import Pool
+import pygame
+import numpy as np
+from sim.config import SimConfig
+from sim.renderer import DroneRenderer
+from sim.telemetry import read_telemetry
+from tools.replay import ReplayFlight, TelemetryReplay, replay_config
+
+"""
+This file is used to render flights to images, frame sequences and videos without a display,
+e.g. the thumbnails of a batch run or the videos of recorded telemetry logs.
+"""
+
+EXPORT_FORMATS = ("image", "frames", "video")
+VIDEO_SUFFIX = ".mp4"
+
+offscreen_renderer = None  # The offscreen renderer of the current process and the key of its configuration, created on first use
+offscreen_renderer_key = None
+
+def get_offscreen_renderer(flight, config):
+    """
+    Returns an offscreen renderer for a flight. A process keeps the renderer of the last configuration and
+    reuses it for the next flight, so a batch worker doesn't pre-draw the boundary and allocate the layers
+    for every image.
+
+    Args:
+        flight (DroneFlight): The flight to render.
+        config (SimConfig): The configuration.
+
+    Returns:
+        DroneRenderer: The renderer, reset to the flight.
+    """
+    global offscreen_renderer, offscreen_renderer_key
+    key = repr(sorted(vars(config).items()))
+    if offscreen_renderer is None or offscreen_renderer_key != key:
+        offscreen_renderer = DroneRenderer(flight, config=config, offscreen=True)
+        offscreen_renderer_key = key
+    else:
+        offscreen_renderer.reset(flight)
+    return offscreen_renderer
+
+def scale_surface(surface, width: int = None):
+    """
+    Scales a surface to a width, keeping its aspect ratio.
+
+    Args:
+        surface (pygame.Surface): The surface.
+        width (int, optional): The width in pixels. Defaults to None, which keeps the size.
+
+    Returns:
+        pygame.Surface: The scaled surface, or the surface itself.
+    """
+    if not width or width == surface.get_width():
+        return surface
+    height = max(round(surface.get_height() * width / surface.get_width()), 1)
+    return pygame.transform.smoothscale(surface, (width, height))
+
+def save_image(surface, image_file: str, width: int = None) -> None:
+    """
+    Saves a surface as an image, creating its directory if needed. The format follows the file suffix, e.g. PNG.
+
+    Args:
+        surface (pygame.Surface): The surface.
+        image_file (str): The path of the image.
+        width (int, optional): Scale the image to this width in pixels. Defaults to None, which keeps the size.
+    """
+    directory = os.path.dirname(image_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    pygame.image.save(scale_surface(surface, width), image_file)
+
+def render_result(flight, image_file: str, config=None, width: int = None) -> None:
+    """
+    Renders the result of a flight offscreen, as the window shows it after the flight: the photo footprints,
+    the boundary, the coverage heatmap, the colorbar and the whole flight path, and saves it as an image.
+
+    Args:
+        flight (DroneFlight): The flight, or a ReplayFlight advanced to the end of its replay.
+        image_file (str): The path of the image, e.g. 'result.png'.
+        config (SimConfig, optional): The configuration. Defaults to the configuration of the flight.
+        width (int, optional): Scale the image to this width in pixels. Defaults to None, which keeps the screen size.
+    """
+    renderer = get_offscreen_renderer(flight, config or flight.config)
+    renderer.draw()
+    renderer.draw_result()
+    save_image(renderer.screen, image_file, width)
+
+def replay_frames(telemetry_file: str, config=None, width: int = None, max_frames: int = None):
+    """
+    Replays a telemetry log offscreen, frame by frame, as the window would show it at SIMULATION_SPEED and FPS.
+    A flight longer than `max_frames` frames is played faster, and the last frame shows the result of the flight.
+
+    Args:
+        telemetry_file (str): The path of the telemetry log.
+        config (SimConfig, optional): The configuration for the screen and the speed. The flight area and camera
+                                      are taken from the log. Defaults to SimConfig.default().
+        width (int, optional): Scale the frames to this width in pixels. Defaults to None, which keeps the screen size.
+        max_frames (int, optional): The maximum number of frames. Defaults to EXPORT_MAX_FRAMES.
+
+    Yields:
+        pygame.Surface: The frames. A frame is only valid until the next one is drawn.
+    """
+    replay = TelemetryReplay(read_telemetry(telemetry_file))
+    config = replay_config(replay, config)
+    max_frames = max_frames or config.EXPORT_MAX_FRAMES
+    step = max(config.SIMULATION_SPEED / config.FPS, replay.duration / max_frames)
+    frame_count = int(np.ceil(replay.duration / step)) + 1 if step > 0 else 1
+    flight = ReplayFlight(replay, config)
+    renderer = get_offscreen_renderer(flight, config)
+    for frame, frame_time in enumerate(np.linspace(0, replay.duration, frame_count)):
+        flight.advance_to(frame_time)
+        renderer.draw()
+        if frame == frame_count - 1:
+            renderer.draw_result()
+        yield scale_surface(renderer.screen, width)
+
+def write_frames(frames, directory: str) -> int:
+    """
+    Saves frames as a numbered PNG sequence, 'frame_00000.png', 'frame_00001.png', ...
+
+    Args:
+        frames: The frames, e.g. from `replay_frames`.
+        directory (str): The directory of the sequence, created if needed.
+
+    Returns:
+        int: The number of frames.
+    """
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        pygame.image.save(frame, os.path.join(directory, f"frame_{count - 1:05d}.png"))
+    return count
+
+def write_video(frames, video_file: str, fps: float) -> int:
+    """
+    Encodes frames to a video with ffmpeg. The raw frames are piped to ffmpeg, so no frame is written to disk.
+
+    Args:
+        frames: The frames, e.g. from `replay_frames`.
+        video_file (str): The path of the video, the container follows the suffix, e.g. '.mp4'.
+        fps (float): The frames per second of the video.
+
+    Returns:
+        int: The number of frames.
+
+    Raises:
+        RuntimeError: If ffmpeg is not on the PATH or fails.
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("Exporting a video needs ffmpeg on the PATH, export a frame sequence instead")
+    directory = os.path.dirname(video_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    encoder = None
+    count = 0
+    try:
+        for count, frame in enumerate(frames, 1):
+            if encoder is None:
+                width, height = frame.get_size()
+                encoder = subprocess.Popen(
+                    [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+                     "-r", str(fps), "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", video_file],
+                    stdin=subprocess.PIPE)
+            encoder.stdin.write(pygame.image.tobytes(frame, "RGB"))
+    finally:
+        if encoder is not None:
+            encoder.stdin.close()
+            if encoder.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to write '{video_file}'")
+    return count
+
+def export_telemetry(telemetry_file: str, output: str, export_format: str = "image", config=None, width: int = None) -> dict:
+    """
+    Renders a telemetry log offscreen to an image of the result, a frame sequence or a video.
+
+    Args:
+        telemetry_file (str): The path of the telemetry log.
+        output (str): The path of the image, the directory of the frame sequence or the path of the video.
+        export_format (str, optional): 'image', 'frames' or 'video'. Defaults to 'image'.
+        config (SimConfig, optional): The configuration for the screen and the speed. Defaults to SimConfig.default().
+        width (int, optional): Scale the images to this width in pixels. Defaults to None, which keeps the screen size.
+
+    Returns:
+        dict: The 'telemetry' file, the 'output' path, the number of 'frames' and the 'error', or None.
+    """
+    config = config or SimConfig.default()
+    row = {"telemetry": telemetry_file, "output": output, "frames": 0, "error": None}
+    try:
+        if export_format == "image":
+            replay = TelemetryReplay(read_telemetry(telemetry_file))
+            flight = ReplayFlight(replay, replay_config(replay, config))
+            flight.advance_to(replay.duration)
+            render_result(flight, output, width=width)
+            row["frames"] = 1
+        elif export_format == "frames":
+            row["frames"] = write_frames(replay_frames(telemetry_file, config, width), output)
+        elif export_format == "video":
+            frames = replay_frames(telemetry_file, config, width)
+            row["frames"] = write_video(frames, output, config.FPS)
+        else:
+            raise ValueError(f"Unknown export format '{export_format}', expected one of {', '.join(EXPORT_FORMATS)}")
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+def export_output_path(telemetry_file: str, output_dir: str, export_format: str) -> str:
+    """
+    Returns the output path of a telemetry log in the output directory: the log's name with
+    '.png' for an image, '.mp4' for a video and no suffix for the directory of a frame sequence.
+
+    Args:
+        telemetry_file (str): The path of the telemetry log.
+        output_dir (str): The output directory.
+        export_format (str): 'image', 'frames' or 'video'.
+
+    Returns:
+        str: The output path.
+    """
+    name = os.path.splitext(os.path.basename(telemetry_file))[0]
+    suffix = {"image": ".png", "video": VIDEO_SUFFIX}.get(export_format, "")
+    return os.path.join(output_dir, name + suffix)
+
+def run_export(telemetry_files: list, output_dir: str, export_format: str = "image", jobs: int = None, config=None) -> list:
+    """
+    Renders telemetry logs offscreen on a process pool, see `export_telemetry`.
+
+    Args:
+        telemetry_files (list): The paths of the telemetry logs.
+        output_dir (str): The directory the images, frame sequences or videos are written to.
+        export_format (str, optional): 'image', 'frames' or 'video'. Defaults to 'image'.
+        jobs (int, optional): The number of worker processes. Defaults to None, which uses all cores.
+        config (SimConfig, optional): The configuration for the screen and the speed. Defaults to SimConfig.default().
+
+    Returns:
+        list: The result rows of `export_telemetry`, in the order of the logs.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {', '.join(EXPORT_FORMATS)}")
+    outputs = [export_output_path(telemetry_file, output_dir, export_format) for telemetry_file in telemetry_files]
+    with Pool(jobs) as pool:
+        results = pool.starmap(partial(export_telemetry, export_format=export_format, config=config), zip(telemetry_files, outputs))
+
+    failed = [row for row in results if row["error"] is not None]
+    for row in failed:
+        print(f"Failed to export '{row['telemetry']}': {row['error']}")
+    print(f"Exported {len(results) - len(failed)} of {len(results)} telemetry logs to '{output_dir}'")
+    return results
@@ -0,0 +1,184 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+"""
+This file is used to reuse warm Lua runtimes and compiled Lua chunks across many script runs.
+"""
+
+# Records the global state of a runtime and returns a function restoring it. Library tables like
+# `string` or `os` are restored one level deep, so scripts can't leak functions through them either.
+# The metatable shared by all strings is restored as well, e.g. a replaced `getmetatable("").__index`.
+SNAPSHOT_GLOBALS = """
+local pairs, type, rawset, collectgarbage = pairs, type, rawset, collectgarbage
+local globals = _G
+local saved, tables = {}, {}
+local function record(value)
+    local contents = {}
+    for table_key, table_value in pairs(value) do contents[table_key] = table_value end
+    tables[value] = contents
+end
+for key, value in pairs(globals) do
+    saved[key] = value
+    if type(value) == "table" and value ~= globals then record(value) end
+end
+local string_metatable = getmetatable("")
+if type(string_metatable) == "table" then record(string_metatable) end
+local function restore(target, contents)
+    for key in pairs(target) do
+        if contents[key] == nil then rawset(target, key, nil) end
+    end
+    for key, value in pairs(contents) do rawset(target, key, value) end
+end
+return function()
+    restore(globals, saved)
+    for target, contents in pairs(tables) do restore(target, contents) end
+    collectgarbage()
+end
+"""
+
+class PooledRuntime:
+    """
+    A Lua runtime kept warm by a LuaRuntimePool.
+
+    The global state right after the runtime was created is recorded as a baseline, and resetting
+    restores it, so a script can't leak globals into the next run. Compiled chunks are cached by
+    the SHA-256 hash of their source with LRU eviction.
+
+    Attributes:
+        lua (LuaRuntime): The Lua runtime.
+        state (dict): Python-side handles of the runner that created the runtime, see LuaRunner.runtime_state.
+        chunks (OrderedDict): The compiled chunks by source hash, least recently used first.
+        max_chunks (int): The maximum number of cached chunks.
+    """
+
+    def __init__(self, lua, state: dict, max_chunks: int):
+        """
+        Initializes the pooled runtime and records its baseline global state.
+
+        Args:
+            lua (LuaRuntime): The freshly created Lua runtime.
+            state (dict): Python-side handles of the runner that created the runtime.
+            max_chunks (int): The maximum number of cached chunks.
+        """
+        self.lua = lua
+        self.state = state
+        self.chunks = OrderedDict()
+        self.max_chunks = max_chunks
+        self.restore_globals = lua.execute(SNAPSHOT_GLOBALS)
+
+    def reset(self) -> None:
+        """
+        Restores the baseline global state and collects the garbage of the previous run.
+        """
+        self.restore_globals()
+
+    def compile(self, source: str):
+        """
+        Compiles a Lua chunk, or returns the cached chunk for the same source.
+
+        Args:
+            source (str): The Lua source code.
+
+        Returns:
+            The compiled chunk as a callable Lua function.
+        """
+        key = hashlib.sha256(source.encode()).hexdigest()
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.lua.compile(source)
+            self.chunks[key] = chunk
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+class LuaRuntimePool:
+    """
+    Class to keep warm Lua runtimes for reuse across script runs.
+
+    Runtimes are kept per runner class, because runners can create their runtimes differently
+    (e.g. the SandboxedLuaRunner). Script sources are cached by path and modification time.
+
+    Attributes:
+        max_chunks (int): The maximum number of cached chunks per runtime, or None to take
+                          LUA_CHUNK_CACHE_SIZE from the configuration of the runner.
+    """
+
+    def __init__(self, max_chunks: int = None):
+        """
+        Initializes an empty pool.
+
+        Args:
+            max_chunks (int, optional): The maximum number of cached chunks per runtime. Defaults to the
+                                        LUA_CHUNK_CACHE_SIZE of the runner's configuration.
+        """
+        self.max_chunks = max_chunks
+        self.free = {}
+        self.sources = OrderedDict()
+
+    def acquire(self, runner) -> PooledRuntime:
+        """
+        Takes a warm runtime for the runner's class out of the pool, or creates a new one.
+
+        Args:
+            runner (LuaRunner): The runner that will use the runtime.
+
+        Returns:
+            PooledRuntime: The reset runtime.
+        """
+        free = self.free.get(type(runner))
+        if free:
+            runtime = free.pop()
+            runtime.reset()
+            runner.restore_runtime_state(runtime.state)
+            return runtime
+        lua = runner.create_runtime()
+        return PooledRuntime(lua, runner.runtime_state(), self.cache_size(runner.config))
+
+    def cache_size(self, config) -> int:
+        """
+        Returns the number of chunks and sources cached for runners with a configuration.
+
+        Args:
+            config (SimConfig): The configuration of the runner.
+
+        Returns:
+            int: The cache size.
+        """
+        return self.max_chunks or config.LUA_CHUNK_CACHE_SIZE
+
+    def release(self, runner, runtime: PooledRuntime) -> None:
+        """
+        Returns a runtime to the pool.
+
+        Args:
+            runner (LuaRunner): The runner that used the runtime.
+            runtime (PooledRuntime): The runtime to return.
+        """
+        self.free.setdefault(type(runner), []).append(runtime)
+
+    def read_source(self, path: str, config) -> str:
+        """
+        Reads a script source, reusing the cached source if the file did not change.
+
+        Args:
+            path (str): The path of the script.
+            config (SimConfig): The configuration of the runner reading the script, see `cache_size`.
+
+        Returns:
+            str: The script source.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        source = self.sources.get(key)
+        if source is None:
+            with open(path, "r") as f:
+                source = f.read()
+            self.sources[key] = source
+            if len(self.sources) > self.cache_size(config):
+                self.sources.popitem(last=False)
+        else:
+            self.sources.move_to_end(key)
+        return source
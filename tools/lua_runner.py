@@ -1,70 +1,271 @@
-from lupa import LuaRuntime
-import time
-import settings
+from lupa import LuaRuntime, LuaError
+import re
+from functools import wraps
 from sim.utils import custom_print
 
+def expose_constants(source: str, names) -> str:
+    """
+    Rewrites the top-level `local NAME = value` declarations of the given names to `local NAME = NAME or value`,
+    so a global set before the script runs overrides the value in the script.
+
+    Args:
+        source (str): The Lua source code.
+        names: The names of the constants.
+
+    Returns:
+        str: The rewritten source code.
+    """
+    pattern = re.compile(r"^local\s+(%s)\s*=(?!=)" % "|".join(re.escape(name) for name in names), re.MULTILINE)
+    return pattern.sub(lambda match: f"local {match.group(1)} = {match.group(1)} or", source)
+
 class LuaRunner:
     """
     Class to manage the execution of Lua scripts within the drone simulation.
     
     Attributes:
         flight (DroneFlight): The flight object controlling the drone.
-        renderer (DroneRenderer): The renderer object for visualizing the drone's flight.
+        renderer (DroneRenderer): The renderer object for visualizing the drone's flight, or None when headless.
         lua (LuaRuntime): The Lua runtime environment.
+        lua_script_path (str): The path of the Lua script to be executed.
         lua_script (str): The Lua script to be executed.
+        runtime_pool (LuaRuntimePool): The pool the Lua runtime is taken from, or None for a fresh runtime.
+        config (SimConfig): The simulation configuration, the configuration of the flight.
+        script_globals (dict): Lua globals set before the script runs, overriding the script's constants.
+        coroutine: The script coroutine started by `start`, or None when the script runs with `execute`.
+        error (Exception): The exception an API function raised inside the coroutine, until `resume` re-raises it.
     """
-    def __init__(self, flight, renderer):
+    def __init__(self, flight, renderer=None, lua_script_path: str = None, runtime_pool=None, script_globals: dict = None):
         """
         Initializes the LuaRunner with the given flight and renderer objects.
+
+        Pauses always advance the flight on the simulated clock. Without a renderer the runner is headless,
+        and the Lua `os.time` and `os.clock` follow the simulated clock as well. A window paces the simulation
+        by running the script with `start` and `resume` on a ScriptScheduler instead.
         
         Args:
             flight (DroneFlight): The flight object controlling the drone.
-            renderer (DroneRenderer): The renderer object for visualizing the drone's flight.
+            renderer (DroneRenderer, optional): The renderer object for visualizing the drone's flight. Defaults to None.
+            lua_script_path (str, optional): Path to the Lua script. Defaults to the LUA_SCRIPT_PATH of the flight's configuration.
+            runtime_pool (LuaRuntimePool, optional): A pool to take a warm Lua runtime from instead of creating one.
+                                                     The runtime is returned to the pool by `close`. Defaults to None.
+            script_globals (dict, optional): Lua globals to set before the script runs. Top-level `local NAME = value`
+                                             constants of the script with the same names use them instead of their
+                                             values, see `expose_constants`. Defaults to None.
         """
         self.flight = flight
         self.renderer = renderer
-        self.lua = LuaRuntime(unpack_returned_tuples=True)
+        self.config = flight.config
+        self.lua_script_path = lua_script_path or self.config.LUA_SCRIPT_PATH
+        self.runtime_pool = runtime_pool
+        self.script_globals = script_globals or {}
+        self.pooled_runtime = None
+        self.coroutine = None
+        self.error = None
+        if runtime_pool is not None:
+            self.pooled_runtime = runtime_pool.acquire(self)
+            self.lua = self.pooled_runtime.lua
+        else:
+            self.lua = self.create_runtime()
         self.register_api_functions()
+        self.register_script_globals()
+        if self.renderer is None:
+            self.register_virtual_clock()
         self.load_lua_script()
 
+    def create_runtime(self) -> LuaRuntime:
+        """
+        Creates the Lua runtime environment the script is executed in.
+
+        Returns:
+            LuaRuntime: The new Lua runtime.
+        """
+        return LuaRuntime(unpack_returned_tuples=True)
+
+    def runtime_state(self) -> dict:
+        """
+        Returns the Python-side handles into a runtime created by `create_runtime`, which a
+        LuaRuntimePool keeps with the runtime and hands to the next runner via `restore_runtime_state`.
+
+        Returns:
+            dict: The handles, empty for a plain runtime.
+        """
+        return {}
+
+    def restore_runtime_state(self, state: dict) -> None:
+        """
+        Takes over the Python-side handles of a pooled runtime created by another runner.
+
+        Args:
+            state (dict): The handles returned by `runtime_state` when the runtime was created.
+        """
+
+    def api_functions(self) -> dict:
+        """
+        Returns the flight and renderer API functions available to Lua scripts.
+
+        Returns:
+            dict: The functions by their Lua name.
+        """
+        return {
+            "adjust_flight_parameters": self.flight.adjust_flight_parameters,
+            "pause_script_execution": self.pause_script_execution,
+            "get_distance_to_origin": self.flight.get_distance_to_origin,
+            "get_x_coordinate": self.flight.get_x_coordinate,
+            "get_y_coordinate": self.flight.get_y_coordinate,
+            "get_compass_heading": self.flight.get_compass_heading,
+            "get_coverage": self.flight.get_coverage,
+            "get_overlap": self.flight.get_overlap,
+            "take_photo": self.flight.take_photo,
+            "end_flight": self.flight.end_flight,
+        }
+
     def register_api_functions(self) -> None:
         """
         Registers the flight and renderer API functions to be accessible from Lua scripts.
         """
-        self.lua.globals().adjust_flight_parameters = self.flight.adjust_flight_parameters
-        self.lua.globals().pause_script_execution = self.pause_script_execution
-        self.lua.globals().get_distance_to_origin = self.flight.get_distance_to_origin
-        self.lua.globals().get_x_coordinate = self.flight.get_x_coordinate
-        self.lua.globals().get_y_coordinate = self.flight.get_y_coordinate
-        self.lua.globals().get_compass_heading = self.flight.get_compass_heading
-        self.lua.globals().take_photo = self.flight.take_photo
-        self.lua.globals().end_flight = self.flight.end_flight
+        lua_globals = self.lua.globals()
+        for name, function in self.api_functions().items():
+            lua_globals[name] = function
+
+    def register_script_globals(self) -> None:
+        """
+        Sets the script globals in the Lua runtime.
+        """
+        for name, value in self.script_globals.items():
+            self.lua.globals()[name] = value
+
+    def register_virtual_clock(self) -> None:
+        """
+        Replaces the Lua `os.time` and `os.clock` functions with the simulated clock,
+        so scripts that time themselves behave the same as in a real-time run. The clock starts at the
+        fixed SIMULATED_CLOCK_EPOCH instead of the wall clock, so e.g. `math.randomseed(os.time())`
+        gives the same results on every run.
+        """
+        start_time = int(self.config.SIMULATED_CLOCK_EPOCH)
+        self.lua.globals().os.time = lambda *args: start_time + int(self.flight.sim_time)
+        self.lua.globals().os.clock = lambda: self.flight.sim_time
 
     def pause_script_execution(self, duration: float) -> None:
         """
-        Pauses the Lua script execution for a specified duration.
-        
+        Pauses the Lua script execution for a specified duration, advancing the flight on the simulated clock
+        without sleeping. Scripts started with `start` yield the pause to their scheduler instead.
+
         Args:
             duration (float): The duration to pause the script execution, in seconds.
         """
-        start_time = time.time()
-        last_time = start_time
-        while time.time() - start_time < duration / settings.SIMULATION_SPEED:
-            delta_time = (time.time() - last_time) * settings.SIMULATION_SPEED
-            last_time = time.time()
-            self.flight.update(delta_time)
-            self.renderer.draw()
-        custom_print(f"Paused for {duration} seconds")
+        self.flight.log_event("pause", duration=duration)
+        self.advance_simulation(duration)
+        custom_print(f"Paused for {duration} seconds", config=self.config)
+
+    def advance_simulation(self, duration: float) -> None:
+        """
+        Advances the flight by exactly `duration` simulated seconds in a single closed-form
+        update, without rendering or sleeping.
+
+        Args:
+            duration (float): The simulated time to advance, in seconds.
+        """
+        if duration > 0:
+            self.flight.update(duration)
 
     def load_lua_script(self) -> None:
         """
-        Loads the Lua script from the file specified in the settings.
+        Loads the Lua script from the configured script path.
         """
-        with open(settings.LUA_SCRIPT_PATH, 'r') as f:
-            self.lua_script = f.read()
+        if self.runtime_pool is not None:
+            self.lua_script = self.runtime_pool.read_source(self.lua_script_path, self.config)
+        else:
+            with open(self.lua_script_path, 'r') as f:
+                self.lua_script = f.read()
+        if self.script_globals:
+            self.lua_script = expose_constants(self.lua_script, self.script_globals)
 
     def execute(self) -> None:
         """
-        Executes the loaded Lua script.
+        Executes the loaded Lua script. A pooled runtime reuses the compiled chunk of an earlier run of the same source.
+        """
+        if self.pooled_runtime is not None:
+            self.pooled_runtime.compile(self.lua_script)()
+        else:
+            self.lua.execute(self.lua_script)
+
+    def start(self) -> None:
+        """
+        Starts the loaded Lua script as a coroutine, as an alternative to `execute`. The script runs in
+        steps with `resume`: `pause_script_execution` yields the pause duration to the caller instead of
+        advancing the flight, so the caller decides when the script continues and several scripts can take
+        turns in one process, see ScriptScheduler. The registered API functions are kept, including
+        functions a profiler instrumented.
+        """
+        lua_globals = self.lua.globals()
+        for name in self.api_functions():
+            lua_globals[name] = self.keep_error(lua_globals[name])
+        self.lua.execute("pause_script_execution = function(duration) return coroutine.yield(duration) end")
+        chunk = self.pooled_runtime.compile(self.lua_script) if self.pooled_runtime is not None else self.lua.compile(self.lua_script)
+        self.coroutine = self.coroutine_function(chunk).coroutine()
+
+    def coroutine_function(self, chunk):
+        """
+        Returns the Lua function the script coroutine runs.
+
+        Args:
+            chunk: The compiled Lua script.
+
+        Returns:
+            The Lua function, the script itself.
+        """
+        return chunk
+
+    def keep_error(self, function):
+        """
+        Wraps an API function, so an exception it raises inside the coroutine is kept for `resume`.
+        Lua only reports a Python exception inside a coroutine as an empty LuaError.
+
+        Args:
+            function (callable): The API function.
+
+        Returns:
+            callable: The wrapped function.
+        """
+        @wraps(function)
+        def wrapper(*args):
+            try:
+                return function(*args)
+            except Exception as e:
+                self.error = e
+                raise
+        return wrapper
+
+    def resume(self):
+        """
+        Runs the script coroutine started by `start` until its next pause or its end.
+
+        Returns:
+            float: The duration of the pause in seconds, or None if the script ended.
+
+        Raises:
+            Exception: The exception an API function raised, e.g. FlightTerminated, or the LuaError of the script.
+        """
+        try:
+            duration = self.coroutine.send(None)
+        except StopIteration:
+            return None
+        except LuaError:
+            error, self.error = self.error, None
+            if error is not None:
+                raise error from None
+            raise
+        if not self.coroutine:
+            return None  # The script ended with a return statement
+        self.flight.log_event("pause", duration=duration)
+        custom_print(f"Paused for {duration} seconds", config=self.config)
+        return float(duration)
+
+    def close(self) -> None:
+        """
+        Returns a pooled Lua runtime to its pool. The runner can't execute scripts afterwards.
         """
-        self.lua.execute(self.lua_script)
+        if self.pooled_runtime is not None:
+            self.runtime_pool.release(self, self.pooled_runtime)
+            self.pooled_runtime = None
+            self.lua = None
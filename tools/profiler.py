@@ -0,0 +1,309 @@
+import gc
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+import numpy as np
+
+"""
+This file is used to measure where the time of a simulation run goes, without an external profiler.
+"""
+
+FRAME_TIME_BINS = (0, 5, 10, 20, 35, 50, 100, 250, 1000)  # Lower edges of the frame time histogram bins in milliseconds
+
+class Profiler:
+    """
+    Collects phase timers, Lua API call counts, frame times and allocation statistics of a run.
+
+    Phases nest: the time of a phase includes the phases started inside it, and its self time
+    excludes them. For example in a headless run the `api.pause_script_execution` phase contains the
+    `DroneFlight.update` phase of the pause, and the self time of the `lua` phase is the time spent
+    interpreting the script. In a window the script runs as a coroutine in the simulation thread, its
+    pauses yield to the scheduler and aren't API calls, and the `lua` phase measures every resumption.
+    Every thread nests its own phases, so the frames drawn by the main thread don't count towards the
+    phases of the simulation thread. Objects are instrumented by replacing their methods on the instance,
+    so nothing is measured, and nothing slows down, when no profiler is used.
+
+    Attributes:
+        trace_allocations (bool): Whether allocations are traced with tracemalloc, which slows down the run.
+        top_allocations (int): The number of allocation sites in the report.
+        phases (dict): The statistics by phase name: calls, total and self time in seconds, the longest call
+                       and, when allocations are traced, the net allocated bytes.
+        api_calls (dict): The number of calls by Lua API function name.
+        frame_times (list): The times between two rendered frames in seconds.
+    """
+
+    def __init__(self, trace_allocations: bool = True, top_allocations: int = 10):
+        """
+        Initializes an empty profile.
+
+        Args:
+            trace_allocations (bool, optional): Trace allocations with tracemalloc. Defaults to True.
+            top_allocations (int, optional): The number of allocation sites in the report. Defaults to 10.
+        """
+        self.trace_allocations = trace_allocations
+        self.top_allocations = top_allocations
+        self.phases = {}
+        self.api_calls = {}
+        self.frame_times = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.last_frame = None
+        self.start_time = None
+        self.wall_time = 0.0
+        self.started_tracing = False
+        self.gc_start = None
+        self.blocks_start = None
+        self.snapshot = None
+        self.peak_memory = None
+
+    def start(self) -> None:
+        """
+        Starts the run: the wall clock, the garbage collector counters and the allocation tracing.
+        """
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.gc_start = [stats["collections"] for stats in gc.get_stats()]
+        self.blocks_start = sys.getallocatedblocks()
+        self.start_time = time.perf_counter()
+
+    @property
+    def stack(self) -> list:
+        """
+        list: The phases running in the current thread, as [start time, time of the nested phases] entries.
+        """
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def stop(self) -> None:
+        """
+        Stops the run and takes the allocation snapshot.
+        """
+        self.wall_time = time.perf_counter() - self.start_time
+        if tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.snapshot = tracemalloc.take_snapshot()
+            if self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measures a phase of the run.
+
+        Args:
+            name (str): The phase name.
+        """
+        tracing = tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        entry = [time.perf_counter(), 0.0]
+        stack = self.stack
+        stack.append(entry)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - entry[0]
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            with self.lock:
+                self.record_phase(name, elapsed, entry[1], tracing, memory)
+
+    def record_phase(self, name: str, elapsed: float, nested: float, tracing: bool, memory: int) -> None:
+        """
+        Adds a finished call of a phase to its statistics.
+
+        Args:
+            name (str): The phase name.
+            elapsed (float): The time of the call in seconds.
+            nested (float): The time of the phases started inside the call in seconds.
+            tracing (bool): Whether allocations were traced during the call.
+            memory (int): The traced memory when the call started, in bytes.
+        """
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = {"calls": 0, "total": 0.0, "self": 0.0, "max": 0.0, "net_bytes": 0}
+        stats["calls"] += 1
+        stats["total"] += elapsed
+        stats["self"] += elapsed - nested
+        stats["max"] = max(stats["max"], elapsed)
+        if tracing:
+            stats["net_bytes"] += tracemalloc.get_traced_memory()[0] - memory
+
+    def timed(self, name: str, function):
+        """
+        Wraps a function, so every call is measured as a phase.
+
+        Args:
+            name (str): The phase name.
+            function (callable): The function.
+
+        Returns:
+            callable: The wrapped function.
+        """
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def instrument(self, obj, method: str, name: str = None) -> None:
+        """
+        Measures every call of a method of an object.
+
+        Args:
+            obj: The object, e.g. a DroneFlight.
+            method (str): The method name, e.g. 'update'.
+            name (str, optional): The phase name. Defaults to the class and method name, e.g. 'DroneFlight.update'.
+        """
+        setattr(obj, method, self.timed(name or f"{type(obj).__name__}.{method}", getattr(obj, method)))
+
+    def instrument_frames(self, renderer) -> None:
+        """
+        Measures the draw calls of a renderer and the time between two frames.
+
+        Args:
+            renderer (DroneRenderer): The renderer.
+        """
+        draw = self.timed(f"{type(renderer).__name__}.draw", renderer.draw)
+
+        @wraps(draw)
+        def wrapper(*args):
+            draw(*args)
+            now = time.perf_counter()
+            if self.last_frame is not None:
+                self.frame_times.append(now - self.last_frame)
+            self.last_frame = now
+        renderer.draw = wrapper
+
+    def instrument_runner(self, runner) -> None:
+        """
+        Counts and measures the calls of every Lua API function of a runner. Must be called after
+        the runner registered its API functions.
+
+        Args:
+            runner (LuaRunner): The runner.
+        """
+        lua_globals = runner.lua.globals()
+        for name, function in runner.api_functions().items():
+            self.api_calls.setdefault(name, 0)
+            lua_globals[name] = self.counted(name, self.timed(f"api.{name}", function))
+
+    def counted(self, name: str, function):
+        """
+        Wraps a Lua API function, so its calls are counted.
+
+        Args:
+            name (str): The API function name.
+            function (callable): The function.
+
+        Returns:
+            callable: The wrapped function.
+        """
+        @wraps(function)
+        def wrapper(*args):
+            self.api_calls[name] += 1
+            return function(*args)
+        return wrapper
+
+    def frame_report(self) -> dict:
+        """
+        Summarizes the frame times.
+
+        Returns:
+            dict: The frame count, the mean, percentiles and maximum in milliseconds, and the histogram.
+        """
+        if not self.frame_times:
+            return {"count": 0}
+        frame_times = np.array(self.frame_times) * 1000
+        edges = np.append(FRAME_TIME_BINS, np.inf)
+        counts, _ = np.histogram(frame_times, bins=edges)
+        return {
+            "count": len(frame_times),
+            "mean_ms": float(frame_times.mean()),
+            "p50_ms": float(np.percentile(frame_times, 50)),
+            "p95_ms": float(np.percentile(frame_times, 95)),
+            "p99_ms": float(np.percentile(frame_times, 99)),
+            "max_ms": float(frame_times.max()),
+            "histogram": [{"from_ms": float(low), "to_ms": None if np.isinf(high) else float(high), "count": int(count)}
+                          for low, high, count in zip(edges[:-1], edges[1:], counts)],
+        }
+
+    def allocation_report(self) -> dict:
+        """
+        Summarizes the allocations: garbage collections, allocated blocks and the top allocation sites.
+
+        Returns:
+            dict: The allocation statistics.
+        """
+        report = {
+            "gc_collections": [stats["collections"] - start for stats, start in zip(gc.get_stats(), self.gc_start)],
+            "allocated_blocks_delta": sys.getallocatedblocks() - self.blocks_start,
+        }
+        if self.snapshot is not None:
+            ignored = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+            statistics = self.snapshot.filter_traces(ignored).statistics("lineno")
+            report["peak_bytes"] = self.peak_memory
+            report["top_sites"] = [{"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                                    "bytes": stat.size, "blocks": stat.count}
+                                   for stat in statistics[:self.top_allocations]]
+        return report
+
+    def report(self) -> dict:
+        """
+        Creates the report of the run.
+
+        Returns:
+            dict: The wall time, the phases sorted by their self time, the API call counts, the frame times
+                  and the allocation statistics.
+        """
+        phases = {name: dict(stats, mean=stats["total"] / stats["calls"])
+                  for name, stats in sorted(self.phases.items(), key=lambda item: -item[1]["self"])}
+        if not self.trace_allocations:
+            for stats in phases.values():
+                del stats["net_bytes"]
+        return {
+            "wall_time": self.wall_time,
+            "phases": phases,
+            "api_calls": self.api_calls,
+            "frames": self.frame_report(),
+            "allocations": self.allocation_report(),
+        }
+
+    def write_report(self, path: str) -> dict:
+        """
+        Writes the report as JSON and prints a summary of the phases.
+
+        Args:
+            path (str): The path of the report file.
+
+        Returns:
+            dict: The report.
+        """
+        report = self.report()
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Profile of {report['wall_time']:.3f} s (self time per phase):")
+        for name, stats in report["phases"].items():
+            print(f"  {name}: {stats['self']:.3f} s self, {stats['total']:.3f} s total, {stats['calls']} calls")
+        print(f"Saved profile report to '{path}'")
+        return report
+
+def profile_phase(profiler, name: str):
+    """
+    Measures a phase if there is a profiler.
+
+    Args:
+        profiler (Profiler): The profiler, or None.
+        name (str): The phase name.
+
+    Returns:
+        A context manager measuring the phase, or doing nothing without a profiler.
+    """
+    return profiler.phase(name) if profiler is not None else nullcontext()
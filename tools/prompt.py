@@ -1,24 +1,25 @@
-from settings import *
-import importlib.util
+import numpy as np
+from sim.config import SimConfig
+from sim.camera import photo_footprint
 
 """
 This file is used to make generating a prompt easier by providing global variables that can be changed to change the prompt.
 """
 
-def load_settings(settings_file="settings.py"):
+def describe_polygon(params):
     """
-    Load settings from a specified settings file.
+    Describe a polygon area with its holes for the prompt.
 
     Args:
-        settings_file (str): The path to the settings file. Defaults to "settings.py".
+        params (dict): The polygon parameters with 'vertices' and optional 'holes'.
 
     Returns:
-        module: The loaded settings module.
+        str: The description.
     """
-    spec = importlib.util.spec_from_file_location("settings", settings_file)
-    settings = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(settings)
-    return settings
+    description = "polygon with vertices at the following coordinates " + ", ".join(str(tuple(v)) for v in params['vertices'])
+    for hole in params.get('holes', []):
+        description += ", excluding the polygon with vertices " + ", ".join(str(tuple(v)) for v in hole)
+    return description
 
 def create_prompt(settings_file=None, output_file="prompt.txt", lua_file=None):
     """
@@ -33,17 +34,23 @@ def create_prompt(settings_file=None, output_file="prompt.txt", lua_file=None):
         None
     """
 
-    settings = load_settings(settings_file if settings_file else "settings.py")
+    config = SimConfig.load(settings_file) if settings_file else SimConfig.default()
 
-    BP = BOUNDARY_PARAMS # Shorten code below
-    if BOUNDARY_SHAPE == 'circle':
+    BP = config.BOUNDARY_PARAMS # Shorten code below
+    if config.BOUNDARY_SHAPE == 'circle':
         areaDescription = f"circle with radius of {BP.get('radius', 0)} meters and center at the following coordinates ({BP.get('x', 0)}, {BP.get('y', 0)})"#.format(BP.get('radius', 0), BP.get('x', 0), BP.get('y', 0))
-    elif BOUNDARY_SHAPE == 'rectangle':
+    elif config.BOUNDARY_SHAPE == 'rectangle':
         areaDescription = f"rectangle with vertices at the following coordinates {BP.get('v1', (0, 0))}, {BP.get('v2', (0, 0))}, {BP.get('v3', (0, 0))}, and {BP.get('v4', (0, 0))}"
+    elif config.BOUNDARY_SHAPE == 'polygon':
+        areaDescription = describe_polygon(BP)
+    elif config.BOUNDARY_SHAPE == 'multipolygon':
+        areaDescription = "set of separate areas: " + "; and ".join(describe_polygon(polygon) for polygon in BP['polygons'])
     else:
         print("Wrong boundary shape!")
         quit()
 
+    footprint_width, footprint_length = np.ptp(photo_footprint(config), axis=0).astype(int)
+
     prompt = f"""
 Imagine you are a drone operator and your job is to develop a Lua script to control a drone during a survey mission over a designated area. The script must be complete and ready for immediate execution, with no adjustments needed post-delivery. The mission requires the drone to stay within defined boundaries and take photographs for analysis.
 
@@ -57,12 +64,12 @@ Thoroughly survey the designated area and capture photographs periodically to en
 
 Drone Flight Constraints:
 - The drone must stay within designated boundaries, which for this task is a {areaDescription}
-- The total flight duration must not exceed {FLIGHT_DURATION} minutes.
-- The drone will maintain a constant height of {FLIGHT_HEIGHT} meters, has a gimbal with a pitch angle of {GIMBAL_ANGLE} degrees and a {CAMERA_FOV} FOV camera, which influence the frequency of photo captures.
-Note that the camera FOV of {CAMERA_FOV} refers only to the horizontal FOV. The drone can only capture images in an aspect ratio of 16:9. The resulting photos should be square, thus cropping the edges. The Photo will cover roughly 19x19m of area.
+- The total flight duration must not exceed {config.FLIGHT_DURATION} minutes.
+- The drone will maintain a constant height of {config.FLIGHT_HEIGHT} meters, has a gimbal with a pitch angle of {config.GIMBAL_ANGLE} degrees and a {config.CAMERA_FOV} FOV camera, which influence the frequency of photo captures.
+Note that the camera FOV of {config.CAMERA_FOV} refers only to the horizontal FOV. The drone can only capture images in an aspect ratio of 16:9. The resulting photos should be square, thus cropping the edges. The Photo will cover roughly {footprint_width}x{footprint_length}m of area.
 
 Functions:
-- `adjust_flight_parameters(xVelocity, yVelocity, yaw)`: controls the drone's flight direction. `xVelocity` with value range [{MIN_PITCH_ROLL_VALUE}, {MAX_PITCH_ROLL_VALUE}] controls velocity along the x-axis (positive values move the drone east, negative west), and `yVelocity` with value range [{MIN_PITCH_ROLL_VALUE}, {MAX_PITCH_ROLL_VALUE}] controls velocity along the y-axis (positive values move the drone north, negative south). `yaw` with value range [{MIN_YAW_VALUE}, {MAX_YAW_VALUE}] changes the drone's angular velocity (positive values rotate the drone clockwise, negative counterclockwise)
+- `adjust_flight_parameters(xVelocity, yVelocity, yaw)`: controls the drone's flight direction. `xVelocity` with value range [{config.MIN_PITCH_ROLL_VALUE}, {config.MAX_PITCH_ROLL_VALUE}] controls velocity along the x-axis (positive values move the drone east, negative west), and `yVelocity` with value range [{config.MIN_PITCH_ROLL_VALUE}, {config.MAX_PITCH_ROLL_VALUE}] controls velocity along the y-axis (positive values move the drone north, negative south). `yaw` with value range [{config.MIN_YAW_VALUE}, {config.MAX_YAW_VALUE}] changes the drone's angular velocity (positive values rotate the drone clockwise, negative counterclockwise)
 `xVelocity` and `yVelocity` are both in meters/s and yaw is in degrees/s. The drone maintains these flight parameters until they are changed by another call to this function. 
 - `pause_script_execution(duration)`: pauses the script execution for a specified duration in seconds. This function is typically used after setting flight parameters to maintain the drone’s current direction and speed for the specified period before the next script command is executed.
 - `get_distance_to_origin()`: retrieves the distance in meters from the drone’s current location to the origin of the coordinate system.
@@ -72,7 +79,7 @@ Functions:
 - `end_flight()`: instructs the drone to return to its starting point and terminate the flight.
 
 Instructions:
-Develop the Lua script to ensure the drone remains within the boundary throughout the flight. Select an efficient and effective pattern for surveying the designated area. Implement error handling for failed compass heading retrievals by attempting a retry before any critical operations. The script should respect the {FLIGHT_DURATION} minute flight duration limit, utilizing the pause_script_execution function to control the timing of flight adjustments.
+Develop the Lua script to ensure the drone remains within the boundary throughout the flight. Select an efficient and effective pattern for surveying the designated area. Implement error handling for failed compass heading retrievals by attempting a retry before any critical operations. The script should respect the {config.FLIGHT_DURATION} minute flight duration limit, utilizing the pause_script_execution function to control the timing of flight adjustments.
 """
     
     if lua_file:
@@ -0,0 +1,219 @@
+import pygame
+import numpy as np
+from sim.config import SimConfig
+from sim.coverage import Coverage
+from sim.renderer import DroneRenderer
+from sim.telemetry import read_telemetry
+from sim.trajectory import Trajectory, PhotoLog
+
+"""
+This file is used to replay a recorded telemetry log in a window, without executing the Lua script again.
+"""
+
+SEEK_STEP = 10  # Simulated seconds to jump with the arrow keys
+
+class TelemetryReplay:
+    """
+    Class to reconstruct the state of a recorded flight at any simulated time from its telemetry log.
+    The drone moves in a straight line between two 'adjust' events, so the position is interpolated exactly.
+    Only logs of a single flight can be replayed, a fleet log has the events of several drones.
+
+    Attributes:
+        boundary_shape (str): The recorded boundary shape.
+        boundary_params (dict): The recorded boundary parameters.
+        camera (dict): The recorded camera settings, see CAMERA_SETTINGS.
+        segments (np.ndarray): The flight segments as rows of (time, x, y, x velocity, y velocity, yaw).
+        photos (np.ndarray): The photos as rows of (time, x, y, yaw).
+        duration (float): The simulated time of the last record.
+    """
+
+    def __init__(self, records: list):
+        """
+        Initializes the replay from the records of a telemetry log.
+
+        Args:
+            records (list): The telemetry records, starting with the 'start' record.
+
+        Raises:
+            ValueError: If the records are a fleet log, with the 'drone' number in the records.
+        """
+        drones = {record["drone"] for record in records if "drone" in record}
+        if drones:
+            raise ValueError(f"The telemetry log has the events of a fleet of {len(drones)} drones, only single flights can be replayed")
+        start = records[0]
+        self.boundary_shape = start["boundary_shape"]
+        self.boundary_params = start["boundary_params"]
+        self.camera = start.get("camera", {})
+        segments = [(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)]
+        photos = []
+        for record in records:
+            if record["event"] == "adjust":
+                segments.append((record["t"], record["x"], record["y"], record["vx"], record["vy"], record["yaw"]))
+            elif record["event"] == "end":
+                segments.append((record["t"], record["x"], record["y"], 0.0, 0.0, segments[-1][5]))
+            elif record["event"] == "photo":
+                photos.append((record["t"], record["x"], record["y"], record["yaw"]))
+        self.segments = np.array(segments)
+        self.photos = np.array(photos).reshape(-1, 4)
+        self.duration = records[-1]["t"]
+
+    def segment_at(self, time: float) -> np.ndarray:
+        """
+        Returns the flight segment active at a simulated time.
+
+        Args:
+            time (float): The simulated time.
+
+        Returns:
+            np.ndarray: The segment row (time, x, y, x velocity, y velocity, yaw).
+        """
+        return self.segments[max(np.searchsorted(self.segments[:, 0], time, side="right") - 1, 0)]
+
+    def position_at(self, time: float) -> np.ndarray:
+        """
+        Returns the drone position at a simulated time.
+
+        Args:
+            time (float): The simulated time.
+
+        Returns:
+            np.ndarray: The position (x, y).
+        """
+        segment = self.segment_at(time)
+        return segment[1:3] + segment[3:5] * (time - segment[0])
+
+class ReplayFlight:
+    """
+    A flight-like view of a replay that the DroneRenderer can draw. It only moves forward in time;
+    to seek backwards a new ReplayFlight is created.
+
+    Attributes:
+        sim_time (float): The current replay time.
+        position (np.ndarray): The drone position at the current replay time.
+        yaw (float): The drone yaw at the current replay time.
+        path (Trajectory): The flight segment vertices up to the current replay time.
+        photos (PhotoLog): The photos taken up to the current replay time.
+        coverage (Coverage): The live coverage of the photos taken up to the current replay time.
+    """
+
+    def __init__(self, replay: TelemetryReplay, config: SimConfig = None):
+        """
+        Initializes the flight at the start of the replay.
+
+        Args:
+            replay (TelemetryReplay): The replay to view.
+            config (SimConfig, optional): The configuration with the flight area and camera of the replay.
+                                          Defaults to SimConfig.default().
+        """
+        self.replay = replay
+        self.config = config or SimConfig.default()
+        self.sim_time = 0.0
+        self.position = np.zeros(2)
+        self.yaw = 0.0
+        self.path = Trajectory()
+        self.photos = PhotoLog()
+        self.coverage = Coverage(self.config)
+        self.coverage.add_boundary_to_coverage_map_n(self.config.BOUNDARY_SHAPE, self.config.BOUNDARY_PARAMS)
+
+    def advance_to(self, time: float) -> None:
+        """
+        Advances the flight to a later replay time, adding the path vertices and photos recorded until then.
+
+        Args:
+            time (float): The replay time.
+        """
+        for segment in self.replay.segments[len(self.path):]:
+            if segment[0] > time:
+                break
+            self.path.append(segment[0], segment[1], segment[2], segment[5])
+        for photo in self.replay.photos[len(self.photos):]:
+            if photo[0] > time:
+                break
+            self.photos.append(*photo)
+            self.coverage.add_photo_to_coverage_map_n(photo[1], photo[2], photo[3])
+        self.sim_time = time
+        self.position = self.replay.position_at(time)
+        self.yaw = self.replay.segment_at(time)[5]
+
+def replay_config(replay: TelemetryReplay, config: SimConfig = None) -> SimConfig:
+    """
+    Returns the configuration to draw a replay with: the flight area and camera are taken from the log.
+
+    Args:
+        replay (TelemetryReplay): The replay.
+        config (SimConfig, optional): The configuration for everything else. Defaults to SimConfig.default().
+
+    Returns:
+        SimConfig: The configuration.
+    """
+    return (config or SimConfig.default()).replace(BOUNDARY_SHAPE=replay.boundary_shape, BOUNDARY_PARAMS=replay.boundary_params,
+                                                   **replay.camera)
+
+def replay_speed(config: SimConfig) -> float:
+    """
+    Returns the speed a replay starts at. A SIMULATION_SPEED of 0 runs a simulation as fast as it can, but would
+    stop a replay at its start, so the replay falls back to the SIMULATION_SPEED of settings.py, or real time.
+
+    Args:
+        config (SimConfig): The configuration.
+
+    Returns:
+        float: The simulated seconds per real second, greater than 0.
+    """
+    for speed in (config.SIMULATION_SPEED, SimConfig.default().SIMULATION_SPEED):
+        if speed > 0:
+            return speed
+    return 1.0
+
+def run_replay(telemetry_file: str, config: SimConfig = None) -> None:
+    """
+    Replays a telemetry log in a window.
+    Space pauses, the left and right arrow keys seek, the up and down arrow keys change the speed
+    and Home restarts the replay.
+
+    Args:
+        telemetry_file (str): The path of the telemetry log.
+        config (SimConfig, optional): The configuration for the screen and the replay speed, see `replay_speed`.
+                                      The flight area and camera are taken from the log. Defaults to SimConfig.default().
+    """
+    replay = TelemetryReplay(read_telemetry(telemetry_file))
+    config = replay_config(replay, config)
+    flight = ReplayFlight(replay, config)
+    renderer = DroneRenderer(flight, config=config)
+    print("Replaying. Space: pause, Left/Right: seek, Up/Down: speed, Home: restart")
+
+    clock = pygame.time.Clock()
+    replay_time = 0.0
+    speed = replay_speed(config)
+    paused = False
+    running = True
+    while running:
+        delta_time = clock.tick(config.FPS) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    replay_time += SEEK_STEP
+                elif event.key == pygame.K_LEFT:
+                    replay_time -= SEEK_STEP
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+                elif event.key == pygame.K_HOME:
+                    replay_time = 0.0
+
+        if not paused:
+            replay_time += delta_time * speed
+        replay_time = min(max(replay_time, 0.0), replay.duration)
+        if replay_time < flight.sim_time:
+            flight = ReplayFlight(replay, config)
+            renderer.reset(flight)
+        flight.advance_to(replay_time)
+        renderer.draw()
+        state = " (paused)" if paused else ""
+        pygame.display.set_caption(f"Drone Simulation Replay - {replay_time:.1f} / {replay.duration:.1f} s, speed x{speed:g}{state}")
+    pygame.quit()
@@ -0,0 +1,216 @@
+from lupa import LuaRuntime
+import time
+from tools.lua_runner import LuaRunner
+from sim.utils import custom_print
+
+"""
+This file is used to run untrusted, generated Lua scripts with limits on instructions, time and memory.
+"""
+
+HOOK_INTERVAL = 10000  # Lua instructions between two budget checks
+
+# Globals that give access to the file system, the process or the Python interpreter
+UNSAFE_GLOBALS = ("io", "debug", "package", "require", "dofile", "loadfile", "python")
+
+# The only functions of the Lua `os` library available in the sandbox
+SAFE_OS_FUNCTIONS = ("time", "clock", "date", "difftime")
+
+# Wraps `load` so it only accepts source text. Lua doesn't verify bytecode, so a crafted binary chunk
+# could break out of the sandbox. The environment is passed on only if it was given, like `load` does.
+TEXT_ONLY_LOAD = """
+function(load)
+    return function(chunk, name, mode, ...) return load(chunk, name, "t", ...) end
+end
+"""
+
+# Creates a `print` that formats its arguments like Lua's and passes the line to a Python function
+PRINT_TO = """
+function(output)
+    local select, tostring, concat = select, tostring, table.concat
+    return function(...)
+        local parts = {}
+        for i = 1, select("#", ...) do parts[i] = tostring((select(i, ...))) end
+        output(concat(parts, "\t"))
+    end
+end
+"""
+
+class ScriptBudgetExceeded(Exception):
+    """
+    Raised when a sandboxed script exceeds one of its budgets.
+
+    Attributes:
+        kind (str): The exceeded budget, 'instructions', 'wall_time' or 'sim_time'.
+    """
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+class SandboxedLuaRunner(LuaRunner):
+    """
+    A LuaRunner for untrusted scripts. The script runs in a Lua runtime with a memory cap and without
+    access to files, processes or Python. An instruction-count hook stops scripts that exceed their
+    instruction or wall-clock budget, e.g. a `while true do end` loop that never pauses, and pauses
+    beyond the simulated-time budget are refused.
+
+    Attributes:
+        max_instructions (int): The maximum number of Lua instructions.
+        max_wall_time (float): The maximum real time of the execution, in seconds.
+        max_sim_time (float): The maximum simulated flight time, in seconds.
+        max_memory (int): The maximum memory of the Lua runtime, in bytes.
+        instructions (int): The number of instructions executed so far, counted in steps of HOOK_INTERVAL.
+    """
+    def __init__(self, flight, renderer=None, lua_script_path: str = None, max_instructions: int = None,
+                 max_wall_time: float = None, max_sim_time: float = None, max_memory: int = None, runtime_pool=None,
+                 script_globals: dict = None):
+        """
+        Initializes the sandboxed runner. Budgets that are not given are taken from the flight's configuration.
+
+        Args:
+            flight (DroneFlight): The flight object controlling the drone.
+            renderer (DroneRenderer, optional): The renderer object for visualizing the drone's flight. Defaults to None.
+            lua_script_path (str, optional): Path to the Lua script. Defaults to the LUA_SCRIPT_PATH of the flight's configuration.
+            max_instructions (int, optional): Defaults to SANDBOX_MAX_INSTRUCTIONS.
+            max_wall_time (float, optional): Defaults to SANDBOX_MAX_WALL_TIME.
+            max_sim_time (float, optional): Defaults to SANDBOX_MAX_SIM_TIME.
+            max_memory (int, optional): Defaults to SANDBOX_MAX_MEMORY. A pooled runtime keeps the
+                                        memory cap it was created with.
+            runtime_pool (LuaRuntimePool, optional): A pool to take a warm sandboxed runtime from. Defaults to None.
+            script_globals (dict, optional): Lua globals overriding the script's constants. Defaults to None.
+        """
+        config = flight.config
+        self.max_instructions = max_instructions or config.SANDBOX_MAX_INSTRUCTIONS
+        self.max_wall_time = max_wall_time or config.SANDBOX_MAX_WALL_TIME
+        self.max_sim_time = max_sim_time or config.SANDBOX_MAX_SIM_TIME
+        self.max_memory = max_memory or config.SANDBOX_MAX_MEMORY
+        self.instructions = 0
+        self.wall_start_time = None
+        self.install_hook = None
+        self.print_to = None
+        super().__init__(flight, renderer, lua_script_path, runtime_pool, script_globals)
+
+    def create_runtime(self) -> LuaRuntime:
+        """
+        Creates a Lua runtime with a memory cap, without the Python bridge and without unsafe libraries.
+        The function installing the instruction hook keeps its own reference to `debug.sethook`,
+        so it still works after the `debug` library is removed. `load` only accepts source text and
+        `string.dump` is removed, so scripts can't run bytecode.
+
+        Returns:
+            LuaRuntime: The sandboxed Lua runtime.
+        """
+        lua = LuaRuntime(unpack_returned_tuples=True, register_eval=False, register_builtins=False,
+                         max_memory=self.max_memory)
+        self.install_hook = lua.execute(
+            "local sethook = debug.sethook "
+            "return function(check, count) "
+            "if check then sethook(function() check() end, '', count) else sethook() end end")
+
+        lua_globals = lua.globals()
+        safe_os = lua.table()
+        for name in SAFE_OS_FUNCTIONS:
+            safe_os[name] = lua_globals.os[name]
+        lua_globals.os = safe_os
+        for name in UNSAFE_GLOBALS:
+            lua_globals[name] = None
+        lua_globals.load = lua.eval(TEXT_ONLY_LOAD)(lua_globals.load)
+        lua_globals.string.dump = None
+        self.print_to = lua.eval(PRINT_TO)
+        return lua
+
+    def runtime_state(self) -> dict:
+        """
+        Returns the hook installer and the `print` factory of the sandboxed runtime, so a pooled runtime
+        can be rebound to the next runner's budgets and output.
+
+        Returns:
+            dict: The handles of the runtime.
+        """
+        return {"install_hook": self.install_hook, "print_to": self.print_to}
+
+    def restore_runtime_state(self, state: dict) -> None:
+        """
+        Takes over the hook installer and the `print` factory of a pooled sandboxed runtime.
+
+        Args:
+            state (dict): The handles returned by `runtime_state` when the runtime was created.
+        """
+        self.install_hook = state["install_hook"]
+        self.print_to = state["print_to"]
+
+    def register_api_functions(self) -> None:
+        """
+        Registers the API functions and a Lua `print` that goes through `custom_print`, so the output of
+        untrusted scripts only shows up with PRINT_OUTPUT and doesn't mix with the batch progress.
+        """
+        super().register_api_functions()
+        self.lua.globals().print = self.print_to(lambda line: custom_print(line, config=self.config))
+
+    def check_budget(self) -> None:
+        """
+        Called by the instruction hook. Raises ScriptBudgetExceeded when the instruction or wall-clock budget is used up.
+        """
+        self.instructions += HOOK_INTERVAL
+        if self.instructions > self.max_instructions:
+            raise ScriptBudgetExceeded("instructions", f"Script exceeded {self.max_instructions} instructions")
+        if self.wall_start_time is not None and time.time() - self.wall_start_time > self.max_wall_time:
+            raise ScriptBudgetExceeded("wall_time", f"Script exceeded {self.max_wall_time} seconds of real time")
+
+    def pause_script_execution(self, duration: float) -> None:
+        """
+        Pauses the Lua script execution, unless that exceeds the simulated-time budget.
+
+        Args:
+            duration (float): The duration to pause the script execution, in seconds.
+        """
+        if self.flight.sim_time + duration > self.max_sim_time:
+            raise ScriptBudgetExceeded("sim_time", f"Script exceeded {self.max_sim_time} seconds of simulated time")
+        super().pause_script_execution(duration)
+
+    def start(self) -> None:
+        """
+        Starts the loaded Lua script as a coroutine within its budgets, with fresh instruction and wall-clock budgets.
+        """
+        self.instructions = 0
+        self.wall_start_time = time.time()
+        super().start()
+
+    def coroutine_function(self, chunk):
+        """
+        Returns a Lua function that installs the instruction hook and runs the script. Lua hooks belong to
+        a coroutine, so the hook is installed inside the script coroutine and ends with it.
+
+        Args:
+            chunk: The compiled Lua script.
+
+        Returns:
+            The Lua function.
+        """
+        hooked = self.lua.eval("function(install, check, count, chunk) "
+                               "return function(...) install(check, count) return chunk(...) end end")
+        return hooked(self.install_hook, self.keep_error(self.check_budget), HOOK_INTERVAL, chunk)
+
+    def resume(self):
+        """
+        Runs the script coroutine until its next pause or its end, and refuses pauses beyond the simulated-time budget.
+
+        Returns:
+            float: The duration of the pause in seconds, or None if the script ended.
+        """
+        duration = super().resume()
+        if duration is not None and self.flight.sim_time + duration > self.max_sim_time:
+            raise ScriptBudgetExceeded("sim_time", f"Script exceeded {self.max_sim_time} seconds of simulated time")
+        return duration
+
+    def execute(self) -> None:
+        """
+        Executes the loaded Lua script within its budgets. The instruction hook is (re)installed
+        here and removed afterwards, so a pooled runtime checks the budgets of the runner currently using it.
+        """
+        self.instructions = 0
+        self.wall_start_time = time.time()
+        self.install_hook(self.check_budget, HOOK_INTERVAL)
+        try:
+            super().execute()
+        finally:
+            self.install_hook(None, 0)
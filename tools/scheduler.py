@@ -0,0 +1,258 @@
+import asyncio
+import heapq
+import threading
+import time
+from sim.constraints import FlightTerminated
+from sim.coverage import CoverageTargetReached
+
+"""
+This file is used to run Lua scripts cooperatively, as coroutines that are resumed when their pauses end.
+"""
+
+# Raised by API functions and updates after they ended a flight, which ends the scripts of that flight
+FLIGHT_ENDING_EXCEPTIONS = (FlightTerminated, CoverageTargetReached)
+
+class ScriptScheduler:
+    """
+    Class to run Lua scripts as coroutines on one simulated clock.
+
+    Every script runs until it calls `pause_script_execution`, which yields to the scheduler. The scheduler
+    advances the simulation to the time the earliest pause ends and resumes that script, so any number of
+    scripts interleave in one process and waiting costs nothing: on a simulated clock (`run`) the scheduler
+    jumps from one pause end to the next, in real time (`step` once per frame, or `run_async`) it sleeps.
+    Scripts whose pauses end at the same time are resumed in the order they were added. A script ends when
+    it returns, and is dropped when its flight ended, e.g. by end_flight or a violation in STOP_ON_VIOLATION.
+
+    Attributes:
+        now (callable): Returns the current simulated time.
+        advance (callable): Advances the simulation by a number of simulated seconds, e.g. DroneFlight.update.
+        running (callable): Returns whether the simulation still runs, it isn't advanced after it ended.
+        tasks (list): The heap of the waiting scripts as (wake time, order, runner, on_finish) tuples.
+    """
+
+    def __init__(self, now, advance, running=None):
+        """
+        Initializes a scheduler without scripts.
+
+        Args:
+            now (callable): Returns the current simulated time, e.g. `lambda: flight.sim_time`.
+            advance (callable): Advances the simulation by a number of simulated seconds, e.g. `flight.update`.
+            running (callable, optional): Returns whether the simulation still runs, e.g. `lambda: flight.running`.
+                                          Defaults to None, a simulation that runs until the scripts end.
+        """
+        self.now = now
+        self.advance = advance
+        self.running = running or (lambda: True)
+        self.tasks = []
+        self.added = 0
+        self.stopped = False
+
+    def add(self, runner, on_finish=None) -> None:
+        """
+        Starts the script of a runner as a coroutine, to be resumed at the current time.
+
+        Args:
+            runner (LuaRunner): The runner with the loaded script.
+            on_finish (callable, optional): Called without arguments when the script ended or was dropped. Defaults to None.
+        """
+        if runner.coroutine is None:
+            runner.start()
+        heapq.heappush(self.tasks, (self.now(), self.added, runner, on_finish))
+        self.added += 1
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def next_wake(self):
+        """
+        Returns the time the next pause ends. Scripts whose flights ended in the meantime are dropped.
+
+        Returns:
+            float: The simulated time, or None without scripts.
+        """
+        while self.tasks and not self.tasks[0][2].flight.running:
+            self.finish(heapq.heappop(self.tasks))
+        return self.tasks[0][0] if self.tasks else None
+
+    def resume_due(self, until: float = None) -> None:
+        """
+        Resumes every script whose pause has ended, until all are paused again.
+
+        Args:
+            until (float, optional): Also resume the scripts waking up to this time, which the clock was just
+                                     advanced to, in case of rounding. Defaults to the current time.
+        """
+        until = self.now() if until is None else max(until, self.now())
+        while self.tasks and self.tasks[0][0] <= until:
+            task = heapq.heappop(self.tasks)
+            _, order, runner, on_finish = task
+            duration = None
+            if runner.flight.running:
+                try:
+                    duration = runner.resume()
+                except FLIGHT_ENDING_EXCEPTIONS:
+                    if runner.flight.running:
+                        raise
+            if duration is None or not runner.flight.running:
+                self.finish(task)
+            else:
+                heapq.heappush(self.tasks, (self.now() + max(duration, 0), order, runner, on_finish))
+
+    def finish(self, task: tuple) -> None:
+        """
+        Ends a script that returned or whose flight ended.
+
+        Args:
+            task (tuple): The task of the script.
+        """
+        on_finish = task[3]
+        if on_finish is not None:
+            on_finish()
+
+    def advance_to(self, time: float) -> bool:
+        """
+        Advances the simulation to a time, unless it ended. An update that ends a flight, e.g. with a
+        violation in STOP_ON_VIOLATION, stops there, and the scripts of the flight are dropped by `next_wake`.
+
+        Args:
+            time (float): The simulated time.
+
+        Returns:
+            bool: Whether the simulation still runs.
+        """
+        try:
+            if time > self.now() and self.running():
+                self.advance(time - self.now())
+        except FLIGHT_ENDING_EXCEPTIONS:
+            pass
+        return self.running() and not self.stopped
+
+    def stop(self) -> None:
+        """
+        Stops advancing the simulation after the current step, e.g. when the window was closed. The scripts stay paused.
+        """
+        self.stopped = True
+
+    def step(self, delta_time: float) -> None:
+        """
+        Advances the clock by a number of simulated seconds, e.g. the time of one frame in real time.
+        The simulation is advanced to the end of every pause on the way, so scripts continue exactly then.
+        The step stops early when the simulation ended, e.g. by a script calling end_flight or a violation.
+
+        Args:
+            delta_time (float): The simulated time to advance.
+        """
+        end_time = self.now() + delta_time
+        self.resume_due()
+        wake = self.next_wake()
+        while wake is not None and wake < end_time and self.advance_to(wake):
+            self.resume_due(wake)
+            wake = self.next_wake()
+        self.advance_to(end_time)
+
+    def run(self, on_step=None) -> None:
+        """
+        Runs all scripts to their end on the simulated clock, as fast as possible. Between two pause ends
+        the simulation is advanced in a single update.
+
+        Args:
+            on_step (callable, optional): Called after the scripts were resumed at a pause end. Defaults to None.
+        """
+        self.resume_due()
+        wake = self.next_wake()
+        while wake is not None and self.advance_to(wake):
+            self.resume_due(wake)
+            if on_step is not None:
+                on_step()
+            wake = self.next_wake()
+
+    async def run_async(self, speed: float = None, on_frame=None, fps: float = 30) -> None:
+        """
+        Runs all scripts to their end as an asyncio task, so other tasks, like other schedulers, run while the scripts wait.
+
+        With a speed, the clock follows the real time, sped up by `speed`, and the task sleeps until the next pause
+        ends or, with `on_frame`, until the next frame. Without a speed, the clock jumps like in `run`, and the task
+        only gives way to other tasks between two pause ends.
+
+        Args:
+            speed (float, optional): Simulated seconds per real second. Defaults to None, the simulated clock.
+            on_frame (callable, optional): Called after every step in real time, e.g. DroneRenderer.draw. Defaults to None.
+            fps (float, optional): The frames per second with `on_frame`. Defaults to 30.
+        """
+        loop = asyncio.get_running_loop()
+        last_time = loop.time()
+        self.step(0)
+        wake = self.next_wake()
+        while wake is not None and self.running() and not self.stopped:
+            if speed is None:
+                await asyncio.sleep(0)
+                self.step(max(wake - self.now(), 0))
+            else:
+                delay = max(wake - self.now(), 0) / speed
+                await asyncio.sleep(min(delay, 1 / fps) if on_frame is not None else delay)
+                current_time = loop.time()
+                self.step((current_time - last_time) * speed)
+                last_time = current_time
+                if on_frame is not None:
+                    on_frame()
+            wake = self.next_wake()
+
+class SimulationThread(threading.Thread):
+    """
+    Runs a scheduler in a background thread and publishes the state of the simulation after every step,
+    so a renderer in another thread draws at its own frame rate and never slows the simulation down.
+
+    With a speed, the simulated clock follows the real time sped up by `speed`: the thread sleeps and steps
+    `rate` times per real second, and the scripts still continue exactly when their pauses end. Without a
+    speed, the simulation runs as fast as it can, from one pause end to the next, like `ScriptScheduler.run`.
+
+    Attributes:
+        scheduler (ScriptScheduler): The scheduler with the scripts.
+        publish (callable): Called after every step, e.g. to publish a snapshot for the renderer.
+        speed (float): Simulated seconds per real second, or None to run as fast as possible.
+        rate (float): The steps per real second with a speed.
+        error (Exception): The exception that ended the simulation, e.g. a LuaError of a script, or None.
+    """
+    def __init__(self, scheduler: ScriptScheduler, publish, speed: float = None, rate: float = 30):
+        """
+        Initializes the thread, which runs the scheduler when started.
+
+        Args:
+            scheduler (ScriptScheduler): The scheduler with the scripts.
+            publish (callable): Called after every step.
+            speed (float, optional): Simulated seconds per real second. Defaults to None, as fast as possible.
+            rate (float, optional): The steps per real second with a speed. Defaults to 30.
+        """
+        super().__init__(name="simulation", daemon=True)
+        self.scheduler = scheduler
+        self.publish = publish
+        self.speed = speed
+        self.rate = rate
+        self.error = None
+        self.stopping = threading.Event()
+
+    def run(self) -> None:
+        """
+        Runs the simulation until it ended, the scripts ended (without a speed) or the thread was stopped.
+        """
+        try:
+            self.publish()
+            if not self.speed:
+                self.scheduler.run(self.publish)
+                return
+            last_time = time.perf_counter()
+            self.scheduler.step(0)
+            while not self.stopping.wait(1 / self.rate) and self.scheduler.running():
+                current_time = time.perf_counter()
+                self.scheduler.step((current_time - last_time) * self.speed)
+                last_time = current_time
+                self.publish()
+        except Exception as e:
+            self.error = e
+
+    def stop(self) -> None:
+        """
+        Stops the simulation after the current step.
+        """
+        self.scheduler.stop()
+        self.stopping.set()
@@ -0,0 +1,254 @@
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+from functools import partial
+from multiprocessing import Pool
+import numpy as np
+from sim.config import SimConfig
+from tools.batch import RESULT_FIELDS, evaluate_script, write_results
+
+"""
+This file is used to tune the parameters of a Lua script (e.g. VELOCITY or LAYERS) or of the configuration
+(e.g. FLIGHT_HEIGHT) by running all parameter combinations headless and finding the Pareto front.
+"""
+
+SWEEP_FIELDS = ["pareto"] + RESULT_FIELDS
+
+def parse_parameter(text: str) -> tuple:
+    """
+    Parses a parameter given as 'NAME=values'. The values are either a comma-separated list ('3,4,5'),
+    an inclusive range with a step ('3:8:0.5'), or a range without a step ('3:8'), which can only be sampled.
+
+    Args:
+        text (str): The parameter.
+
+    Returns:
+        tuple: The name and either a list of values or a (low, high) tuple for a continuous range.
+    """
+    name, _, values = text.partition("=")
+    if not re.fullmatch(r"[A-Za-z_]\w*", name) or not values:
+        raise ValueError(f"Invalid parameter '{text}', expected NAME=VALUES")
+    if ":" in values:
+        bounds = [parse_value(value) for value in values.split(":")]
+        if len(bounds) == 2:
+            return name, tuple(bounds)
+        low, high, step = bounds
+        count = int(np.floor((high - low) / step + 1e-9)) + 1
+        return name, [parse_value(f"{low + i * step:.10g}") for i in range(count)]
+    return name, [parse_value(value) for value in values.split(",")]
+
+def parse_value(text: str):
+    """
+    Parses a parameter value as an int, a float or a string.
+
+    Args:
+        text (str): The value.
+
+    Returns:
+        The parsed value.
+    """
+    for value_type in (int, float):
+        try:
+            return value_type(text)
+        except ValueError:
+            pass
+    return text
+
+def grid_combinations(parameters: dict) -> list:
+    """
+    Returns every combination of the parameter values.
+
+    Args:
+        parameters (dict): The value lists by parameter name.
+
+    Returns:
+        list: The combinations as dictionaries.
+    """
+    for name, values in parameters.items():
+        if isinstance(values, tuple):
+            raise ValueError(f"Parameter {name} is a range without a step, which can only be sampled")
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*parameters.values())]
+
+def random_combinations(parameters: dict, samples: int, seed: int = None) -> list:
+    """
+    Draws random parameter combinations. Value lists are sampled uniformly, (low, high) ranges
+    continuously (integers if both bounds are integers).
+
+    Args:
+        parameters (dict): The value lists or ranges by parameter name.
+        samples (int): The number of combinations.
+        seed (int, optional): The random seed, so a sweep can be resumed. Defaults to None.
+
+    Returns:
+        list: The combinations as dictionaries.
+    """
+    rng = random.Random(seed)
+    combinations = []
+    for _ in range(samples):
+        combination = {}
+        for name, values in parameters.items():
+            if not isinstance(values, tuple):
+                combination[name] = rng.choice(values)
+            elif all(isinstance(bound, int) for bound in values):
+                combination[name] = rng.randint(*values)
+            else:
+                combination[name] = rng.uniform(*values)
+        combinations.append(combination)
+    return combinations
+
+def pareto_front(results: list) -> np.ndarray:
+    """
+    Finds the results that are not dominated by another result, maximizing coverage and
+    minimizing overlap and flight time. Failed results are never on the front.
+
+    Args:
+        results (list): The result rows.
+
+    Returns:
+        np.ndarray: A boolean mask of the results on the Pareto front.
+    """
+    ok = np.array([row["status"] == "ok" for row in results], dtype=bool)
+    objectives = np.array([(-row["coverage"], row["overlap"], row["flight_time"]) if row["status"] == "ok" else (0, 0, 0)
+                           for row in results], dtype=float).reshape(-1, 3)
+    no_worse = (objectives[:, np.newaxis, :] <= objectives[np.newaxis, :, :]).all(axis=2)
+    better = (objectives[:, np.newaxis, :] < objectives[np.newaxis, :, :]).any(axis=2)
+    # dominated[j]: some successful result i is no worse in every objective and better in one
+    dominated = (no_worse & better & ok[:, np.newaxis]).any(axis=0)
+    return ok & ~dominated
+
+def result_key(source: str, config: SimConfig, script_globals: dict, config_overrides: dict) -> str:
+    """
+    Returns the cache key of a sweep run, a hash of the script, the configuration and the parameters.
+
+    Args:
+        source (str): The Lua source code.
+        config (SimConfig): The base configuration.
+        script_globals (dict): The Lua parameters.
+        config_overrides (dict): The configuration parameters.
+
+    Returns:
+        str: The cache key.
+    """
+    data = json.dumps([hashlib.sha256(source.encode()).hexdigest(), vars(config), script_globals, config_overrides],
+                      sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def read_cache(cache_file: str) -> dict:
+    """
+    Reads the cached results of earlier sweeps.
+
+    Args:
+        cache_file (str): The path of the line-delimited JSON cache.
+
+    Returns:
+        dict: The result rows by cache key.
+    """
+    cache = {}
+    if os.path.exists(cache_file):
+        with open(cache_file, "r") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut off by an interrupted sweep
+                cache[record["key"]] = record["result"]
+    return cache
+
+def open_cache(cache_file: str):
+    """
+    Opens the cache for appending results. A line cut off by an interrupted sweep is ended first,
+    so the first new result doesn't end up on the same line and get lost.
+
+    Args:
+        cache_file (str): The path of the line-delimited JSON cache.
+
+    Returns:
+        The cache file, line buffered.
+    """
+    cut_off = False
+    if os.path.exists(cache_file) and os.path.getsize(cache_file) > 0:
+        with open(cache_file, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            cut_off = file.read(1) != b"\n"
+    file = open(cache_file, "a", buffering=1)
+    if cut_off:
+        file.write("\n")
+    return file
+
+def evaluate_combination(job: tuple, config: SimConfig) -> tuple:
+    """
+    Runs the script with one parameter combination. Used by the worker processes.
+
+    Args:
+        job (tuple): The cache key, the script path, the Lua parameters and the configuration parameters.
+        config (SimConfig): The base configuration.
+
+    Returns:
+        tuple: The cache key and the result row.
+    """
+    key, lua_file, script_globals, config_overrides = job
+    return key, evaluate_script(lua_file, config.replace(**config_overrides), script_globals)
+
+def run_sweep(lua_file: str, parameters: dict, samples: int = None, seed: int = None, jobs: int = None,
+              output_file: str = "sweep_results.csv", config: SimConfig = None) -> list:
+    """
+    Runs a Lua script headless for every parameter combination on a process pool and saves the results
+    with their Pareto front of coverage, overlap and flight time.
+
+    Parameters named like a setting (e.g. FLIGHT_HEIGHT) change the configuration, all other parameters
+    are set as Lua globals that override the script's top-level constants. Every finished run is appended
+    to the cache file, so an interrupted sweep continues where it stopped when it is started again.
+
+    Args:
+        lua_file (str): The path to the Lua script.
+        parameters (dict): The value lists, or (low, high) ranges when sampling, by parameter name.
+        samples (int, optional): Draw this many random combinations instead of the full grid. Defaults to None.
+        seed (int, optional): The random seed for the samples. Defaults to None.
+        jobs (int, optional): The number of worker processes. Defaults to None, which uses all cores.
+        output_file (str): The path to the CSV or JSON output file. Defaults to "sweep_results.csv".
+        config (SimConfig, optional): The base configuration. Defaults to SimConfig.default().
+
+    Returns:
+        list: The result rows in the order of the combinations, with the parameters and a 'pareto' column.
+    """
+    config = config or SimConfig.default()
+    with open(lua_file, "r") as file:
+        source = file.read()
+    for name in parameters:
+        if not hasattr(config, name) and not re.search(rf"^local\s+{re.escape(name)}\s*=", source, re.MULTILINE):
+            print(f"Warning: '{name}' is neither a setting nor a top-level local of the script, it is only set as a Lua global")
+
+    combinations = random_combinations(parameters, samples, seed) if samples else grid_combinations(parameters)
+    runs = []
+    for combination in combinations:
+        config_overrides = {name: value for name, value in combination.items() if hasattr(config, name)}
+        script_globals = {name: value for name, value in combination.items() if name not in config_overrides}
+        runs.append((result_key(source, config, script_globals, config_overrides), lua_file, script_globals, config_overrides))
+
+    cache_file = config.SWEEP_CACHE_FILE
+    cache = read_cache(cache_file)
+    pending = list({run[0]: run for run in runs if run[0] not in cache}.values())
+    print(f"Sweeping {len(runs)} combinations ({len(runs) - len(pending)} cached)")
+    if pending:
+        with Pool(jobs) as pool, open_cache(cache_file) as file:
+            for done, (key, result) in enumerate(pool.imap_unordered(partial(evaluate_combination, config=config), pending), 1):
+                cache[key] = result
+                file.write(json.dumps({"key": key, "result": result}) + "\n")
+                print(f"\r{done}/{len(pending)} runs finished", end="", flush=True)
+        print()
+
+    results = [dict(combination, **cache[run[0]]) for combination, run in zip(combinations, runs)]
+    for row, on_front in zip(results, pareto_front(results)):
+        row["pareto"] = bool(on_front)
+    write_results(results, output_file, SWEEP_FIELDS[:1] + list(parameters) + SWEEP_FIELDS[1:])
+
+    print("Pareto front (coverage, overlap, flight time):")
+    for row in sorted((row for row in results if row["pareto"]), key=lambda row: -row["coverage"]):
+        values = ", ".join(f"{name}={row[name]}" for name in parameters)
+        print(f"  {row['coverage']}%, {row['overlap']}%, {row['flight_time']:.0f} s: {values}")
+    print(f"Saved {len(results)} results to '{output_file}'")
+    return results